@@ -0,0 +1,152 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+
+# Starting per-stage latency estimates (seconds), from the README benchmarks;
+# replaced by measurements as jobs complete
+DEFAULT_STAGE_SECONDS = {
+    "Researcher": 7.5,
+    "Writer": 20.0,
+    "Fact-Checker": 7.5,
+    "Style-Polisher": 6.5,
+    "Formatting": 2.0,
+}
+
+ACTIVE_STATUSES = ("pending", "processing")
+
+
+def mark_stage(state: dict, step: Optional[str]) -> dict:
+    """
+    Close the stage currently running in `state` and start `step` (None ends
+    timing). `state` is a plain dict so it can travel in a Celery task context;
+    repeated stages (fact-check retries) accumulate. Returns the timings so far.
+    """
+    now = time.time()
+    timings = state.setdefault("timings", {})
+    current = state.get("current")
+    if current:
+        name, started = current
+        timings[name] = round(timings.get(name, 0.0) + now - started, 3)
+    state["current"] = [step, now] if step else None
+    return timings
+
+
+class StageLatencyTracker:
+    """Exponentially weighted moving average of each pipeline stage's duration"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._averages = dict(DEFAULT_STAGE_SECONDS)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            previous = self._averages.get(stage)
+            if previous is None:
+                self._averages[stage] = seconds
+            else:
+                self._averages[stage] = (1 - self.alpha) * previous + self.alpha * seconds
+
+    def job_seconds(self) -> float:
+        """Expected wall time of one job from start to finish"""
+        with self._lock:
+            return sum(self._averages.values())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {stage: round(seconds, 2) for stage, seconds in self._averages.items()}
+
+
+class AdmissionController:
+    """
+    Bounded admission for POST /api/generate.
+
+    Rejects new jobs with 503 when the number of unfinished jobs reaches
+    `max_queue_depth`, and with 429 when a client already has
+    `max_jobs_per_key` unfinished jobs or has submitted `rate_limit_per_hour`
+    jobs in the last hour. Rejections carry a Retry-After header. Admitted
+    jobs get an ETA based on queue depth and measured stage latencies.
+
+    Unfinished jobs are tracked by id and looked up with `get_job` (the job
+    store) to drop the ones that have finished, so this works whether jobs
+    run in-process or on Celery workers. Completed jobs' `stage_timings`
+    feed the latency averages used for ETAs.
+    """
+
+    def __init__(self, max_queue_depth: int, max_jobs_per_key: int,
+                 rate_limit_per_hour: int, max_concurrent_jobs: int,
+                 get_job: Callable[[str], Optional[dict]],
+                 latencies: Optional[StageLatencyTracker] = None):
+        self.max_queue_depth = max_queue_depth
+        self.max_jobs_per_key = max_jobs_per_key
+        self.rate_limit_per_hour = rate_limit_per_hour
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.get_job = get_job
+        self.latencies = latencies or StageLatencyTracker()
+        self._active = {}
+        self._submissions = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        for job_id in list(self._active):
+            job = self.get_job(job_id)
+            if job is not None and job.get("status") in ACTIVE_STATUSES:
+                continue
+            del self._active[job_id]
+            if job is not None and job.get("status") == "completed":
+                for stage, seconds in (job.get("stage_timings") or {}).items():
+                    self.latencies.record(stage, seconds)
+
+    def estimate_seconds(self, jobs_ahead: int) -> int:
+        """ETA for a job with `jobs_ahead` unfinished jobs in front of it"""
+        waves = jobs_ahead // self.max_concurrent_jobs + 1
+        return math.ceil(self.latencies.job_seconds() * waves)
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._active)
+
+    def admit(self, client_key: str, job_id: str) -> int:
+        """Register a new job or raise HTTPException; returns the job's ETA in seconds"""
+
+        now = time.time()
+        with self._lock:
+            self._refresh()
+            job_seconds = self.latencies.job_seconds()
+
+            if len(self._active) >= self.max_queue_depth:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is at capacity, try again later",
+                    headers={"Retry-After": str(math.ceil(job_seconds))}
+                )
+
+            client_jobs = sum(1 for key in self._active.values() if key == client_key)
+            if client_jobs >= self.max_jobs_per_key:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Too many concurrent jobs (limit {self.max_jobs_per_key})",
+                    headers={"Retry-After": str(math.ceil(job_seconds))}
+                )
+
+            submissions = self._submissions[client_key]
+            while submissions and submissions[0] <= now - 3600:
+                submissions.popleft()
+            if len(submissions) >= self.rate_limit_per_hour:
+                retry_after = math.ceil(submissions[0] + 3600 - now)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded ({self.rate_limit_per_hour} jobs per hour)",
+                    headers={"Retry-After": str(max(retry_after, 1))}
+                )
+
+            jobs_ahead = len(self._active)
+            submissions.append(now)
+            self._active[job_id] = client_key
+
+        return self.estimate_seconds(jobs_ahead)
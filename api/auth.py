@@ -1,8 +1,10 @@
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 from .config import settings
@@ -62,6 +64,34 @@ def get_api_key(api_key: Optional[str] = None):
     # This function is a helper placeholder
     pass
 
+def get_client_key(
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+) -> str:
+    """Identify the caller for admission limits: verified credential, else client IP
+
+    Only a JWT that verifies (keyed on its subject) or the configured API key
+    counts; any other header value would let a client pick a fresh key per
+    request, so those callers are limited by address instead.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+
+    for key in (token, x_api_key):
+        if key and settings.API_KEY and hmac.compare_digest(key.encode(), settings.API_KEY.encode()):
+            # Never keep the key itself in admission state
+            return "key:" + hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
 # Optional: For production, implement proper user management
 class User:
     def __init__(self, user_id: str, email: str):
@@ -0,0 +1,29 @@
+from celery import Celery
+
+from .config import settings
+
+# Start a worker with:
+#   celery -A api.celery_app worker --loglevel=info
+app = Celery(
+    "contentforge",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["api.celery_tasks"]
+)
+
+app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # Stage tasks are long LLM calls: acknowledge only after they finish so a
+    # crashed worker's stage is redelivered, and don't let one worker hoard
+    # queued stages while its slots are busy
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    # Eager mode runs the whole chain in-process (tests, local development)
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=False,
+    result_expires=settings.JOB_TTL_SECONDS,
+)
@@ -0,0 +1,262 @@
+import sys
+import json
+import shutil
+from pathlib import Path
+from datetime import datetime
+
+from celery import Task, chain
+
+# Same path setup as api/tasks.py: src.lib is a sibling of api/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.agents.writer import run_writer
+from src.lib.agents.style_polisher import run_style_polisher
+from src.lib.async_pipeline import MAX_FACT_CHECK_ATTEMPTS
+from src.lib.checkpoint import stage_types
+from src.lib.claims import run_fact_checker_incremental, run_writer_targeted
+from src.lib.research_cache import run_researcher_cached
+from src.lib.retrieval import focus_research
+from src.lib.serialization import dump_output, load_output
+from src.lib.types import PRDInput
+from src.lib.log_writer import log_pipeline_result
+from src.lib.prompt_session import end_prompt_session
+from src.lib.logger import generate_run_id
+from src.lib.tracing import breakdown, run_trace, span
+
+from .admission import mark_stage
+from .celery_app import app
+from .downloads import save_source
+from .config import settings
+from .job_store import get_job_store
+from .result_cache import cache_completed_job
+from .streaming import broker
+
+
+def save_artifact(run_id: str, stage: str, output) -> str:
+    """
+    Persist a stage output and return a reference to it.
+
+    Stage outputs (full drafts, research) are passed between tasks by
+    reference rather than through the broker; ARTIFACT_DIR must be on storage
+    shared by every worker node.
+    """
+    path = Path(settings.ARTIFACT_DIR) / run_id / f"{stage}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dump_output(output)), encoding="utf-8")
+    return str(path)
+
+
+def remove_artifacts(run_id: str):
+    """Delete a run's stage outputs once the run has completed or failed for good"""
+    shutil.rmtree(Path(settings.ARTIFACT_DIR) / run_id, ignore_errors=True)
+
+
+def load_artifact(ctx: dict, stage: str):
+    path = Path(ctx["refs"][stage])
+    return load_output(stage_types()[stage], json.loads(path.read_text(encoding="utf-8")))
+
+
+def report_progress(ctx: dict, step: str, progress: int, message: str = None):
+    # Stage timing travels with the context from task to task
+    mark_stage(ctx.setdefault("stages", {}), step)
+    fields = {"status": "processing", "current_step": step, "progress": progress}
+    if message:
+        fields["message"] = message
+    get_job_store().update(ctx["job_id"], **fields)
+    broker.publish(ctx["job_id"], "progress", {"step": step, "progress": progress, "message": message})
+
+
+# Agent span recorded around each stage task (see src/lib/tracing.py)
+STAGE_AGENTS = {
+    "contentforge.research": "Researcher",
+    "contentforge.write": "Writer",
+    "contentforge.fact_check": "Fact-Checker",
+    "contentforge.polish": "Style-Polisher",
+}
+
+
+class StageTask(Task):
+    """Pipeline stage with exponential-backoff retries; marks the job failed once retries run out"""
+
+    autoretry_for = (Exception,)
+    retry_backoff = True
+    retry_backoff_max = 300
+    retry_jitter = True
+    max_retries = settings.CELERY_STAGE_MAX_RETRIES
+
+    def __call__(self, ctx: dict, *args, **kwargs):
+        # Spans travel with the context, so the last stage sees the whole run
+        with run_trace(ctx.get("run_id"), ctx.setdefault("spans", [])):
+            agent = STAGE_AGENTS.get(self.name)
+            if agent is None:
+                return super().__call__(ctx, *args, **kwargs)
+            with span("agent", agent, attempt=ctx.get("attempt", 0)):
+                return super().__call__(ctx, *args, **kwargs)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        ctx = args[0] if args else kwargs.get("ctx", {})
+        if ctx.get("run_id"):
+            end_prompt_session(ctx["run_id"])
+            remove_artifacts(ctx["run_id"])
+        job_id = ctx.get("job_id")
+        if not job_id:
+            return
+        get_job_store().update(
+            job_id,
+            status="failed",
+            error=str(exc),
+            message=f"Generation failed in {self.name}",
+            completed_at=datetime.utcnow()
+        )
+        broker.publish(job_id, "error", {"error": str(exc)})
+
+
+@app.task(bind=True, base=StageTask, name="contentforge.research")
+def research_stage(self, ctx: dict) -> dict:
+    report_progress(ctx, "Researcher", 5)
+    prd = PRDInput(**ctx["prd"])
+    research = run_researcher_cached(prd, ctx["run_id"])
+    ctx["refs"]["research"] = save_artifact(ctx["run_id"], "research", research)
+    return ctx
+
+
+@app.task(bind=True, base=StageTask, name="contentforge.write")
+def write_stage(self, ctx: dict) -> dict:
+    attempt = ctx["attempt"]
+    if attempt:
+        report_progress(ctx, "Fact-Checker", 55 + attempt * 5,
+                        f"Fact check failed, retrying ({attempt}/{MAX_FACT_CHECK_ATTEMPTS - 1})...")
+    else:
+        report_progress(ctx, "Writer", 30)
+
+    prd = PRDInput(**ctx["prd"])
+    research = focus_research(prd, load_artifact(ctx, "research"))
+    if attempt:
+        # Rewrite only the sections the failed check flagged
+        draft = run_writer_targeted(prd, research, load_artifact(ctx, "draft"),
+                                    load_artifact(ctx, "fact_check"), ctx["run_id"],
+                                    retry_count=attempt)
+    else:
+        draft = run_writer(prd, research, ctx["run_id"])
+    ctx["refs"]["draft"] = save_artifact(ctx["run_id"], "draft", draft)
+    return ctx
+
+
+@app.task(bind=True, base=StageTask, name="contentforge.fact_check")
+def fact_check_stage(self, ctx: dict) -> dict:
+    if not ctx["attempt"]:
+        report_progress(ctx, "Fact-Checker", 55)
+
+    draft = load_artifact(ctx, "draft")
+    research = focus_research(PRDInput(**ctx["prd"]), load_artifact(ctx, "research"))
+    fact_check = run_fact_checker_incremental(draft, research, ctx["run_id"], retry_count=ctx["attempt"])
+    ctx["refs"]["fact_check"] = save_artifact(ctx["run_id"], "fact_check", fact_check)
+
+    # Failed check: loop back through the writer as new tasks, keeping the
+    # rest of the chain (polish, format) attached
+    if not fact_check.passed and ctx["attempt"] < MAX_FACT_CHECK_ATTEMPTS - 1:
+        retry_ctx = dict(ctx, attempt=ctx["attempt"] + 1)
+        return self.replace(chain(write_stage.s(retry_ctx), fact_check_stage.s()))
+
+    return ctx
+
+
+@app.task(bind=True, base=StageTask, name="contentforge.polish")
+def polish_stage(self, ctx: dict) -> dict:
+    report_progress(ctx, "Style-Polisher", 80, "Polishing content...")
+    prd = PRDInput(**ctx["prd"])
+    draft = load_artifact(ctx, "draft")
+    final = run_style_polisher(draft, prd, ctx["run_id"])
+    ctx["refs"]["polish"] = save_artifact(ctx["run_id"], "polish", final)
+    return ctx
+
+
+@app.task(bind=True, base=StageTask, name="contentforge.format")
+def format_stage(self, ctx: dict) -> dict:
+    report_progress(ctx, "Formatting", 95, "Saving content...")
+    job_id = ctx["job_id"]
+    output_format = ctx["output_format"]
+    title = ctx["prd"].get("title")
+
+    research = load_artifact(ctx, "research")
+    draft = load_artifact(ctx, "draft")
+    final = load_artifact(ctx, "polish")
+    fact_check = load_artifact(ctx, "fact_check")
+
+    # Only the markdown is kept; formats are rendered on first download
+    source = save_source(job_id, final.polished, title)
+
+    job_result = {
+        "run_id": ctx["run_id"],
+        **source,
+        "download_url": f"/api/download/{job_id}",
+        "format": output_format,
+        "word_count": len(final.polished.split()),
+        "fact_check_passed": fact_check.passed,
+        "timings": breakdown(ctx["spans"])
+    }
+    stage_timings = mark_stage(ctx["stages"], None)
+    end_prompt_session(ctx["run_id"])
+    get_job_store().update(
+        job_id,
+        status="completed",
+        progress=100,
+        current_step="Complete",
+        message="Generation complete",
+        completed_at=datetime.utcnow(),
+        result=job_result,
+        stage_timings=stage_timings
+    )
+    broker.publish(job_id, "complete", job_result)
+    cache_completed_job(ctx.get("cache_key"), source["source_path"], job_result)
+
+    log_pipeline_result({
+        "run_id": ctx["run_id"],
+        "job_id": job_id,
+        "prd_title": title,
+        "duration_seconds": round(sum(stage_timings.values()), 2),
+        "stage_timings": stage_timings,
+        "timings": job_result["timings"],
+        "final_content": final.polished,
+        "research": {"sources": len(research.sources), "facts": len(research.facts)},
+        "draft": {"word_count": draft.word_count},
+        "fact_check": {"passed": fact_check.passed, "issues": len(fact_check.issues)},
+        "final": {"word_count": job_result["word_count"]},
+        "format": output_format,
+        "status": "success"
+    })
+    remove_artifacts(ctx["run_id"])
+    return job_result
+
+
+def enqueue_pipeline(job_id: str, prd_text: str, title: str, output_format: str, cache_key: str = None):
+    """Queue the pipeline as a chain of stage tasks; the API process only enqueues"""
+
+    ctx = {
+        "job_id": job_id,
+        "run_id": generate_run_id(),
+        "prd": {"text": prd_text, "title": title},
+        "output_format": output_format,
+        "cache_key": cache_key,
+        "attempt": 0,
+        "refs": {},
+        "spans": []
+    }
+
+    pipeline = chain(
+        research_stage.s(ctx),
+        write_stage.s(),
+        fact_check_stage.s(),
+        polish_stage.s(),
+        format_stage.s()
+    )
+
+    try:
+        return pipeline.apply_async()
+    except Exception as e:
+        if not app.conf.task_always_eager:
+            raise
+        # Eager retries re-raise in the caller; StageTask.on_failure has
+        # already marked the job failed
+        print(f"Job {job_id} failed: {str(e)}")
+        return None
@@ -23,8 +23,37 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10 MB
     ALLOWED_EXTENSIONS: List[str] = ["txt", "md"]
     
-    # Rate Limiting
-    RATE_LIMIT_PER_HOUR: int = 10
+    # Rate Limiting / Admission Control
+    RATE_LIMIT_PER_HOUR: int = 10  # Jobs per client per hour
+    MAX_QUEUE_DEPTH: int = 50  # Unfinished jobs across all clients before 503
+    MAX_JOBS_PER_KEY: int = 3  # Unfinished jobs per client before 429
+    MAX_CONCURRENT_JOBS: int = 4  # Jobs the backend runs at once (for ETAs)
+    
+    # Job Storage
+    JOB_STORE_BACKEND: str = "memory"  # memory | sqlite | redis
+    JOB_STORE_PATH: str = "jobs.sqlite"
+    JOB_TTL_SECONDS: int = 86400  # Finished jobs are evicted after 24 hours
+    REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # Pipeline Execution
+    EXECUTION_MODE: str = "background"  # background (in-process) | celery
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
+    CELERY_TASK_ALWAYS_EAGER: bool = False
+    CELERY_WORKER_CONCURRENCY: int = 2
+    CELERY_STAGE_MAX_RETRIES: int = 3
+    ARTIFACT_DIR: str = "artifacts"  # Stage outputs shared between workers
+    
+    # Result Cache / Output Retention
+    RESULT_CACHE_ENABLED: bool = True  # Identical requests reuse a finished job's output
+    RESULT_CACHE_PATH: str = "cache/result_cache.sqlite"
+    PIPELINE_VERSION: str = "1"  # Bump to invalidate cached results after pipeline changes
+    OUTPUT_MAX_AGE_SECONDS: int = 7 * 86400  # Output files older than this are evicted
+    OUTPUT_MAX_BYTES: int = 1024 * 1024 * 1024  # 1 GB cap on the outputs directory
+    DOWNLOAD_MAX_AGE_SECONDS: int = 3600  # Cache-Control max-age for downloads
+    
+    # Streaming
+    STREAM_HEARTBEAT_SECONDS: int = 15  # SSE comment sent on idle /api/stream connections
     
     class Config:
         env_file = ".env"
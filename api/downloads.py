@@ -0,0 +1,230 @@
+import asyncio
+import gzip
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Mapping, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are written
+    brotli = None
+
+# src.lib is a sibling of api/ (see api/tasks.py)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.export import content_hash
+from src.lib.render_pool import RenderError, get_render_pool
+
+OUTPUT_DIR = Path("outputs")
+
+MEDIA_TYPES = {
+    "md": "text/markdown",
+    "html": "text/html",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+
+DEFAULT_TITLE = "Generated Content"
+
+# Text formats get pre-compressed variants next to them (PDF and DOCX are
+# already compressed)
+COMPRESSIBLE_FORMATS = ("md", "html")
+
+# Content-Encoding -> variant suffix, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+class ArtifactResponse(FileResponse):
+    """
+    FileResponse (Range, If-Range, HEAD, and `http.response.pathsend` for
+    zero-copy sends on servers that offer it) reading larger chunks when it
+    has to stream the file itself
+    """
+
+    chunk_size = 1024 * 1024
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + ENCODINGS[encoding])
+
+
+def available_encodings() -> list:
+    return [encoding for encoding in ENCODINGS if encoding != "br" or brotli is not None]
+
+
+def write_compressed_variants(path: Path):
+    """Write gzip (and brotli, if installed) copies of a text output next to it, once"""
+    compressors = {
+        "gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+        "br": lambda data: brotli.compress(data, quality=11),
+    }
+    data = None
+    for encoding in available_encodings():
+        target = variant_path(path, encoding)
+        if target.exists():
+            continue
+        if data is None:
+            data = path.read_bytes()
+        partial = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            partial.write_bytes(compressors[encoding](data))
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+
+
+def negotiate_encoding(fmt: str, accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred pre-compressed encoding the client accepts for `fmt` (None for identity)"""
+    if fmt not in COMPRESSIBLE_FORMATS or not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q=") and quality[2:].strip("0.") == "":
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in available_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def save_source(job_id: str, markdown: str, title: Optional[str]) -> dict:
+    """
+    Persist a finished job's polished markdown, the only output written at
+    completion time; other formats are rendered when first downloaded.
+    Returns the result fields describing it.
+    """
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    source = OUTPUT_DIR / f"{job_id}.md"
+    source.write_text(markdown, encoding="utf-8")
+    write_compressed_variants(source)
+    return {
+        "source_path": str(source),
+        "content_hash": content_hash(markdown, title or DEFAULT_TITLE)
+    }
+
+
+def output_path(job_id: str, fmt: str) -> Path:
+    return OUTPUT_DIR / f"{job_id}.{fmt}"
+
+
+def job_output_files(job_id: str, result: Optional[dict]) -> list:
+    """Every file a job owns: its markdown source, rendered formats and their variants"""
+    files = [output_path(job_id, fmt) for fmt in MEDIA_TYPES]
+    files += [variant_path(output_path(job_id, fmt), encoding)
+              for fmt in COMPRESSIBLE_FORMATS for encoding in ENCODINGS]
+    # Jobs completed before lazy rendering recorded the eager file here
+    if result and result.get("file_path"):
+        files.append(Path(result["file_path"]))
+    return files
+
+
+def etag_for(result: dict, fmt: str, encoding: Optional[str] = None) -> Optional[str]:
+    """
+    Strong ETag for a format (and content encoding) of a job's content; None
+    for jobs without a content hash
+    """
+    digest = result.get("content_hash")
+    if not digest:
+        return None
+    return f'"{digest[:32]}-{fmt}.{encoding}"' if encoding else f'"{digest[:32]}-{fmt}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def ensure_rendered(job_id: str, job: dict, fmt: str) -> Optional[Path]:
+    """
+    Path of the job's output in `fmt`, rendering it from the markdown source
+    on first request. Returns None if the source is gone (evicted or deleted).
+    """
+    result = job["result"]
+    source = result.get("source_path")
+    if not source:
+        # Eagerly rendered job: only its original format exists
+        legacy = result.get("file_path")
+        if legacy and Path(legacy).suffix == f".{fmt}" and Path(legacy).exists():
+            return Path(legacy)
+        return None
+
+    source = Path(source)
+    if not source.exists():
+        return None
+    if fmt == "md":
+        await asyncio.to_thread(write_compressed_variants, source)
+        return source
+
+    path = output_path(job_id, fmt)
+    if not path.exists():
+        # Render under a private name so concurrent first downloads never
+        # serve a partial file; the export cache makes the loser's render a copy
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            await get_render_pool().arender(
+                source.read_text(encoding="utf-8"),
+                fmt,
+                str(partial),
+                job["request"].get("title") or DEFAULT_TITLE
+            )
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+    if fmt in COMPRESSIBLE_FORMATS:
+        await asyncio.to_thread(write_compressed_variants, path)
+    return path
+
+
+async def serve_download(job_id: str, job: dict, fmt: str, headers: Mapping[str, str],
+                         cache_control: str) -> Response:
+    """
+    Response for a completed job's output in `fmt`: a pre-compressed variant
+    when the client accepts one, 304 when If-None-Match matches (checked
+    before anything is rendered), otherwise the file with Range support
+    """
+    encoding = negotiate_encoding(fmt, headers.get("accept-encoding"))
+    etag = etag_for(job["result"], fmt, encoding)
+    response_headers = {"Cache-Control": cache_control}
+    if fmt in COMPRESSIBLE_FORMATS:
+        response_headers["Vary"] = "Accept-Encoding"
+
+    if etag_matches(headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=dict(response_headers, ETag=etag))
+
+    try:
+        path = await ensure_rendered(job_id, job, fmt)
+    except Exception as e:
+        # Timeouts and dead workers arrive as RenderError; anything the
+        # renderer itself raised (e.g. from write_pdf) is passed through as is
+        if not isinstance(e, RenderError):
+            print(f"Rendering {fmt} for job {job_id} failed: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Rendering failed: {str(e)}")
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if encoding:
+        variant = variant_path(path, encoding)
+        if variant.exists():
+            path = variant
+            response_headers["Content-Encoding"] = encoding
+        else:
+            etag = etag_for(job["result"], fmt)
+    if etag:
+        response_headers["ETag"] = etag
+
+    return ArtifactResponse(
+        path=path,
+        media_type=MEDIA_TYPES[fmt],
+        filename=f"{job_id}.{fmt}",
+        headers=response_headers
+    )
@@ -0,0 +1,284 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from copy import deepcopy
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _encode(value) -> str:
+    return json.dumps(value, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+class JobStore(ABC):
+    """
+    Storage for API job state.
+
+    Backends share one interface so the API can run with an in-process
+    store in development and a shared SQLite or Redis store when several
+    uvicorn workers (or Celery workers) need to see the same jobs. Finished
+    jobs are evicted `ttl_seconds` after they complete.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def create(self, job: dict):
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """The job, or None if it does not exist or has expired"""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields):
+        """Atomically merge fields into a job"""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> bool:
+        ...
+
+    def evict_expired(self) -> int:
+        """Remove finished jobs past their TTL; returns the number removed"""
+        return 0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+
+class MemoryJobStore(JobStore):
+    """In-process store (single worker only, lost on restart)"""
+
+    def __init__(self, ttl_seconds: int = 86400):
+        super().__init__(ttl_seconds)
+        self._jobs = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        self.evict_expired()
+        with self._lock:
+            self._jobs[job["job_id"]] = deepcopy(job)
+
+    def _drop_if_expired(self, job_id: str):
+        # Caller holds the lock
+        expires = self._expires.get(job_id)
+        if expires is not None and expires <= time.time():
+            self._jobs.pop(job_id, None)
+            del self._expires[job_id]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            self._drop_if_expired(job_id)
+            job = self._jobs.get(job_id)
+            return deepcopy(job) if job is not None else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            self._drop_if_expired(job_id)
+            if job_id not in self._jobs:
+                return
+            self._jobs[job_id].update(fields)
+            if fields.get("status") in TERMINAL_STATUSES:
+                self._expires[job_id] = time.time() + self.ttl_seconds
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            self._expires.pop(job_id, None)
+            return self._jobs.pop(job_id, None) is not None
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, expires in self._expires.items() if expires <= now]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+                del self._expires[job_id]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+
+class SQLiteJobStore(JobStore):
+    """Single-file store shared by every worker process on one host"""
+
+    def __init__(self, path: str = "jobs.sqlite", ttl_seconds: int = 86400):
+        super().__init__(ttl_seconds)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs (expires_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit: each statement commits on its own unless update() opens a transaction
+        with closing(sqlite3.connect(str(self.path), timeout=30, isolation_level=None)) as conn:
+            yield conn
+
+    def create(self, job: dict):
+        self.evict_expired()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, data, expires_at) VALUES (?, ?, NULL)",
+                (job["job_id"], _encode(job))
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE job_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, **fields):
+        with self._connect() as conn:
+            try:
+                # Take the write lock before reading so concurrent updates can't interleave
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT data FROM jobs WHERE job_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    (job_id, time.time())
+                ).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return
+                job = json.loads(row[0])
+                job.update(json.loads(_encode(fields)))
+                expires_at = time.time() + self.ttl_seconds if job.get("status") in TERMINAL_STATUSES else None
+                conn.execute(
+                    "UPDATE jobs SET data = ?, expires_at = ? WHERE job_id = ?",
+                    (_encode(job), expires_at, job_id)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)).rowcount > 0
+
+    def evict_expired(self) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+class RedisJobStore(JobStore):
+    """
+    Redis-backed store shared across hosts.
+
+    Each job is a hash of JSON-encoded fields. Updates run as a WATCH/MULTI
+    transaction so they never recreate a deleted or expired job, and finished
+    jobs expire through Redis' own TTL.
+    Works with any redis-py compatible client (including fakeredis in tests).
+    """
+
+    def __init__(self, client=None, url: str = "redis://localhost:6379/0",
+                 ttl_seconds: int = 86400, prefix: str = "contentforge:job:"):
+        super().__init__(ttl_seconds)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}"
+
+    def create(self, job: dict):
+        key = self._key(job["job_id"])
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={k: _encode(v) for k, v in job.items()})
+        pipe.execute()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        data = self.client.hgetall(self._key(job_id))
+        if not data:
+            return None
+        return {
+            (k.decode() if isinstance(k, bytes) else k): json.loads(v)
+            for k, v in data.items()
+        }
+
+    def update(self, job_id: str, **fields):
+        key = self._key(job_id)
+        mapping = {k: _encode(v) for k, v in fields.items()}
+
+        def apply(pipe):
+            # WATCH makes EXEC fail if the job is deleted or expires between the
+            # existence check and the write; transaction() then re-runs this
+            if not pipe.exists(key):
+                return
+            pipe.multi()
+            pipe.hset(key, mapping=mapping)
+            if fields.get("status") in TERMINAL_STATUSES:
+                pipe.expire(key, self.ttl_seconds)
+
+        self.client.transaction(apply, key)
+
+    def delete(self, job_id: str) -> bool:
+        return self.client.delete(self._key(job_id)) > 0
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*"))
+
+
+def create_job_store(settings) -> JobStore:
+    """Build the job store selected by JOB_STORE_BACKEND"""
+
+    backend = settings.JOB_STORE_BACKEND.lower()
+    ttl = settings.JOB_TTL_SECONDS
+
+    if backend == "memory":
+        return MemoryJobStore(ttl_seconds=ttl)
+    if backend == "sqlite":
+        return SQLiteJobStore(path=settings.JOB_STORE_PATH, ttl_seconds=ttl)
+    if backend == "redis":
+        return RedisJobStore(url=settings.REDIS_URL, ttl_seconds=ttl)
+
+    raise ValueError(f"Unknown JOB_STORE_BACKEND: {settings.JOB_STORE_BACKEND}")
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Process-wide job store shared by the API routes and the task runners"""
+
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            from .config import settings
+            _job_store = create_job_store(settings)
+    return _job_store
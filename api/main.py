@@ -1,18 +1,27 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, StreamingResponse
 import uvicorn
 import os
-from pathlib import Path
 import uuid
 from datetime import datetime
+from typing import Literal, Optional
 
 from .models import GenerateRequest, GenerateResponse, JobStatusResponse
-from .auth import verify_token, get_api_key
+from .auth import verify_token, get_api_key, get_client_key
+from .admission import AdmissionController
+from .downloads import MEDIA_TYPES, job_output_files, serve_download
+from .result_cache import get_result_cache, request_cache_key
 from .tasks import process_pipeline_job
+from .streaming import broker, format_sse
+from .job_store import get_job_store
+from .routes.knowledge import router as knowledge_router
+from .routes.runs import router as runs_router
 from .config import settings
 
+# After .tasks, which puts src.lib on the path
+from src.lib.tracing import metrics
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.API_TITLE,
@@ -31,12 +40,35 @@
     allow_headers=["*"],
 )
 
-# Mount static files for downloads
+app.include_router(knowledge_router)
+app.include_router(runs_router)
+
+# Generated files are served by /api/download and /downloads (see api/downloads.py)
 os.makedirs("outputs", exist_ok=True)
-app.mount("/downloads", StaticFiles(directory="outputs"), name="downloads")
 
-# In-memory job storage (use Redis in production)
-jobs = {}
+# Job storage (JOB_STORE_BACKEND: memory, sqlite or redis)
+jobs = get_job_store()
+
+# Bounded queue: per-client concurrency and hourly limits, ETAs from measured stage latencies
+admission = AdmissionController(
+    max_queue_depth=settings.MAX_QUEUE_DEPTH,
+    max_jobs_per_key=settings.MAX_JOBS_PER_KEY,
+    rate_limit_per_hour=settings.RATE_LIMIT_PER_HOUR,
+    max_concurrent_jobs=settings.MAX_CONCURRENT_JOBS,
+    get_job=jobs.get
+)
+
+def get_completed_job(job_id: str) -> dict:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Job not completed yet (status: {job['status']})"
+        )
+    return job
 
 @app.get("/")
 async def root():
@@ -49,7 +81,9 @@ async def root():
             "docs": "/docs",
             "generate": "/api/generate",
             "status": "/api/status/{job_id}",
-            "download": "/downloads/{filename}"
+            "stream": "/api/stream/{job_id}",
+            "knowledge": "/api/knowledge/search?q={topic}",
+            "download": "/api/download/{job_id}?format={format}"
         }
     }
 
@@ -58,20 +92,36 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
+        "queue_depth": admission.queue_depth(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus metrics
+    
+    Span durations per agent call, LLM request, web search and render, plus
+    LLM token counts, tokens/sec and time to first token, for this process.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/generate", response_model=GenerateResponse)
 async def generate_content(
     request: GenerateRequest,
     background_tasks: BackgroundTasks,
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    client_key: str = Depends(get_client_key)
 ):
     """
     Generate blog post from PRD
     
     This endpoint accepts a PRD and queues it for processing.
     Returns a job_id that can be used to check status.
+    Responds 503 when the queue is full and 429 when the client is over its
+    concurrency or hourly limit, both with a Retry-After header.
+    An identical earlier request (same text, title, model and pipeline
+    version) returns a completed job at once unless use_cache is false.
     """
     
     # Validate input
@@ -81,10 +131,44 @@ async def generate_content(
             detail="PRD text too short (minimum 50 characters)"
         )
     
-    # Create job
     job_id = str(uuid.uuid4())
+    cache = get_result_cache()
+    cache_key = request_cache_key(request.prd_text, request.title)
+    
+    # Serve identical requests from the result cache, sharing the rendered file
+    entry = cache.get(cache_key) if cache is not None and request.use_cache else None
+    if entry is not None:
+        source = cache.materialize(entry, job_id)
+        now = datetime.utcnow()
+        job_result = dict(
+            entry["result"],
+            source_path=str(source),
+            download_url=f"/api/download/{job_id}",
+            format=request.format,
+            cached=True
+        )
+        jobs.create({
+            "job_id": job_id,
+            "status": "completed",
+            "progress": 100,
+            "current_step": "Complete",
+            "result": job_result,
+            "error": None,
+            "created_at": now,
+            "completed_at": now,
+            "request": request.dict()
+        })
+        return GenerateResponse(
+            job_id=job_id,
+            status="completed",
+            message="Served from result cache",
+            estimated_time=0
+        )
     
-    jobs[job_id] = {
+    # Create job (raises 429/503 when over capacity)
+    estimated_time = admission.admit(client_key, job_id)
+    
+    jobs.create({
         "job_id": job_id,
         "status": "pending",
         "progress": 0,
@@ -94,23 +178,29 @@ async def generate_content(
         "created_at": datetime.utcnow(),
         "completed_at": None,
         "request": request.dict()
-    }
+    })
     
-    # Queue background task
-    background_tasks.add_task(
-        process_pipeline_job,
-        job_id=job_id,
-        prd_text=request.prd_text,
-        title=request.title,
-        output_format=request.format,
-        jobs_dict=jobs
-    )
+    if settings.EXECUTION_MODE == "celery":
+        # Each agent stage runs as a separate Celery task on the workers
+        from .celery_tasks import enqueue_pipeline
+        enqueue_pipeline(job_id, request.prd_text, request.title, request.format, cache_key=cache_key)
+    else:
+        # Queue background task
+        background_tasks.add_task(
+            process_pipeline_job,
+            job_id=job_id,
+            prd_text=request.prd_text,
+            title=request.title,
+            output_format=request.format,
+            job_store=jobs,
+            cache_key=cache_key
+        )
     
     return GenerateResponse(
         job_id=job_id,
         status="pending",
         message="Job queued for processing",
-        estimated_time=120 # Estimate 2 minutes on average
+        estimated_time=estimated_time
     )
 
 @app.get("/api/status/{job_id}", response_model=JobStatusResponse)
@@ -124,53 +214,109 @@ async def get_job_status(
     Returns current status and progress of a generation job.
     """
     
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
-    
     return JobStatusResponse(**job)
 
-@app.get("/api/download/{job_id}")
-async def download_result(
+@app.get("/api/stream/{job_id}")
+async def stream_job(
     job_id: str,
     api_key: str = Depends(get_api_key)
 ):
     """
-    Download generated content
+    Stream job progress and generated tokens
     
-    Returns the generated file for a completed job.
+    Server-Sent Events: `progress` on each pipeline step, `token` for every
+    token produced by the Writer and Style-Polisher, then a final `complete`
+    (with the job result) or `error` event.
     """
     
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
+    def job_state_event(job: dict, last_progress=None):
+        if job["status"] == "completed":
+            return {"event": "complete", "data": job["result"]}
+        if job["status"] == "failed":
+            return {"event": "error", "data": {"error": job["error"]}}
+        if job["progress"] != last_progress:
+            return {"event": "progress", "data": {
+                "step": job["current_step"], "progress": job["progress"], "message": job.get("message")
+            }}
+        return None
     
-    if job["status"] != "completed":
-        raise HTTPException(
-            status_code=400,
-            detail=f"Job not completed yet (status: {job['status']})"
-        )
+    async def event_stream():
+        message = job_state_event(job)
+        if message and message["event"] != "progress":
+            yield format_sse(message)
+            return
+        
+        last_progress = job["progress"]
+        
+        def poll():
+            # Fallback for jobs running in another process
+            nonlocal last_progress
+            current = jobs.get(job_id)
+            if current is None:
+                return {"event": "error", "data": {"error": "Job deleted"}}
+            message = job_state_event(current, last_progress)
+            last_progress = current["progress"]
+            return message
+        
+        async for message in broker.subscribe(job_id, poll=poll, heartbeat=settings.STREAM_HEARTBEAT_SECONDS):
+            yield format_sse(message)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.api_route("/api/download/{job_id}", methods=["GET", "HEAD"])
+async def download_result(
+    job_id: str,
+    request: Request,
+    format: Optional[Literal['md', 'html', 'pdf', 'docx']] = Query(None, description="Defaults to the requested format"),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Download generated content
     
-    file_path = job["result"].get("file_path")
+    Returns the generated file for a completed job in any format. Jobs keep
+    only their markdown; other formats are rendered on first download and
+    reused afterwards. Responses carry a strong ETag (a matching
+    If-None-Match returns 304 without rendering or reading the file) and
+    support Range requests; markdown and HTML are served pre-compressed
+    (brotli or gzip) when the client accepts it.
+    """
     
-    if not file_path or not Path(file_path).exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    job = get_completed_job(job_id)
+    fmt = format or job["result"].get("format") or job["request"]["format"]
+    return await serve_download(
+        job_id, job, fmt, request.headers,
+        cache_control=f"private, max-age={settings.DOWNLOAD_MAX_AGE_SECONDS}"
+    )
+
+@app.api_route("/downloads/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request):
+    """
+    Download generated content by file name
     
-    # Determine media type
-    format_type = job["request"]["format"]
-    media_types = {
-        "md": "text/markdown",
-        "html": "text/html",
-        "pdf": "application/pdf",
-        "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    }
+    `{job_id}.{format}` for a completed job, served like /api/download with
+    public caching headers for CDNs.
+    """
     
-    return FileResponse(
-        path=file_path,
-        media_type=media_types.get(format_type, "application/octet-stream"),
-        filename=Path(file_path).name
+    job_id, _, fmt = filename.rpartition(".")
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    job = get_completed_job(job_id)
+    return await serve_download(
+        job_id, job, fmt, request.headers,
+        cache_control=f"public, max-age={settings.DOWNLOAD_MAX_AGE_SECONDS}"
     )
 
 @app.delete("/api/jobs/{job_id}")
@@ -180,19 +326,17 @@ async def delete_job(
 ):
     """Delete a job and its associated files"""
     
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
-    
-    # Delete file if exists
-    if job.get("result") and job["result"].get("file_path"):
-        file_path = Path(job["result"]["file_path"])
-        if file_path.exists():
-            file_path.unlink()
+    # Delete the markdown source and any rendered formats
+    for file_path in job_output_files(job_id, job.get("result")):
+        file_path.unlink(missing_ok=True)
     
-    # Remove from jobs dict
-    del jobs[job_id]
+    # Remove from job store
+    jobs.delete(job_id)
+    broker.discard(job_id)
     
     return {"message": "Job deleted successfully"}
 
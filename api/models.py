@@ -6,6 +6,7 @@ class GenerateRequest(BaseModel):
     prd_text: str = Field(..., min_length=50, max_length=10000, description="Product Requirements Document text")
     title: Optional[str] = Field(None, max_length=200, description="Blog post title")
     format: Literal['md', 'html', 'pdf', 'docx'] = Field('md', description="Output format")
+    use_cache: bool = Field(True, description="Reuse the result of an identical earlier request")
     
     class Config:
         json_schema_extra = {
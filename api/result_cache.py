@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.ollama_pool import DEFAULT_MODEL
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def result_cache_key(prd_text: str, title: Optional[str], model: str, pipeline_version: str) -> str:
+    """
+    Content address of a generation request: normalized inputs, model and
+    pipeline version. The output format is not part of it, since formats are
+    rendered from the cached markdown at download time.
+    """
+    material = json.dumps({
+        "prd_text": normalize_text(prd_text),
+        "title": normalize_text(title),
+        "model": model,
+        "pipeline_version": pipeline_version
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def request_cache_key(prd_text: str, title: Optional[str]) -> str:
+    """Cache key for a generation request under the configured model and pipeline version"""
+    from .config import settings
+    return result_cache_key(prd_text, title, os.getenv("OLLAMA_MODEL", DEFAULT_MODEL), settings.PIPELINE_VERSION)
+
+
+def link_or_copy(source: Path, dest: Path):
+    """Hard-link `dest` to `source` so both names share one file on disk; copy if linking fails"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists():
+        dest.unlink()
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copy2(source, dest)
+
+
+class ResultCache:
+    """
+    Whole-pipeline result cache for identical generation requests.
+
+    Completed artifacts are hard-linked into `<outputs>/cache/<key>.md`
+    and recorded in SQLite with the job result. A hit links the same file in
+    as the new job's output, so repeated requests share one rendered file
+    instead of writing another copy. `evict` trims the outputs directory by
+    age and total size.
+    """
+
+    def __init__(self, path: str = "cache/result_cache.sqlite", outputs_dir: str = "outputs"):
+        self.path = Path(path)
+        self.outputs_dir = Path(outputs_dir)
+        self.artifacts_dir = self.outputs_dir / "cache"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    key TEXT PRIMARY KEY,
+                    artifact TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(str(self.path), timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def get(self, key: str) -> Optional[dict]:
+        """Cached entry ({"artifact", "result"}) if its artifact is still on disk"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT artifact, result FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not Path(row[0]).exists():
+                conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE result_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return {"artifact": row[0], "result": json.loads(row[1])}
+
+    def put(self, key: str, output_file: str, result: dict):
+        """Record a finished job's artifact and result under `key`"""
+        source = Path(output_file)
+        artifact = self.artifacts_dir / f"{key}{source.suffix}"
+        link_or_copy(source, artifact)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, artifact, result, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, str(artifact), json.dumps(result), now, now)
+            )
+
+    def materialize(self, entry: dict, job_id: str) -> Path:
+        """Expose a cached artifact as a job's output file (shared, not duplicated)"""
+        artifact = Path(entry["artifact"])
+        dest = self.outputs_dir / f"{job_id}{artifact.suffix}"
+        link_or_copy(artifact, dest)
+        return dest
+
+    def evict(self, max_age_seconds: int, max_bytes: int) -> int:
+        """
+        Remove output files older than `max_age_seconds`, then the least
+        recently used ones until the outputs directory fits in `max_bytes`.
+        Returns the number of files removed.
+        """
+        with self._lock:
+            now = time.time()
+            files = []
+            for path in self.outputs_dir.rglob("*"):
+                try:
+                    if path.is_file():
+                        files.append((path, path.stat()))
+                except FileNotFoundError:
+                    continue
+
+            removed = 0
+            kept = []
+            for path, stat in files:
+                if now - stat.st_mtime > max_age_seconds:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+                else:
+                    kept.append((path, stat))
+
+            # Hard-linked names share one inode: its space only comes back
+            # once every name is gone
+            sizes = {(stat.st_dev, stat.st_ino): stat.st_size for _, stat in kept}
+            links = Counter((stat.st_dev, stat.st_ino) for _, stat in kept)
+            total = sum(sizes.values())
+            for path, stat in sorted(kept, key=lambda item: max(item[1].st_atime, item[1].st_mtime)):
+                if total <= max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                removed += 1
+                inode = (stat.st_dev, stat.st_ino)
+                links[inode] -= 1
+                if not links[inode]:
+                    total -= sizes[inode]
+
+        if removed:
+            with self._connect() as conn:
+                rows = conn.execute("SELECT key, artifact FROM result_cache").fetchall()
+                stale = [(key,) for key, artifact in rows if not Path(artifact).exists()]
+                conn.executemany("DELETE FROM result_cache WHERE key = ?", stale)
+        return removed
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide result cache (None when RESULT_CACHE_ENABLED is off)"""
+
+    global _result_cache
+    from .config import settings
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(path=settings.RESULT_CACHE_PATH)
+    return _result_cache
+
+
+def cache_completed_job(cache_key: Optional[str], output_file: str, job_result: dict):
+    """Store a completed job's result for future identical requests and trim the outputs directory"""
+
+    cache = get_result_cache()
+    if cache is None or not cache_key:
+        return
+    from .config import settings
+    try:
+        cache.put(cache_key, output_file, job_result)
+        cache.evict(settings.OUTPUT_MAX_AGE_SECONDS, settings.OUTPUT_MAX_BYTES)
+    except Exception as e:
+        print(f"Result cache update failed: {str(e)}")
@@ -0,0 +1,60 @@
+import sys
+import asyncio
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+# src.lib is a sibling of api/ (see api/tasks.py)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.knowledge_base import KnowledgeBase, get_knowledge_base
+
+from ..auth import get_api_key
+
+router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
+
+
+def require_knowledge_base() -> KnowledgeBase:
+    kb = get_knowledge_base()
+    if kb is None:
+        raise HTTPException(status_code=404, detail="Knowledge base is disabled")
+    return kb
+
+
+@router.get("/search")
+async def search_knowledge(
+    q: str = Query(..., min_length=2, description="Topic or claim to look up"),
+    limit: int = Query(10, ge=1, le=100),
+    include_disputed: bool = False,
+    api_key: str = Depends(get_api_key),
+    kb: KnowledgeBase = Depends(require_knowledge_base)
+):
+    """
+    Search stored facts
+    
+    Returns facts gathered by past runs, best match first, with their source,
+    timestamp and fact-check verdict (sourced, verified or disputed).
+    """
+    results = await asyncio.to_thread(kb.search, q, limit=limit, include_disputed=include_disputed)
+    return {"query": q, "results": results}
+
+
+@router.get("/stats")
+async def knowledge_stats(
+    api_key: str = Depends(get_api_key),
+    kb: KnowledgeBase = Depends(require_knowledge_base)
+):
+    """Fact counts by verdict and index size"""
+    return await asyncio.to_thread(kb.stats)
+
+
+@router.delete("/facts/{fact_id}")
+async def delete_fact(
+    fact_id: int,
+    api_key: str = Depends(get_api_key),
+    kb: KnowledgeBase = Depends(require_knowledge_base)
+):
+    """Remove a fact (e.g. one later found to be wrong) from the knowledge base"""
+    if not await asyncio.to_thread(kb.delete, fact_id):
+        raise HTTPException(status_code=404, detail="Fact not found")
+    return {"message": "Fact deleted successfully"}
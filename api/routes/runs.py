@@ -0,0 +1,92 @@
+import sys
+import asyncio
+import time
+from pathlib import Path
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+# src.lib is a sibling of api/ (see api/tasks.py)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.run_index import SORT_COLUMNS, RunIndex, get_run_index, parse_since
+
+from ..auth import get_api_key
+
+router = APIRouter(prefix="/api/runs", tags=["runs"])
+
+
+def require_run_index() -> RunIndex:
+    index = get_run_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="Run index is disabled")
+    return index
+
+
+def window_start(since: Optional[str]) -> Optional[float]:
+    if not since:
+        return None
+    try:
+        return time.time() - parse_since(since)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("")
+async def list_runs(
+    since: Optional[str] = Query(None, description="Time window, e.g. 30m, 24h, 7d"),
+    fact_check: Optional[Literal["passed", "failed"]] = None,
+    status: Optional[str] = None,
+    title: Optional[str] = Query(None, description="Title substring"),
+    sort: str = Query("created_at", description=f"One of: {', '.join(SORT_COLUMNS)}"),
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    api_key: str = Depends(get_api_key),
+    index: RunIndex = Depends(require_run_index)
+):
+    """
+    Search past runs
+
+    Filters the run history by time window, fact-check outcome, status and
+    title, e.g. `?since=24h&fact_check=failed&sort=duration` for the slowest
+    runs with a failed fact-check in the last day. Each run includes its
+    duration, word counts and per-stage timings.
+    """
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=422, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    runs = await asyncio.to_thread(
+        index.query,
+        since=window_start(since),
+        fact_check={"passed": True, "failed": False}.get(fact_check),
+        status=status,
+        title=title,
+        sort=sort,
+        descending=order == "desc",
+        limit=limit,
+        offset=offset
+    )
+    return {"runs": runs, "count": len(runs)}
+
+
+@router.get("/stats")
+async def run_stats(
+    since: Optional[str] = Query(None, description="Time window, e.g. 30m, 24h, 7d"),
+    api_key: str = Depends(get_api_key),
+    index: RunIndex = Depends(require_run_index)
+):
+    """Run counts, fact-check failures and mean run and stage durations"""
+    return await asyncio.to_thread(index.stats, since=window_start(since))
+
+
+@router.get("/{run_id}")
+async def get_run(
+    run_id: str,
+    api_key: str = Depends(get_api_key),
+    index: RunIndex = Depends(require_run_index)
+):
+    """One run with its stage timings"""
+    run = await asyncio.to_thread(index.get, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Optional
+
+# Events kept per running job so a client that connects mid-generation
+# still receives everything streamed so far; dropped once the job finishes
+MAX_HISTORY_EVENTS = 20000
+
+TERMINAL_EVENTS = ("complete", "error")
+
+# Yielded by `subscribe` when nothing else was sent for `heartbeat` seconds
+HEARTBEAT = {"event": "heartbeat", "data": None}
+
+
+class JobEventBroker:
+    """
+    Fan-out of per-job events (progress updates and generated tokens) to
+    Server-Sent Events subscribers.
+
+    `publish` is thread-safe: tokens arrive from agent threads while
+    subscribers consume on the event loop. A finished job's history is
+    dropped; late clients read the outcome from the job store instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._history = defaultdict(list)
+        self._subscribers = defaultdict(list)
+
+    def publish(self, job_id: str, event: str, data: dict):
+        message = {"event": event, "data": data}
+
+        with self._lock:
+            if event in TERMINAL_EVENTS:
+                self._history.pop(job_id, None)
+            else:
+                history = self._history[job_id]
+                if len(history) < MAX_HISTORY_EVENTS:
+                    history.append(message)
+            subscribers = list(self._subscribers.get(job_id, []))
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    async def subscribe(self, job_id: str, poll: Optional[Callable[[], Optional[dict]]] = None,
+                        poll_interval: float = 1.0,
+                        heartbeat: Optional[float] = None) -> AsyncIterator[dict]:
+        """
+        Yield past and future events for a job until it completes or fails.
+
+        Jobs run by another process (Celery workers, other uvicorn workers)
+        never publish to this broker; for those, `poll` is called (on a
+        worker thread, as it may query the shared job store) whenever no
+        event arrives within `poll_interval` and may return a message built
+        from the job store. With `heartbeat`, `HEARTBEAT` is yielded after
+        that many seconds without another message so idle connections are
+        not closed by proxies.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        with self._lock:
+            backlog = list(self._history.get(job_id, []))
+            entry = (loop, queue)
+            self._subscribers[job_id].append(entry)
+
+        try:
+            for message in backlog:
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+
+            last_sent = time.monotonic()
+            while True:
+                timeouts = [poll_interval] if poll else []
+                if heartbeat:
+                    timeouts.append(max(0.0, last_sent + heartbeat - time.monotonic()))
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=min(timeouts) if timeouts else None)
+                except asyncio.TimeoutError:
+                    message = await asyncio.to_thread(poll) if poll else None
+                    if message is None:
+                        if not heartbeat or time.monotonic() - last_sent < heartbeat:
+                            continue
+                        message = HEARTBEAT
+                last_sent = time.monotonic()
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                self._subscribers[job_id].remove(entry)
+                if not self._subscribers[job_id]:
+                    del self._subscribers[job_id]
+
+    def discard(self, job_id: str):
+        with self._lock:
+            self._history.pop(job_id, None)
+
+
+def format_sse(message: dict) -> str:
+    """Encode a broker message as a Server-Sent Events frame."""
+    if message is HEARTBEAT:
+        # A comment line: keeps the connection open, ignored by EventSource
+        return ": heartbeat\n\n"
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+
+broker = JobEventBroker()
@@ -9,135 +9,125 @@
 # but needs access to src.lib which is a sibling of api/
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.lib.agents.researcher import run_researcher
-from src.lib.agents.writer import run_writer
-from src.lib.agents.fact_checker import run_fact_checker
-from src.lib.agents.style_polisher import run_style_polisher
-from src.lib.formatters import convert_to_format
+from src.lib.async_pipeline import run_pipeline_async
+from src.lib.tracing import run_trace
 from src.lib.types import PRDInput
-from src.lib.logger import generate_run_id, save_pipeline_result
+from src.lib.log_writer import log_pipeline_result
+from src.lib.logger import generate_run_id
 
-def process_pipeline_job(
+from .streaming import broker
+from .admission import mark_stage
+from .downloads import save_source
+from .result_cache import cache_completed_job
+from .job_store import JobStore
+
+async def process_pipeline_job(
     job_id: str,
     prd_text: str,
     title: str,
     output_format: str,
-    jobs_dict: dict
+    job_store: JobStore,
+    cache_key: str = None
 ):
     """
     Process content generation pipeline as background task
+    
+    Runs on the event loop: each agent is awaited (and executed off-loop by
+    src.lib.async_pipeline), so progress is updated between stages without
+    tying up a worker thread for the whole job. Job store writes (SQLite or
+    Redis I/O) run in a thread so they never block the loop.
     """
     
+    stages = {}
+    
+    async def on_progress(step: str, progress: int, message: str = None):
+        mark_stage(stages, step)
+        fields = {"current_step": step, "progress": progress}
+        if message:
+            fields["message"] = message
+        await asyncio.to_thread(job_store.update, job_id, **fields)
+        broker.publish(job_id, "progress", {"step": step, "progress": progress, "message": message})
+    
+    def on_token(step: str, token: str):
+        # Called from the agent thread; the broker hands it to the event loop
+        broker.publish(job_id, "token", {"step": step, "text": token})
+    
     try:
         # Update status to processing
-        jobs_dict[job_id]["status"] = "processing"
-        jobs_dict[job_id]["progress"] = 0
+        await asyncio.to_thread(job_store.update, job_id, status="processing", progress=0)
         
         # Create PRD
         prd = PRDInput(text=prd_text, title=title)
         run_id = generate_run_id()
         
-        # Step 1: Researcher (25%)
-        jobs_dict[job_id]["current_step"] = "Researcher"
-        jobs_dict[job_id]["progress"] = 5
-        
-        # Note: These are synchronous functions, so they block the thread
-        # In a real production app with Celery, these would be separate tasks
-        # For FastAPI background tasks, we can run them directly but better to offload
-        # Since they are CPU bound, running in executor would be better, but keeping simple for now
-        
-        research = run_researcher(prd, run_id)
-        
-        jobs_dict[job_id]["progress"] = 25
-        
-        # Step 2: Writer (50%)
-        jobs_dict[job_id]["current_step"] = "Writer"
-        jobs_dict[job_id]["progress"] = 30
-        
-        draft = run_writer(prd, research, run_id)
-        
-        jobs_dict[job_id]["progress"] = 50
-        
-        # Step 3: Fact-Checker (75%)
-        jobs_dict[job_id]["current_step"] = "Fact-Checker"
-        jobs_dict[job_id]["progress"] = 55
+        # Steps 1-4: Researcher, Writer, Fact-Checker (with retries), Style-Polisher,
+        # traced per agent call, LLM request and web search
+        with run_trace(run_id) as trace:
+            outputs = await run_pipeline_async(prd, run_id, on_progress=on_progress, on_token=on_token)
+        fact_check = outputs["fact_check"]
+        final = outputs["final"]
         
-        fact_check = run_fact_checker(draft, research, run_id)
+        await asyncio.to_thread(job_store.update, job_id, progress=90)
         
-        # Retry if needed
-        if not fact_check.passed:
-            for attempt in range(2):
-                jobs_dict[job_id]["message"] = f"Fact check failed, retrying ({attempt+1}/2)..."
-                
-                draft = run_writer(prd, research, run_id, 
-                                 feedback=fact_check.feedback, 
-                                 retry_count=attempt + 1)
-                fact_check = run_fact_checker(draft, research, run_id, 
-                                            retry_count=attempt + 1)
-                if fact_check.passed:
-                    break
+        # Step 5: Save the polished markdown (100%); every format, including
+        # the requested one, is rendered on first download
+        await on_progress("Formatting", 95, "Saving content...")
         
-        jobs_dict[job_id]["progress"] = 75
-        jobs_dict[job_id]["message"] = "Polishing content..."
-        
-        # Step 4: Style-Polisher (90%)
-        jobs_dict[job_id]["current_step"] = "Style-Polisher"
-        jobs_dict[job_id]["progress"] = 80
-        
-        final = run_style_polisher(draft, prd, run_id)
-        
-        jobs_dict[job_id]["progress"] = 90
-        
-        # Step 5: Format conversion (100%)
-        jobs_dict[job_id]["current_step"] = "Formatting"
-        jobs_dict[job_id]["progress"] = 95
-        jobs_dict[job_id]["message"] = "Generating output file..."
-        
-        output_dir = Path("outputs")
-        output_dir.mkdir(exist_ok=True)
-        
-        # For file download, we use the job_id as filename
-        output_file = output_dir / f"{job_id}.{output_format}"
-        
-        convert_to_format(
-            final.polished,
-            output_format,
-            str(output_file),
-            title or "Generated Content"
-        )
+        source = await asyncio.to_thread(save_source, job_id, final.polished, title)
         
         # Complete
-        jobs_dict[job_id]["status"] = "completed"
-        jobs_dict[job_id]["progress"] = 100
-        jobs_dict[job_id]["current_step"] = "Complete"
-        jobs_dict[job_id]["message"] = "Generation complete"
-        jobs_dict[job_id]["completed_at"] = datetime.utcnow()
-        jobs_dict[job_id]["result"] = {
+        job_result = {
             "run_id": run_id,
-            "file_path": str(output_file),
+            **source,
             "download_url": f"/api/download/{job_id}",
             "format": output_format,
             "word_count": len(final.polished.split()),
-            "fact_check_passed": fact_check.passed
+            "fact_check_passed": fact_check.passed,
+            "timings": trace.breakdown()
         }
+        stage_timings = mark_stage(stages, None)
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="completed",
+            progress=100,
+            current_step="Complete",
+            message="Generation complete",
+            completed_at=datetime.utcnow(),
+            result=job_result,
+            stage_timings=stage_timings
+        )
+        broker.publish(job_id, "complete", job_result)
+        await asyncio.to_thread(cache_completed_job, cache_key, source["source_path"], job_result)
         
-        # Save to logs
-        result = {
+        # Save to logs (queued; written and fsynced in batches off the request path)
+        log_pipeline_result({
             "run_id": run_id,
             "job_id": job_id,
             "prd_title": title,
+            "duration_seconds": round(sum(stage_timings.values()), 2),
+            "stage_timings": stage_timings,
+            "timings": job_result["timings"],
             "final_content": final.polished,
+            "research": {"sources": len(outputs["research"].sources), "facts": len(outputs["research"].facts)},
+            "draft": {"word_count": outputs["draft"].word_count},
+            "fact_check": {"passed": fact_check.passed, "issues": len(fact_check.issues)},
+            "final": {"word_count": job_result["word_count"]},
             "format": output_format,
             "status": "success"
-        }
-        save_pipeline_result(result)
+        })
         
     except Exception as e:
         # Handle errors
-        jobs_dict[job_id]["status"] = "failed"
-        jobs_dict[job_id]["error"] = str(e)
-        jobs_dict[job_id]["message"] = "Generation failed"
-        jobs_dict[job_id]["completed_at"] = datetime.utcnow()
+        await asyncio.to_thread(
+            job_store.update,
+            job_id,
+            status="failed",
+            error=str(e),
+            message="Generation failed",
+            completed_at=datetime.utcnow()
+        )
+        broker.publish(job_id, "error", {"error": str(e)})
         
         print(f"Job {job_id} failed: {str(e)}")
         traceback.print_exc()
@@ -0,0 +1,123 @@
+"""Tests for admission control on job submission."""
+
+import math
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.admission import AdmissionController, StageLatencyTracker, mark_stage
+from api.auth import create_access_token, get_client_key
+from api.config import settings
+
+
+def make_controller(jobs: dict, **limits) -> AdmissionController:
+    options = {"max_queue_depth": 10, "max_jobs_per_key": 10,
+               "rate_limit_per_hour": 100, "max_concurrent_jobs": 2}
+    options.update(limits)
+    return AdmissionController(get_job=jobs.get, **options)
+
+
+def submit(controller: AdmissionController, jobs: dict, client: str, job_id: str) -> int:
+    eta = controller.admit(client, job_id)
+    jobs[job_id] = {"job_id": job_id, "status": "pending"}
+    return eta
+
+
+def test_queue_depth_limit_returns_503():
+    jobs = {}
+    controller = make_controller(jobs, max_queue_depth=2)
+    submit(controller, jobs, "key:a", "1")
+    submit(controller, jobs, "key:b", "2")
+
+    with pytest.raises(HTTPException) as exc:
+        controller.admit("key:c", "3")
+    assert exc.value.status_code == 503
+    assert int(exc.value.headers["Retry-After"]) > 0
+
+    # A finished job frees its slot
+    jobs["1"]["status"] = "completed"
+    submit(controller, jobs, "key:c", "3")
+    assert controller.queue_depth() == 2
+
+
+def test_per_key_concurrency_returns_429():
+    jobs = {}
+    controller = make_controller(jobs, max_jobs_per_key=1)
+    submit(controller, jobs, "key:a", "1")
+
+    with pytest.raises(HTTPException) as exc:
+        controller.admit("key:a", "2")
+    assert exc.value.status_code == 429
+    assert "Retry-After" in exc.value.headers
+
+    submit(controller, jobs, "key:b", "2")
+
+
+def test_hourly_rate_limit():
+    jobs = {}
+    controller = make_controller(jobs, rate_limit_per_hour=2)
+    for job_id in ("1", "2"):
+        submit(controller, jobs, "key:a", job_id)
+        jobs[job_id]["status"] = "completed"
+
+    with pytest.raises(HTTPException) as exc:
+        controller.admit("key:a", "3")
+    assert exc.value.status_code == 429
+    assert 3500 < int(exc.value.headers["Retry-After"]) <= 3600
+
+
+def test_eta_grows_with_queue_depth():
+    jobs = {}
+    controller = make_controller(jobs, max_concurrent_jobs=2)
+    etas = [submit(controller, jobs, "key:a", str(i)) for i in range(5)]
+
+    job_seconds = controller.latencies.job_seconds()
+    assert etas[0] == etas[1] == math.ceil(job_seconds)
+    assert etas[2] == etas[3] == math.ceil(2 * job_seconds)
+    assert etas[4] == math.ceil(3 * job_seconds)
+
+
+def test_completed_jobs_update_stage_latencies():
+    jobs = {}
+    latencies = StageLatencyTracker(alpha=1.0)
+    controller = AdmissionController(10, 10, 100, 1, get_job=jobs.get, latencies=latencies)
+    submit(controller, jobs, "key:a", "1")
+
+    jobs["1"].update(status="completed", stage_timings={"Writer": 2.0, "Researcher": 1.0})
+    controller.queue_depth()
+
+    assert latencies.snapshot()["Writer"] == 2.0
+    assert latencies.snapshot()["Researcher"] == 1.0
+
+
+def test_mark_stage_accumulates_repeated_stages():
+    state = {}
+    mark_stage(state, "Writer")
+    mark_stage(state, "Fact-Checker")
+    mark_stage(state, "Fact-Checker")
+    timings = mark_stage(state, None)
+
+    assert set(timings) == {"Writer", "Fact-Checker"}
+    assert state["current"] is None
+
+
+def test_client_key_uses_only_verified_credentials():
+    request = SimpleNamespace(client=SimpleNamespace(host="203.0.113.7"))
+    token = create_access_token({"sub": "alice"})
+
+    assert get_client_key(request, f"Bearer {token}", None) == "user:alice"
+
+    by_header = get_client_key(request, None, settings.API_KEY)
+    assert by_header.startswith("key:")
+    assert settings.API_KEY not in by_header
+    assert get_client_key(request, f"Bearer {settings.API_KEY}", None) == by_header
+
+    # Made-up credentials do not get their own budget
+    for authorization, api_key in (("Bearer made-up-1", None), ("Bearer made-up-2", None),
+                                   ("Basic abc", None), (None, "wrong-key")):
+        assert get_client_key(request, authorization, api_key) == "ip:203.0.113.7"
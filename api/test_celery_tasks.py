@@ -0,0 +1,195 @@
+"""Tests for the Celery stage chain, run eagerly with stub agents."""
+
+import importlib
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api import downloads
+from api.config import settings
+from api.job_store import get_job_store
+
+
+@dataclass
+class PRDInput:
+    text: str
+    title: str = None
+
+
+@dataclass
+class ResearchOutput:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+@dataclass
+class WriterOutput:
+    content: str
+    draft: str
+    word_count: int
+    success: bool = True
+
+
+@dataclass
+class Issue:
+    claim: str
+    severity: str = 'high'
+    reason: str = ''
+
+
+@dataclass
+class FactCheckOutput:
+    passed: bool
+    issues: list = field(default_factory=list)
+    feedback: str = ''
+    content: str = ''
+    success: bool = True
+
+    def __post_init__(self):
+        # Loaded from an artifact, issues arrive as dicts
+        self.issues = [Issue(**issue) if isinstance(issue, dict) else issue for issue in self.issues]
+
+
+@dataclass
+class StylePolisherOutput:
+    polished: str
+    success: bool = True
+
+
+def make_draft(text: str) -> WriterOutput:
+    return WriterOutput(content=text, draft=text, word_count=len(text.split()))
+
+
+class Agents:
+    """Stub agents recording the order they ran in."""
+
+    def __init__(self, failed_checks: int = 0):
+        self.calls = []
+        self.failed_checks = failed_checks
+
+    def researcher(self, prd, run_id):
+        self.calls.append('research')
+        return ResearchOutput(facts=["Agents plan multi-step tasks."])
+
+    def writer(self, prd, research, run_id, **kwargs):
+        self.calls.append('write')
+        return make_draft("# Agents\n\nAgents plan multi-step tasks. Agents were invented in 1850.\n")
+
+    def fact_checker(self, draft, research, run_id, retry_count=0):
+        self.calls.append('fact_check')
+        if '1850' in draft.draft and self.failed_checks:
+            self.failed_checks -= 1
+            claim = "Agents were invented in 1850."
+            return FactCheckOutput(passed=False, issues=[Issue(claim)],
+                                   feedback=claim)
+        return FactCheckOutput(passed=True)
+
+    def style_polisher(self, draft, prd, run_id):
+        self.calls.append('polish')
+        return StylePolisherOutput(polished=draft.draft.replace('Agents plan', 'Agents carefully plan'))
+
+
+def module(name: str, **attributes) -> ModuleType:
+    stub = ModuleType(name)
+    stub.__dict__.update(attributes)
+    return stub
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """api.celery_tasks running eagerly against stub agents and output types."""
+    agents = Agents()
+    stubs = {
+        'src.lib.types': module('src.lib.types', PRDInput=PRDInput, ResearchOutput=ResearchOutput,
+                                WriterOutput=WriterOutput, FactCheckOutput=FactCheckOutput,
+                                StylePolisherOutput=StylePolisherOutput),
+        'src.lib.logger': module('src.lib.logger', generate_run_id=lambda: 'run-test'),
+        'src.lib.agents': module('src.lib.agents'),
+        'src.lib.agents.researcher': module('src.lib.agents.researcher', run_researcher=agents.researcher),
+        'src.lib.agents.writer': module('src.lib.agents.writer', run_writer=agents.writer),
+        'src.lib.agents.fact_checker': module('src.lib.agents.fact_checker', run_fact_checker=agents.fact_checker),
+        'src.lib.agents.style_polisher': module('src.lib.agents.style_polisher',
+                                                run_style_polisher=agents.style_polisher),
+    }
+    for name, stub in stubs.items():
+        monkeypatch.setitem(sys.modules, name, stub)
+
+    # Celery keeps the tasks registered by the first import, so the module is
+    # imported once and the names it bound at import time are patched per test
+    tasks = importlib.import_module('api.celery_tasks')
+    monkeypatch.setattr(tasks, 'PRDInput', PRDInput)
+    monkeypatch.setattr(tasks, 'generate_run_id', lambda: 'run-test')
+    monkeypatch.setattr(tasks, 'run_writer', agents.writer)
+    monkeypatch.setattr(tasks, 'run_style_polisher', agents.style_polisher)
+    monkeypatch.setattr(tasks, 'log_pipeline_result', lambda result: None)
+    monkeypatch.setattr(tasks.app.conf, 'task_always_eager', True)
+
+    for name in ('RESEARCH_CACHE_ENABLED', 'KNOWLEDGE_BASE_ENABLED'):
+        monkeypatch.setenv(name, 'false')
+    monkeypatch.setattr(settings, 'RESULT_CACHE_ENABLED', False)
+    monkeypatch.setenv('FACT_CHECK_CHUNK_WORDS', '0')
+    monkeypatch.setattr(settings, 'ARTIFACT_DIR', str(tmp_path / 'artifacts'))
+    monkeypatch.setattr(downloads, 'OUTPUT_DIR', tmp_path / 'outputs')
+
+    # Targeted rewrites would prompt the LLM; correct the flagged sentence instead
+    claims = sys.modules['src.lib.claims']
+    claims.get_claim_cache().clear()
+    monkeypatch.setattr(claims, 'rewrite_section',
+                        lambda section, issues, session: section.replace("invented in 1850", "first built in 1950"))
+    monkeypatch.setattr(claims, 'get_prompt_session', lambda *args: None)
+    return SimpleNamespace(tasks=tasks, agents=agents)
+
+
+def submit(pipeline, job_id: str):
+    store = get_job_store()
+    store.create({"job_id": job_id, "status": "pending", "progress": 0, "current_step": None,
+                       "result": None, "error": None})
+    pipeline.tasks.enqueue_pipeline(job_id, "Write about AI agents " * 5, "AI Agents", "md")
+    return store.get(job_id)
+
+
+def test_chain_runs_every_stage_in_order(pipeline):
+    job = submit(pipeline, "celery-job-1")
+
+    assert pipeline.agents.calls == ['research', 'write', 'fact_check', 'polish']
+    assert job["status"] == "completed"
+    assert job["progress"] == 100
+    assert job["result"]["fact_check_passed"] is True
+    assert set(job["stage_timings"]) == {"Researcher", "Writer", "Fact-Checker", "Style-Polisher", "Formatting"}
+    source = Path(job["result"]["source_path"])
+    assert "Agents carefully plan" in source.read_text(encoding="utf-8")
+    # Stage artifacts are only needed while the chain runs
+    assert not any(Path(settings.ARTIFACT_DIR).iterdir())
+
+
+def test_failed_fact_check_loops_through_the_writer(pipeline):
+    pipeline.agents.failed_checks = 1
+    job = submit(pipeline, "celery-job-2")
+
+    # The retry rewrites only the flagged section, then re-checks it
+    assert pipeline.agents.calls == ['research', 'write', 'fact_check', 'fact_check', 'polish']
+    assert job["status"] == "completed"
+    assert job["result"]["fact_check_passed"] is True
+    assert "1850" not in Path(job["result"]["source_path"]).read_text(encoding="utf-8")
+
+
+def test_stage_failure_marks_the_job_failed(pipeline, monkeypatch):
+    def broken_writer(*args, **kwargs):
+        pipeline.agents.calls.append('write')
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(pipeline.tasks, 'run_writer', broken_writer)
+    monkeypatch.setattr(pipeline.tasks.write_stage, 'max_retries', 1)
+    job = submit(pipeline, "celery-job-3")
+
+    assert pipeline.agents.calls == ['research', 'write', 'write']
+    assert job["status"] == "failed"
+    assert "LLM unavailable" in job["error"]
+    assert job["message"] == "Generation failed in contentforge.write"
+    assert not any(Path(settings.ARTIFACT_DIR).iterdir())
@@ -0,0 +1,167 @@
+"""Tests for lazy rendering and serving of job downloads."""
+
+import asyncio
+import gzip
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api import downloads
+from api.downloads import (
+    ensure_rendered, etag_for, etag_matches, job_output_files, negotiate_encoding, save_source, serve_download
+)
+from src.lib.export import export_format
+
+
+class InlineRenderPool:
+    """Renders on the calling thread and counts renders"""
+
+    def __init__(self):
+        self.rendered = []
+
+    async def arender(self, markdown, fmt, output_path, title=None):
+        self.rendered.append(fmt)
+        return export_format(markdown, fmt, output_path, title)
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloads, "OUTPUT_DIR", tmp_path / "outputs")
+    monkeypatch.setenv("EXPORT_CACHE_DIR", str(tmp_path / "exports"))
+    pool = InlineRenderPool()
+    monkeypatch.setattr(downloads, "get_render_pool", lambda: pool)
+    return pool
+
+
+def make_job(job_id: str, markdown: str = "# Agents\n\nAgents plan and act.\n") -> dict:
+    return {
+        "job_id": job_id,
+        "status": "completed",
+        "request": {"title": "Agents", "format": "pdf"},
+        "result": dict(save_source(job_id, markdown, "Agents"), format="pdf")
+    }
+
+
+def test_only_markdown_is_written_at_completion(pool):
+    job = make_job("job-1")
+    assert sorted(p.name for p in downloads.OUTPUT_DIR.iterdir()) == ["job-1.md", "job-1.md.gz"]
+    assert asyncio.run(ensure_rendered("job-1", job, "md")) == Path(job["result"]["source_path"])
+    assert pool.rendered == []
+
+
+def test_formats_render_once_on_first_download(pool):
+    job = make_job("job-1")
+
+    pdf = asyncio.run(ensure_rendered("job-1", job, "pdf"))
+    assert pdf.read_bytes().startswith(b"%PDF")
+    assert asyncio.run(ensure_rendered("job-1", job, "pdf")) == pdf
+    assert pool.rendered == ["pdf"]
+
+    asyncio.run(ensure_rendered("job-1", job, "docx"))
+    assert pool.rendered == ["pdf", "docx"]
+    assert not list(downloads.OUTPUT_DIR.glob("*.tmp"))
+
+    for path in job_output_files("job-1", job["result"]):
+        path.unlink(missing_ok=True)
+    assert asyncio.run(ensure_rendered("job-1", job, "html")) is None
+
+
+def test_etags(pool):
+    job = make_job("job-1")
+    same = make_job("job-2")
+    other = make_job("job-3", "# Other\n")
+
+    etag = etag_for(job["result"], "pdf")
+    assert etag == etag_for(same["result"], "pdf")
+    assert etag != etag_for(job["result"], "docx")
+    assert etag != etag_for(other["result"], "pdf")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"abc", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abc"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_eagerly_rendered_jobs_serve_their_original_file(pool, tmp_path):
+    legacy = tmp_path / "legacy.docx"
+    legacy.write_bytes(b"docx")
+    job = {"request": {"title": None, "format": "docx"}, "result": {"file_path": str(legacy), "format": "docx"}}
+
+    assert asyncio.run(ensure_rendered("legacy", job, "docx")) == legacy
+    assert asyncio.run(ensure_rendered("legacy", job, "pdf")) is None
+    assert etag_for(job["result"], "docx") is None
+
+
+def test_text_formats_get_precompressed_variants(pool):
+    job = make_job("job-1")
+    source = Path(job["result"]["source_path"])
+    assert gzip.decompress(source.with_name("job-1.md.gz").read_bytes()) == source.read_bytes()
+
+    html = asyncio.run(ensure_rendered("job-1", job, "html"))
+    assert html.with_name("job-1.html.gz").exists()
+    pdf = asyncio.run(ensure_rendered("job-1", job, "pdf"))
+    assert not pdf.with_name("job-1.pdf.gz").exists()
+
+    assert negotiate_encoding("html", "gzip, deflate") == "gzip"
+    assert negotiate_encoding("html", "gzip;q=0, deflate") is None
+    assert negotiate_encoding("pdf", "gzip") is None
+    assert negotiate_encoding("md", None) is None
+
+
+def make_client(job: dict) -> TestClient:
+    app = FastAPI()
+
+    @app.api_route("/download/{fmt}", methods=["GET", "HEAD"])
+    async def download(fmt: str, request: Request):
+        return await serve_download(job["job_id"], job, fmt, request.headers, cache_control="public, max-age=60")
+
+    return TestClient(app)
+
+
+def test_serving_ranges_encodings_and_conditional_requests(pool):
+    job = make_job("job-1", "# Agents\n\n" + "Agents plan and act. " * 200)
+    client = make_client(job)
+
+    full = client.get("/download/pdf")
+    assert full.status_code == 200
+    assert full.headers["etag"] == etag_for(job["result"], "pdf")
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["cache-control"] == "public, max-age=60"
+
+    partial = client.get("/download/pdf", headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert partial.content == full.content[:100]
+    assert partial.headers["content-range"] == f"bytes 0-99/{len(full.content)}"
+
+    head = client.head("/download/pdf")
+    assert head.status_code == 200 and head.content == b""
+    assert client.get("/download/pdf", headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+
+    compressed = client.get("/download/md", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.headers["etag"] == etag_for(job["result"], "md", "gzip")
+    assert compressed.text == Path(job["result"]["source_path"]).read_text()
+    plain = client.get("/download/md", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == etag_for(job["result"], "md")
+
+
+def test_renderer_errors_become_a_rendering_failed_response(pool, monkeypatch):
+    job = make_job("job-1")
+
+    async def broken_render(markdown, fmt, output_path, title=None):
+        raise RuntimeError("xhtml2pdf could not lay out the page")
+
+    monkeypatch.setattr(pool, "arender", broken_render)
+    response = make_client(job).get("/download/pdf")
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Rendering failed: xhtml2pdf could not lay out the page"}
+    assert not list(downloads.OUTPUT_DIR.rglob("*.tmp"))
@@ -0,0 +1,122 @@
+"""Tests for the pluggable API job store backends."""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.job_store import JobStore, MemoryJobStore, SQLiteJobStore, RedisJobStore
+
+
+def make_job(job_id: str) -> dict:
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "progress": 0,
+        "current_step": None,
+        "result": None,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "completed_at": None,
+        "request": {"prd_text": "x" * 60, "title": None, "format": "md"}
+    }
+
+
+def redis_store(tmp_path, ttl):
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisJobStore(client=fakeredis.FakeRedis(), ttl_seconds=ttl)
+
+
+BACKENDS = {
+    "memory": lambda tmp_path, ttl: MemoryJobStore(ttl_seconds=ttl),
+    "sqlite": lambda tmp_path, ttl: SQLiteJobStore(path=str(tmp_path / "jobs.sqlite"), ttl_seconds=ttl),
+    "redis": redis_store,
+}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def make_store(request, tmp_path):
+    return lambda ttl=60: BACKENDS[request.param](tmp_path, ttl)
+
+
+def test_create_update_delete(make_store):
+    store = make_store()
+    store.create(make_job("job-1"))
+
+    store.update("job-1", status="processing", progress=30, current_step="Writer")
+    job = store.get("job-1")
+    assert job["status"] == "processing"
+    assert job["progress"] == 30
+    assert job["request"]["format"] == "md"
+    assert "job-1" in store
+
+    assert store.delete("job-1")
+    assert store.get("job-1") is None
+    assert not store.delete("job-1")
+
+
+def test_update_unknown_job_is_ignored(make_store):
+    store = make_store()
+    store.update("missing", progress=50)
+    assert store.get("missing") is None
+
+
+def test_finished_jobs_expire(make_store):
+    store = make_store(ttl=1)
+    store.create(make_job("done"))
+    store.create(make_job("running"))
+    store.update("done", status="completed", completed_at=datetime.utcnow())
+    store.update("running", status="processing")
+
+    time.sleep(1.1)
+    store.evict_expired()
+
+    assert store.get("done") is None
+    assert store.get("running") is not None
+
+
+def test_expired_jobs_are_hidden_before_eviction(make_store):
+    store = make_store(ttl=1)
+    store.create(make_job("done"))
+    store.update("done", status="completed", completed_at=datetime.utcnow())
+
+    time.sleep(1.1)
+    store.update("done", progress=100)
+
+    assert store.get("done") is None
+    assert "done" not in store
+
+
+def test_job_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore(ttl_seconds=60)
+
+
+def test_redis_update_racing_a_delete_does_not_recreate_the_job():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    class RacingRedis(fakeredis.FakeRedis):
+        """Deletes the job right after the update has checked that it exists."""
+
+        def pipeline(self, *args, **kwargs):
+            pipe = super().pipeline(*args, **kwargs)
+            exists = pipe.exists
+
+            def exists_then_delete(key):
+                found = exists(key)
+                self.delete(key)
+                return found
+
+            pipe.exists = exists_then_delete
+            return pipe
+
+    store = RedisJobStore(client=RacingRedis(), ttl_seconds=60)
+    store.create(make_job("job-1"))
+    store.update("job-1", progress=50)
+
+    # A plain EXISTS-then-HSET would leave a hash holding only "progress"
+    assert store.get("job-1") is None
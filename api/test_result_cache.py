@@ -0,0 +1,69 @@
+"""Tests for the whole-pipeline result cache."""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.result_cache import ResultCache, result_cache_key
+
+
+def make_cache(tmp_path) -> ResultCache:
+    return ResultCache(path=str(tmp_path / "result_cache.sqlite"), outputs_dir=str(tmp_path / "outputs"))
+
+
+def write_output(cache: ResultCache, name: str, size: int = 10) -> Path:
+    path = cache.outputs_dir / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_key_normalizes_whitespace_and_covers_model_and_version():
+    key = result_cache_key("Write  about\nagents", " Agents ", "phi3", "1")
+    assert key == result_cache_key("Write about agents", "Agents", "phi3", "1")
+    assert key != result_cache_key("Write about agents", "Other", "phi3", "1")
+    assert key != result_cache_key("Write about agents", "Agents", "llama3", "1")
+    assert key != result_cache_key("Write about agents", "Agents", "phi3", "2")
+
+
+def test_hit_shares_the_artifact_on_disk(tmp_path):
+    cache = make_cache(tmp_path)
+    output = write_output(cache, "job-1.md")
+    cache.put("k", str(output), {"run_id": "run-1", "word_count": 2})
+
+    entry = cache.get("k")
+    assert entry["result"]["run_id"] == "run-1"
+    shared = cache.materialize(entry, "job-2")
+    assert shared == cache.outputs_dir / "job-2.md"
+    assert os.path.samefile(shared, output)
+
+    # Deleting the original job's file keeps the cached artifact
+    output.unlink()
+    assert cache.get("k") is not None
+    assert cache.get("missing") is None
+
+
+def test_evict_by_age_and_size(tmp_path):
+    cache = make_cache(tmp_path)
+    old = write_output(cache, "old.md")
+    stale = time.time() - 3600
+    os.utime(old, (stale, stale))
+    cache.put("old", str(old), {})
+
+    assert cache.evict(max_age_seconds=60, max_bytes=10**6) == 2
+    assert cache.get("old") is None
+    assert len(cache) == 0
+
+    # Linked names count once; least recently used inodes go first
+    first = write_output(cache, "first.md", 100)
+    os.utime(first, (stale, stale))
+    cache.put("first", str(first), {})
+    second = write_output(cache, "second.md", 100)
+    cache.put("second", str(second), {})
+
+    assert cache.evict(max_age_seconds=7200, max_bytes=150) == 2
+    assert not first.exists()
+    assert cache.get("first") is None
+    assert cache.get("second") is not None
@@ -0,0 +1,85 @@
+"""Tests for the per-job SSE event broker."""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.streaming import HEARTBEAT, JobEventBroker, format_sse
+
+
+async def collect(stream, limit: int = 100) -> list:
+    messages = []
+    async for message in stream:
+        messages.append(message)
+        if len(messages) >= limit:
+            break
+    return messages
+
+
+def test_replay_then_live_events():
+    broker = JobEventBroker()
+    broker.publish("job", "progress", {"step": "Writer", "progress": 30})
+    broker.publish("job", "token", {"step": "Writer", "text": "AI"})
+
+    async def run():
+        stream = broker.subscribe("job")
+        replayed = [await stream.__anext__(), await stream.__anext__()]
+
+        # Later events come from an agent thread while the client is connected
+        def agent():
+            broker.publish("job", "token", {"step": "Writer", "text": " agents"})
+            broker.publish("job", "complete", {"word_count": 2})
+
+        threading.Thread(target=agent).start()
+        return replayed + await collect(stream)
+
+    messages = asyncio.run(run())
+
+    assert [m["event"] for m in messages] == ["progress", "token", "token", "complete"]
+    assert messages[2]["data"]["text"] == " agents"
+    # A finished job keeps no history; late clients read the job store
+    assert "job" not in broker._history
+    assert "job" not in broker._subscribers
+
+
+def test_poll_fallback_for_jobs_in_another_process():
+    broker = JobEventBroker()
+    polled = []
+    states = iter([None, {"event": "progress", "data": {"progress": 55}},
+                   None, {"event": "complete", "data": {"word_count": 900}}])
+
+    def poll():
+        polled.append(threading.current_thread())
+        return next(states)
+
+    async def run():
+        loop_thread = threading.current_thread()
+        messages = await collect(broker.subscribe("job", poll=poll, poll_interval=0.01))
+        return loop_thread, messages
+
+    loop_thread, messages = asyncio.run(run())
+
+    assert [m["event"] for m in messages] == ["progress", "complete"]
+    assert len(polled) == 4
+    # The job store is queried off the event loop
+    assert loop_thread not in polled
+
+
+def test_heartbeat_on_idle_connection():
+    broker = JobEventBroker()
+
+    async def run():
+        stream = broker.subscribe("job", heartbeat=0.02)
+        first = await stream.__anext__()
+        broker.publish("job", "error", {"error": "boom"})
+        return [first] + await collect(stream)
+
+    messages = asyncio.run(run())
+
+    assert messages[0] is HEARTBEAT
+    assert messages[-1]["event"] == "error"
+    assert format_sse(HEARTBEAT) == ": heartbeat\n\n"
+    assert format_sse(messages[-1]) == 'event: error\ndata: {"error": "boom"}\n\n'
@@ -0,0 +1,110 @@
+"""Benchmark per-agent logging overhead: synchronous file writes vs LogWriter.
+
+Simulates ``--runs`` pipeline runs of five agent calls each (researcher,
+writer, fact-checker, polisher, final result) carrying realistic payloads,
+a draft of ``--words`` words that is often unchanged between calls. The
+baseline does what per-call logging did: open the run's log file, append the
+full record, flush, fsync and close, on the caller's thread. ``LogWriter``
+only enqueues. Reports caller-side latency per call (what each agent pays),
+the time until everything is durable, and bytes on disk.
+
+Usage:
+    python benchmarks/bench_logging.py --runs 200 --words 1500
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.log_writer import LogWriter
+
+AGENTS = ("Researcher", "Writer", "Fact-Checker", "Style-Polisher", "Result")
+
+
+def sample_records(runs: int, words: int):
+    for n in range(runs):
+        run_id = f"run-{n:05d}"
+        research = ' '.join(f"fact{(n + i) % 113}" for i in range(words // 3))
+        draft = ' '.join(f"word{(n + i) % 97}" for i in range(words))
+        polished = draft + f"\n\nPolished for run {n}."
+        payloads = (research, draft, draft, polished, polished)
+        for agent, payload in zip(AGENTS, payloads):
+            yield {'event': 'agent', 'run_id': run_id, 'agent': agent, 'duration_seconds': 1.0,
+                   'output': {'content': payload, 'word_count': words}}
+
+
+def sync_write(directory: Path, record: dict):
+    """One record the old way: its run's file, appended and fsynced in the caller."""
+    with open(directory / f"{record['run_id']}.jsonl", 'a', encoding='utf-8') as f:
+        f.write(json.dumps(dict(record, ts=time.time())) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def disk_bytes(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.rglob('*') if path.is_file())
+
+
+def percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[int(fraction * (len(samples) - 1))]
+
+
+def measure(write, records):
+    latencies = []
+    start = time.perf_counter()
+    for record in records:
+        call = time.perf_counter()
+        write(record)
+        latencies.append(time.perf_counter() - call)
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Logging overhead benchmark')
+    parser.add_argument('--runs', type=int, default=200, help='Pipeline runs to simulate')
+    parser.add_argument('--words', type=int, default=1500, help='Words per draft')
+    parser.add_argument('--batch-size', type=int, default=256, help='LogWriter batch size')
+    args = parser.parse_args()
+
+    records = list(sample_records(args.runs, args.words))
+    root = Path(tempfile.mkdtemp(prefix='bench_logging_'))
+    try:
+        sync_dir = root / 'sync'
+        sync_dir.mkdir()
+        sync_latencies, sync_total = measure(lambda record: sync_write(sync_dir, record), records)
+
+        writer = LogWriter(directory=str(root / 'batched'), batch_size=args.batch_size)
+        batched_latencies, enqueue_total = measure(writer.write, records)
+        start = time.perf_counter()
+        writer.close()
+        drain = time.perf_counter() - start
+
+        print("="*58)
+        print("LOGGING OVERHEAD BENCHMARK")
+        print("="*58)
+        print(f"Runs: {args.runs}   Records: {len(records)}   Words per draft: {args.words}")
+        print(f"{'Mode':<18}{'p50 (us)':>10}{'p99 (us)':>10}{'Durable (s)':>12}{'Disk (KB)':>10}")
+        rows = (
+            ("Synchronous", sync_latencies, sync_total, disk_bytes(sync_dir)),
+            ("LogWriter", batched_latencies, enqueue_total + drain, disk_bytes(root / 'batched')),
+        )
+        for mode, latencies, durable, size in rows:
+            print(f"{mode:<18}{percentile(latencies, 0.5) * 1e6:>10.0f}{percentile(latencies, 0.99) * 1e6:>10.0f}"
+                  f"{durable:>12.2f}{size / 1024:>10.0f}")
+        print(f"Per-run logging cost in the pipeline: {sync_total / args.runs * 1000:.1f}ms -> "
+              f"{enqueue_total / args.runs * 1000:.2f}ms")
+        print("="*58)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""End-to-end benchmark: run_pipeline, process_batch and the API.
+
+Runs the real pipeline offline: Ollama is a ``FakeOllama`` (see
+``fake_ollama.py``; fixed time to first token, tokens/sec and canned
+replies) reached via ``OLLAMA_HOST``, and web search is the stub backend,
+both for ``search_topics`` (``SEARCH_BACKEND=stub``) and for the
+Researcher's ``web_search`` (``fake_search.install()``). Caches are
+disabled and logs, the run index and outputs go to a temporary directory,
+so every run does the same work and results compare across commits.
+
+Scenarios (``--scenarios``):
+
+* ``pipeline``: ``--runs`` calls to ``cli.run_pipeline``, ``--concurrency`` at a time
+* ``batch``: ``process_batch`` over ``--runs`` PRD files with ``--concurrency`` workers
+* ``api``: ``--runs`` jobs submitted to ``/api/generate`` on an in-process
+  uvicorn server by ``--concurrency`` clients, each polling ``/api/status``
+
+Each scenario reports wall time, runs/minute, end-to-end latency (p50, p95,
+max) and per-agent calls, mean seconds, LLM requests, completion tokens,
+tokens/sec and time to first token (from the tracing metrics). Results are
+written as JSON to ``benchmarks/results/pipeline-<commit>.json``; pass
+``--compare`` with an earlier file to print the change per metric.
+
+Usage:
+    python benchmarks/bench_pipeline.py --runs 8 --concurrency 4
+    python benchmarks/bench_pipeline.py --scenarios api --latency 0.5 --tokens-per-second 20
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-2fe22f6.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import fake_search
+from fake_ollama import FakeOllama, load_responses
+
+SCENARIOS = ('pipeline', 'batch', 'api')
+API_KEY = 'bench-api-key'
+
+
+def configure_environment(workdir: Path, ollama_url: str, args):
+    """Point every component at the fakes and the scratch directory (before importing them)."""
+    os.environ.pop('OLLAMA_HOSTS', None)
+    os.environ.update({
+        'OLLAMA_HOST': ollama_url,
+        'SEARCH_BACKEND': 'stub',
+        'SEARCH_STUB_LATENCY': str(args.search_latency),
+        'RESEARCH_CACHE_ENABLED': 'false',
+        'KNOWLEDGE_BASE_ENABLED': 'false',
+        'RESULT_CACHE_ENABLED': 'false',
+        'LOG_DIR': str(workdir / 'logs'),
+        'RUN_INDEX_PATH': str(workdir / 'logs' / 'runs.sqlite'),
+        'ARTIFACT_DIR': str(workdir / 'artifacts'),
+        'EXECUTION_MODE': 'background',
+        'JOB_STORE_BACKEND': 'memory',
+        'API_KEY': API_KEY,
+        'RATE_LIMIT_PER_HOUR': '1000000',
+        'MAX_JOBS_PER_KEY': '1000000',
+        'MAX_QUEUE_DEPTH': '1000000',
+        'MAX_CONCURRENT_JOBS': str(args.concurrency),
+    })
+    # The Researcher's web_search goes straight to DuckDuckGo, not through search_topics
+    fake_search.install()
+    # api/main.py and the CLI write outputs/ and logs/ relative to the working directory
+    os.chdir(workdir)
+
+
+def prd_texts(runs: int, scenario: str) -> list:
+    """``runs`` PRDs cycled from examples/, distinct per run and scenario.
+
+    Distinct so no run is skipped as a duplicate or reuses fact-check
+    verdicts cached by an earlier run.
+    """
+    examples = sorted((ROOT / 'examples').glob('*.txt'))
+    return [f"(Benchmark {scenario} run {i + 1})\n\n"
+            f"{examples[i % len(examples)].read_text(encoding='utf-8').strip()}" for i in range(runs)]
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def snapshot(tracing) -> dict:
+    metrics = tracing.metrics
+    return {'spans': metrics.span_seconds.totals(), 'ttft': metrics.llm_ttft.totals(),
+            'rate': metrics.llm_rate.totals(), 'tokens': metrics.llm_tokens.totals()}
+
+
+def _delta(after: dict, before: dict, key: tuple):
+    count, total = after.get(key, (0, 0.0))
+    count_before, total_before = before.get(key, (0, 0.0))
+    return count - count_before, total - total_before
+
+
+def agent_stats(tracing, before: dict) -> dict:
+    """Per-agent, search and render figures for the work done since ``before``."""
+    after = snapshot(tracing)
+    summary = {'agents': {}}
+    for kind, name in sorted(after['spans']):
+        calls, seconds = _delta(after['spans'], before['spans'], (kind, name))
+        if not calls:
+            continue
+        if kind == 'agent':
+            requests, ttft = _delta(after['ttft'], before['ttft'], (name,))
+            rated, rate = _delta(after['rate'], before['rate'], (name,))
+            summary['agents'][name] = {
+                'calls': calls,
+                'mean_seconds': round(seconds / calls, 3),
+                'llm_requests': requests,
+                'completion_tokens': int(after['tokens'].get((name, 'completion'), 0)
+                                         - before['tokens'].get((name, 'completion'), 0)),
+                'tokens_per_second': round(rate / rated, 1) if rated else None,
+                'mean_time_to_first_token': round(ttft / requests, 3) if requests else None,
+            }
+        elif kind in ('search', 'render'):
+            entry = summary.setdefault(kind, {'count': 0, 'seconds': 0.0})
+            entry['count'] += calls
+            entry['seconds'] = round(entry['seconds'] + seconds, 3)
+    return summary
+
+
+class Measure:
+    """Wall time, tracing deltas and fake LLM requests around one scenario."""
+
+    def __init__(self, tracing, fake: FakeOllama):
+        self.tracing = tracing
+        self.fake = fake
+
+    def __enter__(self):
+        self.before = snapshot(self.tracing)
+        self.requests_before = self.fake.requests
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.start
+
+    def result(self, latencies: list, failed: int) -> dict:
+        runs = len(latencies) + failed
+        return {
+            'runs': runs,
+            'failed': failed,
+            'wall_seconds': round(self.wall, 3),
+            'runs_per_minute': round(len(latencies) / self.wall * 60, 2) if self.wall else 0.0,
+            'latency': {
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'max': round(max(latencies, default=0.0), 3),
+            },
+            'llm_requests': self.fake.requests - self.requests_before,
+            **agent_stats(self.tracing, self.before),
+        }
+
+
+def bench_pipeline(args, fake: FakeOllama, workdir: Path) -> dict:
+    from cli import run_pipeline
+    from lib import tracing
+
+    outputs = workdir / 'pipeline'
+    outputs.mkdir()
+
+    def one(item):
+        i, text = item
+        start = time.perf_counter()
+        try:
+            run_pipeline(text, f"Benchmark {i + 1}", str(outputs / f"run_{i + 1}.md"), args.format)
+        except (Exception, SystemExit):
+            return None
+        return time.perf_counter() - start
+
+    with quiet(), Measure(tracing, fake) as measure:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            timings = list(executor.map(one, enumerate(prd_texts(args.runs, 'pipeline'))))
+    latencies = [t for t in timings if t is not None]
+    return measure.result(latencies, len(timings) - len(latencies))
+
+
+def bench_batch(args, fake: FakeOllama, workdir: Path) -> dict:
+    from batch_process import process_batch
+    from lib import tracing
+    from lib.run_index import get_run_index
+
+    input_dir = workdir / 'batch_in'
+    input_dir.mkdir()
+    for i, text in enumerate(prd_texts(args.runs, 'batch')):
+        (input_dir / f"prd_{i + 1:04d}.txt").write_text(text, encoding='utf-8')
+
+    with quiet(), Measure(tracing, fake) as measure:
+        process_batch(str(input_dir), str(workdir / 'batch_out'), workers=args.concurrency, resume=False)
+
+    # process_batch only returns a summary file; per-run durations come from the run index
+    summary = json.loads((workdir / 'batch_out' / 'batch_summary.json').read_text(encoding='utf-8'))
+    run_ids = {entry['run_id'] for entry in summary if entry['status'] == 'success'}
+    index = get_run_index()
+    latencies = [run['duration'] for run in index.query(since=measure.started_at, limit=10 * args.runs)
+                 if run['run_id'] in run_ids] if index else []
+    return measure.result(latencies, len(summary) - len(run_ids))
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discard the pipeline's progress output (from every thread) while measuring."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_api(port: int):
+    """Serve api.main:app with uvicorn on a background thread (like `python run_api.py`)."""
+    import uvicorn
+    from api.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def call(method: str, url: str, payload: dict = None) -> dict:
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={'X-API-Key': API_KEY, 'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def bench_api(args, fake: FakeOllama, workdir: Path) -> dict:
+    from src.lib import tracing
+
+    port = free_port()
+    server, thread = start_api(port)
+    base = f"http://127.0.0.1:{port}"
+
+    def one(item):
+        i, text = item
+        start = time.perf_counter()
+        try:
+            job = call('POST', f"{base}/api/generate", {
+                'prd_text': text, 'title': f"Benchmark {i + 1}", 'format': args.format, 'use_cache': False
+            })
+            while True:
+                status = call('GET', f"{base}/api/status/{job['job_id']}")
+                if status['status'] in ('completed', 'failed'):
+                    break
+                time.sleep(args.poll_interval)
+        except OSError:
+            return None
+        return time.perf_counter() - start if status['status'] == 'completed' else None
+
+    try:
+        with quiet(), Measure(tracing, fake) as measure:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                timings = list(executor.map(one, enumerate(prd_texts(args.runs, 'api'))))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    latencies = [t for t in timings if t is not None]
+    return measure.result(latencies, len(timings) - len(latencies))
+
+
+def commit() -> str:
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def change(new: float, old: float) -> str:
+    if not old or new is None:
+        return '-'
+    return f"{100 * (new - old) / old:+.0f}%"
+
+
+def print_report(report: dict, baseline: dict = None):
+    print("="*58)
+    print("PIPELINE BENCHMARK")
+    print("="*58)
+    config = report['config']
+    print(f"Commit: {report['commit']}   Runs: {config['runs']}   Concurrency: {config['concurrency']}")
+    print(f"Fake LLM: {config['latency']}s to first token, {config['tokens_per_second']} tok/s, "
+          f"{config['tokens']} tokens   Search: {config['search_latency']}s")
+    if baseline:
+        print(f"Compared with: {baseline['commit']}")
+
+    for name, result in report['scenarios'].items():
+        old = (baseline or {}).get('scenarios', {}).get(name, {})
+        print(f"\n[{name}] {result['runs']} runs, {result['failed']} failed, {result['wall_seconds']:.1f}s wall")
+        rows = [('Runs/min', result['runs_per_minute'], old.get('runs_per_minute'))]
+        for pct in ('p50', 'p95', 'max'):
+            rows.append((f"Latency {pct} (s)", result['latency'][pct], old.get('latency', {}).get(pct)))
+        for agent, stats in result['agents'].items():
+            previous = old.get('agents', {}).get(agent, {})
+            rows.append((f"{agent} (s)", stats['mean_seconds'], previous.get('mean_seconds')))
+        for label, value, previous in rows:
+            suffix = f"{previous:>10}{change(value, previous):>8}" if baseline else ''
+            print(f"  {label:<28}{value:>10}{suffix}")
+    print("="*58)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated: pipeline,batch,api')
+    parser.add_argument('--runs', type=int, default=8, help='Pipeline runs per scenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='Runs in flight at once')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake LLM seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Fake LLM generation speed')
+    parser.add_argument('--tokens', type=int, default=120, help='Tokens in a fake LLM filler reply')
+    parser.add_argument('--responses', help='JSON list of {"match", "response"} canned LLM replies')
+    parser.add_argument('--search-latency', type=float, default=0.2, help='Stub search seconds per query')
+    parser.add_argument('--format', default='md', choices=['md', 'html', 'pdf', 'docx'], help='Output format')
+    parser.add_argument('--poll-interval', type=float, default=0.1, help='API status polling interval (s)')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/pipeline-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    baseline = json.loads(Path(args.compare).read_text(encoding='utf-8')) if args.compare else None
+    output = Path(args.output).resolve() if args.output else None
+
+    fake = FakeOllama(latency=args.latency, tokens_per_second=args.tokens_per_second, tokens=args.tokens,
+                      responses=load_responses(args.responses))
+    workdir = Path(tempfile.mkdtemp(prefix='bench_pipeline_'))
+    cwd = os.getcwd()
+    configure_environment(workdir, fake.start(), args)
+
+    report = {
+        'commit': commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'scenarios': {},
+    }
+    runners = {'pipeline': bench_pipeline, 'batch': bench_batch, 'api': bench_api}
+    try:
+        for name in scenarios:
+            report['scenarios'][name] = runners[name](args, fake, workdir)
+    finally:
+        fake.stop()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = output or ROOT / 'benchmarks' / 'results' / f"pipeline-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    print_report(report, baseline)
+    print(f"Results saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
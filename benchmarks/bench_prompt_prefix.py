@@ -0,0 +1,177 @@
+"""Benchmark prefill time per stage: per-agent prompts vs a shared-prefix session.
+
+Sends one run's worth of stage prompts (writer, fact-check, section rewrite,
+fact-check, polish) twice: in a task-first layout (own system prompt, task
+text first, PRD/research/draft after it) and through a ``PromptSession``
+(shared system prompt and PRD/research prefix, task last, one pinned host).
+Reports Ollama's ``prompt_eval_duration`` per stage.
+
+The task-first prompts are synthetic and shorter than the agents' real
+prompts, so this compares prompt layouts rather than measuring the
+pipeline. Against the built-in simulated server (which models Ollama's
+prompt cache: tokens shared with the previous prompt are not re-evaluated)
+the result follows from that model; pass ``--host`` to measure a real
+Ollama server instead.
+
+Usage:
+    python benchmarks/bench_prompt_prefix.py --facts 40 --prefill-ms 0.5
+    python benchmarks/bench_prompt_prefix.py --host http://localhost:11434
+    python benchmarks/bench_prompt_prefix.py --context   # reuse context tokens
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.ollama_pool import OllamaPool
+from src.lib.prompt_session import PromptSession, build_shared_prefix
+
+
+def simulated_ollama(prefill_ms: float) -> ThreadingHTTPServer:
+    """Ollama stand-in: prefill cost only for tokens not shared with the cached prompt."""
+    state = {'cache': []}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            tokens = (payload.get('context') or (payload.get('system', '').split() + ['<sys>']))
+            tokens = list(tokens) + payload['prompt'].split()
+            with lock:
+                cached = state['cache']
+                common = 0
+                while common < min(len(cached), len(tokens)) and cached[common] == tokens[common]:
+                    common += 1
+                evaluated = len(tokens) - common
+                time.sleep(evaluated * prefill_ms / 1000)
+                state['cache'] = tokens + ['OK']
+            body = json.dumps({
+                'response': 'OK', 'done': True, 'context': tokens + ['OK'],
+                'prompt_eval_count': evaluated,
+                'prompt_eval_duration': int(evaluated * prefill_ms * 1e6),
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def sample_run(facts: int, draft_words: int):
+    # Only the fields build_shared_prefix reads, so the agent types are not needed
+    prd = SimpleNamespace(
+        title="Understanding AI Agents",
+        text="Write an 800-word blog post for developers explaining how AI agents plan, "
+             "call tools and verify their own output. Professional tone, include examples.",
+    )
+    research = SimpleNamespace(
+        sources=[SimpleNamespace(title=f"Research Article: agents topic {i}", url=f"https://example.com/{i}")
+                 for i in range(10)],
+        facts=[f"Fact {i}: agents use planning step {i} with tool call {i % 7} and "
+               f"verification pass {i % 3} according to source [{i % 10 + 1}]." for i in range(facts)],
+    )
+    draft = ' '.join(f"word{i % 97}" for i in range(draft_words))
+    section = ' '.join(draft.split()[:120])
+    return prd, research, draft, section
+
+
+def task_first_prompts(prd, research, draft, section):
+    """Synthetic task-first layout: role system prompt, task, then the material."""
+    research_block = build_shared_prefix(prd, research).split('# Sources', 1)[1]
+    return [
+        ("Writer", "You are an expert technical writer.",
+         f"Write a blog post.\n\n{prd.text}\n\n# Sources{research_block}"),
+        ("Fact-Checker", "You are a meticulous fact-checker.",
+         f"Check this draft for unsupported claims.\n\n{draft}\n\n# Sources{research_block}"),
+        ("Rewrite", "You are a careful technical writer revising one section.",
+         f"Fix this section.\n\n{section}\n\n# Sources{research_block}"),
+        ("Fact-Checker", "You are a meticulous fact-checker.",
+         f"Check this draft for unsupported claims.\n\n{draft}\n\n# Sources{research_block}"),
+        ("Style-Polisher", "You are an editor polishing tone and flow.",
+         f"Polish this draft.\n\n{prd.text}\n\n{draft}"),
+    ]
+
+
+def session_tasks(draft, section):
+    return [
+        ("Writer", "Write the blog post described in the brief."),
+        ("Fact-Checker", f"Check this draft for unsupported claims.\n\n{draft}"),
+        ("Rewrite", f"Revise this section.\n\n{section}"),
+        ("Fact-Checker", f"Check this draft for unsupported claims.\n\n{draft}"),
+        ("Style-Polisher", f"Polish this draft.\n\n{draft}"),
+    ]
+
+
+def prefill_ms(reply: dict) -> float:
+    return reply.get('prompt_eval_duration', 0) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prompt-prefix reuse benchmark')
+    parser.add_argument('--host', help='Real Ollama server (default: built-in simulator)')
+    parser.add_argument('--model', default=None, help='Model for --host (default: OLLAMA_MODEL)')
+    parser.add_argument('--facts', type=int, default=40, help='Research facts in the prompt')
+    parser.add_argument('--draft-words', type=int, default=800, help='Draft length in words')
+    parser.add_argument('--prefill-ms', type=float, default=0.5, help='Simulated prefill cost per token')
+    parser.add_argument('--context', action='store_true', help='Reuse Ollama context tokens')
+    args = parser.parse_args()
+
+    server = None
+    host = args.host
+    if host is None:
+        server = simulated_ollama(args.prefill_ms)
+        host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    pool = OllamaPool(hosts=[host], model=args.model, max_concurrency=1)
+    options = {'num_predict': 1}
+    prd, research, draft, section = sample_run(args.facts, args.draft_words)
+
+    baseline = []
+    for stage, system, prompt in task_first_prompts(prd, research, draft, section):
+        baseline.append((stage, prefill_ms(pool.generate(prompt, system=system, options=options))))
+
+    session = PromptSession(build_shared_prefix(prd, research), pool=pool, use_context=args.context)
+    shared = []
+    if args.context:
+        baseline.insert(0, ("Priming", 0.0))
+        shared.append(("Priming", prefill_ms(session.prime())))
+    for stage, task in session_tasks(draft, section):
+        shared.append((stage, prefill_ms(session.generate(task, options=options))))
+
+    if server:
+        server.shutdown()
+
+    print("="*58)
+    print("PROMPT PREFIX REUSE BENCHMARK")
+    print("="*58)
+    print(f"Server: {args.host or 'simulated'}   Facts: {args.facts}   Draft: {args.draft_words} words")
+    print(f"{'Stage':<16}{'Task first (ms)':>16}{'Shared prefix (ms)':>22}")
+    for (stage, before), (_, after) in zip(baseline, shared):
+        print(f"{stage:<16}{before:>16.1f}{after:>22.1f}")
+    total_before = sum(ms for _, ms in baseline)
+    total_after = sum(ms for _, ms in shared)
+    print(f"{'Total':<16}{total_before:>16.1f}{total_after:>22.1f}")
+    if total_before:
+        print(f"Prefill reduction: {100 * (1 - total_after / total_before):.0f}%"
+              + ("" if args.host else " (simulated cache model, synthetic prompts)"))
+    print("="*58)
+
+
+if __name__ == "__main__":
+    main()
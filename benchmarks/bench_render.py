@@ -0,0 +1,109 @@
+"""Benchmark PDF/DOCX rendering: API-process threads vs the render process pool.
+
+Renders ``--docs`` distinct posts (so the export cache never hits) the way
+the API used to (``asyncio.to_thread`` in the server process) and through
+``RenderPool``, while a ticker on the event loop measures how late it wakes
+up. Loop lag is what a client polling ``/api/status`` sees as a stall.
+
+Usage:
+    python benchmarks/bench_render.py --docs 8 --words 10000 --format pdf --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Every render must do the work; workers inherit this
+os.environ['EXPORT_CACHE_DIR'] = ''
+
+from src.lib.export import export_format
+from src.lib.render_pool import RenderPool
+
+TICK = 0.01
+
+
+def sample_posts(count: int, words: int):
+    posts = []
+    for n in range(count):
+        sections = []
+        for s in range(max(1, words // 200)):
+            body = ' '.join(f"word{(n + s + i) % 97}" for i in range(150))
+            sections.append(f"## Section {s + 1}\n\n{body} **bold {s}** and *emphasis*.\n\n"
+                            f"- point one {n}\n- point two {s}\n\n```python\nprint({s})\n```\n")
+        posts.append(f"# Post {n + 1}\n\n" + '\n'.join(sections))
+    return posts
+
+
+async def measure(render, posts, fmt: str, output_dir: str):
+    """Render all posts concurrently; returns (seconds, loop lag samples)."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(render(post, fmt, str(Path(output_dir) / f"post{i}.{fmt}"), f"Post {i}")
+                           for i, post in enumerate(posts)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, lags
+
+
+async def run(args):
+    posts = sample_posts(args.docs, args.words)
+    output_dir = tempfile.mkdtemp(prefix='bench_render_')
+
+    async def in_thread(*render_args):
+        return await asyncio.to_thread(export_format, *render_args)
+
+    threaded = await measure(in_thread, posts, args.format, output_dir)
+
+    pool = RenderPool(max_workers=args.workers, timeout=args.timeout)
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.arender("# warm-up", 'md', str(Path(output_dir) / f"warmup{i}.md"))
+                           for i in range(args.workers)))
+    warmup = time.perf_counter() - start
+    pooled = await measure(pool.arender, posts, args.format, output_dir)
+    pool.shutdown()
+
+    print("="*58)
+    print("RENDER POOL BENCHMARK")
+    print("="*58)
+    print(f"Docs: {args.docs}   Words: {args.words}   Format: {args.format}   Workers: {args.workers}")
+    print(f"Pool start-up (excluded): {warmup:.2f}s")
+    print(f"{'Mode':<22}{'Docs/sec':>10}{'Max lag (ms)':>14}{'p95 lag (ms)':>14}")
+    for mode, (elapsed, lags) in (("API-process threads", threaded), ("Render pool", pooled)):
+        lags = sorted(lags) or [0.0]
+        p95 = lags[int(0.95 * (len(lags) - 1))]
+        print(f"{mode:<22}{args.docs / elapsed:>10.2f}{lags[-1] * 1000:>14.0f}{p95 * 1000:>14.0f}")
+    print(f"Median lag, threads vs pool: {statistics.median(threaded[1] or [0]) * 1000:.1f}ms vs "
+          f"{statistics.median(pooled[1] or [0]) * 1000:.1f}ms")
+    print("="*58)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render pool benchmark')
+    parser.add_argument('--docs', type=int, default=8, help='Documents to render')
+    parser.add_argument('--words', type=int, default=10000, help='Approximate words per document')
+    parser.add_argument('--format', default='pdf', choices=['html', 'pdf', 'docx'], help='Output format')
+    parser.add_argument('--workers', type=int, default=2, help='Render pool processes')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Per-document timeout (s)')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
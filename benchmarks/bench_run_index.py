@@ -0,0 +1,116 @@
+"""Benchmark run history queries: scanning a JSONL master log vs the run index.
+
+Generates ``--runs`` synthetic pipeline results spread over ``--days`` days
+(about ``--fail-rate`` of them with a failed fact-check), writes them as a
+JSONL log and into a ``RunIndex``, then answers "runs in the last 24h with a
+failed fact-check, slowest first" both ways.
+
+Usage:
+    python benchmarks/bench_run_index.py --runs 1000000 --days 365
+"""
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.run_index import RunIndex
+
+STAGES = ("Researcher", "Writer", "Fact-Checker", "Style-Polisher")
+
+
+def sample_results(runs: int, days: float, fail_rate: float, seed: int = 7):
+    rng = random.Random(seed)
+    now = time.time()
+    for n in range(runs):
+        timings = {stage: round(rng.uniform(2, 30), 3) for stage in STAGES}
+        passed = rng.random() >= fail_rate
+        yield {
+            'run_id': f"run_{n:08d}",
+            'prd_title': f"Post {n % 5000}",
+            'ts': now - rng.uniform(0, days * 86400),
+            'duration_seconds': round(sum(timings.values()), 2),
+            'stage_timings': timings,
+            'fact_check': {'passed': passed, 'issues': 0 if passed else rng.randint(1, 6)},
+            'final': {'word_count': rng.randint(400, 1600)},
+            'status': 'success',
+        }
+
+
+def scan_log(path: Path, since: float, limit: int) -> list:
+    """What answering the question took before the index: read every line."""
+    matches = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            result = json.loads(line)
+            if result['ts'] >= since and not result['fact_check']['passed']:
+                matches.append(result)
+    matches.sort(key=lambda result: -result['duration_seconds'])
+    return matches[:limit]
+
+
+def timed(call, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run index query benchmark')
+    parser.add_argument('--runs', type=int, default=1000000, help='Runs in the history')
+    parser.add_argument('--days', type=float, default=365, help='Days the history spans')
+    parser.add_argument('--fail-rate', type=float, default=0.1, help='Share of failed fact-checks')
+    parser.add_argument('--limit', type=int, default=50, help='Runs returned')
+    parser.add_argument('--repeat', type=int, default=20, help='Index query repetitions')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='bench_run_index_'))
+    try:
+        log = root / 'master.jsonl'
+        index = RunIndex(path=str(root / 'runs.sqlite'))
+
+        start = time.perf_counter()
+        batch = []
+        with open(log, 'w', encoding='utf-8') as f:
+            for result in sample_results(args.runs, args.days, args.fail_rate):
+                f.write(json.dumps(result) + '\n')
+                batch.append(result)
+                if len(batch) >= 10000:
+                    index.record(batch)
+                    batch = []
+        index.record(batch)
+        build = time.perf_counter() - start
+
+        since = time.time() - 86400
+        scanned, scan_samples = timed(lambda: scan_log(log, since, args.limit), 1)
+        indexed, index_samples = timed(
+            lambda: index.query(since=since, fact_check=False, sort='duration', limit=args.limit), args.repeat
+        )
+        assert [r['run_id'] for r in scanned] == [r['run_id'] for r in indexed]
+
+        print("="*58)
+        print("RUN INDEX BENCHMARK")
+        print("="*58)
+        print(f"Runs: {args.runs}   Span: {args.days:g} days   Matches returned: {len(indexed)}")
+        print(f"Log + index build (excluded): {build:.1f}s   "
+              f"Log: {log.stat().st_size / 1e6:.0f}MB   Index: {index.path.stat().st_size / 1e6:.0f}MB")
+        print(f"Scan master.jsonl:  {scan_samples[0] * 1000:>10.1f}ms")
+        print(f"Run index (median): {statistics.median(index_samples) * 1000:>10.1f}ms   "
+              f"(max {max(index_samples) * 1000:.1f}ms over {args.repeat})")
+        print("="*58)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
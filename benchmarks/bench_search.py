@@ -0,0 +1,54 @@
+"""Benchmark sequential vs concurrent per-topic web search (offline).
+
+Usage:
+    python benchmarks/bench_search.py --topics 5 --latency 1.0 --concurrency 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.search_pool import search_topics, StubSearchBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-topic search benchmark')
+    parser.add_argument('--topics', type=int, default=5, help='Number of topics to search')
+    parser.add_argument('--latency', type=float, default=1.0, help='Stub latency per query (s)')
+    parser.add_argument('--jitter', type=float, default=0.5, help='Extra random latency per query (s)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent searches')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-query timeout (s)')
+    args = parser.parse_args()
+
+    topics = [f"topic {i + 1}" for i in range(args.topics)]
+
+    backend = StubSearchBackend(latency=args.latency, jitter=args.jitter, seed=42)
+    start = time.perf_counter()
+    for topic in topics:
+        backend(topic, 2)
+    sequential = time.perf_counter() - start
+
+    backend = StubSearchBackend(latency=args.latency, jitter=args.jitter, seed=42)
+    start = time.perf_counter()
+    results = search_topics(topics, backend, max_results=2,
+                            max_concurrency=args.concurrency, timeout=args.timeout)
+    concurrent = time.perf_counter() - start
+
+    found = sum(len(r) for r in results.values())
+
+    print("="*50)
+    print("PER-TOPIC SEARCH BENCHMARK")
+    print("="*50)
+    print(f"Topics:      {args.topics}")
+    print(f"Concurrency: {args.concurrency}")
+    print(f"Sequential:  {sequential:.2f}s")
+    print(f"Concurrent:  {concurrent:.2f}s ({found} results)")
+    print(f"Speedup:     {sequential / concurrent:.1f}x")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    main()
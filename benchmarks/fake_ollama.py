@@ -0,0 +1,219 @@
+"""Deterministic Ollama stand-in for offline benchmarks and load tests.
+
+Speaks enough of the Ollama HTTP API for the pipeline (``/api/generate``
+streaming and not, ``/api/chat``, ``/api/tags``, ``/api/version``): each
+request waits ``latency`` seconds (time to first token), then produces its
+reply at ``tokens_per_second``. Replies are canned: the first rule whose
+``match`` occurs in the system prompt or prompt wins, otherwise a filler
+reply of ``tokens`` words derived from the prompt's hash, so the same
+prompt always gets the same answer. Token counts and durations are reported
+like Ollama's, so tracing sees realistic time to first token and tokens/sec.
+
+For client tests it counts ``requests``, ``connections`` and the ``peak``
+number of generations in flight, and ``drop_requests = n`` makes it read the
+next ``n`` requests and close the connection without replying.
+
+Rules file (``--responses``)::
+
+    [{"match": "fact-check", "response": "{\\"passed\\": true, \\"issues\\": []}"},
+     {"match": "research topics", "response": "agents, planning, tool use"}]
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11434 --latency 0.2 --tokens-per-second 50
+    OLLAMA_HOST=http://127.0.0.1:11434 python src/cli.py --file examples/ai_agents_prd.txt
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+WORDS = (
+    "agents", "plan", "tools", "developers", "memory", "context", "verify", "output",
+    "models", "tasks", "workflow", "results", "search", "sources", "steps", "reliable",
+)
+
+
+class FakeOllama:
+    """Threaded HTTP server answering Ollama API calls with canned, timed replies."""
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 50.0, tokens: int = 120,
+                 responses: Optional[List[dict]] = None, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.tokens = tokens
+        self.responses = responses or []
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.drop_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _received(self) -> bool:
+        """Count a request; False if it should be dropped unanswered."""
+        with self._lock:
+            self.requests += 1
+            if self.drop_requests:
+                self.drop_requests -= 1
+                return False
+            return True
+
+    def reply(self, prompt: str, system: str = '') -> str:
+        text = f"{system}\n{prompt}"
+        for rule in self.responses:
+            if rule['match'].lower() in text.lower():
+                return rule['response']
+        seed = hashlib.sha256(text.encode('utf-8')).digest()
+        words = [WORDS[seed[i % len(seed)] % len(WORDS)] for i in range(self.tokens)]
+        paragraphs = [' '.join(words[i:i + 40]).capitalize() + '.' for i in range(0, len(words), 40)]
+        return "# Fake Reply\n\n" + '\n\n'.join(paragraphs)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def drop(self):
+                self.close_connection = True
+
+            def send_json(self, payload: dict):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if not fake._received():
+                    return self.drop()
+                if self.path == '/api/tags':
+                    self.send_json({'models': [{'name': 'phi3:latest', 'model': 'phi3:latest'}]})
+                elif self.path == '/api/version':
+                    self.send_json({'version': '0.0.0-fake'})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path not in ('/api/generate', '/api/chat'):
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if not fake._received():
+                    return self.drop()
+                with fake._lock:
+                    fake.in_flight += 1
+                    fake.peak = max(fake.peak, fake.in_flight)
+                try:
+                    self.generate(payload)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def generate(self, payload: dict):
+                chat = self.path == '/api/chat'
+                if chat:
+                    messages = payload.get('messages') or []
+                    system = '\n'.join(m.get('content', '') for m in messages if m.get('role') == 'system')
+                    prompt = '\n'.join(m.get('content', '') for m in messages if m.get('role') != 'system')
+                else:
+                    system, prompt = payload.get('system') or '', payload.get('prompt') or ''
+
+                tokens = fake.reply(prompt, system).split(' ')
+                prompt_tokens = len(f"{system} {prompt}".split())
+                eval_seconds = len(tokens) / fake.tokens_per_second
+                final = {
+                    'model': payload.get('model', 'phi3'), 'done': True, 'done_reason': 'stop',
+                    'prompt_eval_count': prompt_tokens, 'eval_count': len(tokens),
+                    'load_duration': 0, 'prompt_eval_duration': int(fake.latency * 1e9),
+                    'eval_duration': int(eval_seconds * 1e9),
+                    'total_duration': int((fake.latency + eval_seconds) * 1e9),
+                }
+
+                time.sleep(fake.latency)
+                if payload.get('stream', True) is False:
+                    time.sleep(eval_seconds)
+                    text = ' '.join(tokens)
+                    final.update({'message': {'role': 'assistant', 'content': text}} if chat else {'response': text})
+                    self.send_json(final)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for i, token in enumerate(tokens):
+                    text = token if i == 0 else ' ' + token
+                    chunk = {'message': {'role': 'assistant', 'content': text}} if chat else {'response': text}
+                    self.write_chunk(dict(chunk, done=False))
+                    time.sleep(1 / fake.tokens_per_second)
+                self.write_chunk(dict(final, **({'message': {'role': 'assistant', 'content': ''}}
+                                                if chat else {'response': ''})))
+                self.wfile.write(b'0\r\n\r\n')
+
+            def write_chunk(self, payload: dict):
+                data = json.dumps(payload).encode('utf-8') + b'\n'
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+
+        return Handler
+
+
+def load_responses(path: Optional[str]) -> List[dict]:
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deterministic fake Ollama server')
+    parser.add_argument('--port', type=int, default=11434, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=50.0, help='Generation speed')
+    parser.add_argument('--tokens', type=int, default=120, help='Tokens in a filler reply')
+    parser.add_argument('--responses', help='JSON list of {"match", "response"} canned replies')
+    args = parser.parse_args()
+
+    server = FakeOllama(latency=args.latency, tokens_per_second=args.tokens_per_second, tokens=args.tokens,
+                        responses=load_responses(args.responses), port=args.port)
+    print(f"Fake Ollama listening on {server.start()} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Offline stand-in for the DuckDuckGo client used by ``web_search.py``.
+
+``SEARCH_BACKEND=stub`` only reaches searches made through
+``search_pool.search_topics``; the Researcher's ``web_search`` module talks
+to DuckDuckGo through ``duckduckgo_search.DDGS`` (``ddgs`` in newer
+releases). ``install()`` registers a fake of both modules whose ``DDGS``
+answers from ``search_pool.get_stub_backend()``, so every search in the
+process is deterministic, offline and takes ``SEARCH_STUB_LATENCY`` seconds.
+Call it before anything imports ``web_search``.
+
+Usage:
+    import fake_search
+    fake_search.install()
+"""
+
+import sys
+from types import ModuleType
+
+MODULES = ('duckduckgo_search', 'ddgs')
+
+
+class FakeDDGS:
+    """``DDGS`` with ``text``/``news`` results in DuckDuckGo's shape, from the stub backend."""
+
+    def __init__(self, *args, **kwargs):
+        from src.lib.search_pool import get_stub_backend
+        self.backend = get_stub_backend()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def text(self, keywords: str = '', *args, max_results: int = 2, **kwargs) -> list:
+        query = keywords or kwargs.get('query', '')
+        return [
+            {'title': result['title'], 'href': result['url'], 'url': result['url'],
+             'body': result['snippet']}
+            for result in self.backend(query, max_results or 2)
+        ]
+
+    news = text
+
+
+def install():
+    """Serve every DuckDuckGo search in this process from the stub backend."""
+    for name in MODULES:
+        module = ModuleType(name)
+        module.DDGS = FakeDDGS
+        sys.modules[name] = module
@@ -0,0 +1,364 @@
+"""Load test for the API: submit, poll and download jobs at a fixed concurrency.
+
+``--clients`` virtual users each loop over one job at a time:
+``POST /api/generate``, ``GET /api/status/{id}`` every ``--poll-interval``
+seconds until the job finishes, then ``GET /api/download/{id}`` (and
+``DELETE /api/jobs/{id}`` with ``--delete``). The test stops after
+``--duration`` seconds or ``--jobs`` submitted jobs, whichever is first.
+
+By default the API runs in-process on uvicorn against the fakes used by
+``bench_pipeline.py`` (``FakeOllama`` and the stub search backend, including
+for the Researcher's ``web_search``), so the run is offline and the numbers
+reflect the service, not a model or the network. In-process runs also sample the
+``jobs`` store (job count and approximate bytes) and the process RSS, to
+show how much memory finished jobs keep until ``JOB_TTL_SECONDS`` evicts
+them. ``--url`` targets a server started separately instead, e.g. to compare
+uvicorn worker counts; such a server runs its own searches (only
+``search_topics`` honours ``SEARCH_BACKEND=stub``). Every virtual user sends the same API key, so lift the
+admission limits, and with several workers use a job store they share (the
+in-memory one is per process, so status polls would 404)::
+
+    python benchmarks/fake_ollama.py --port 11434 &
+    OLLAMA_HOST=http://127.0.0.1:11434 SEARCH_BACKEND=stub JOB_STORE_BACKEND=sqlite \
+        RATE_LIMIT_PER_HOUR=1000000 MAX_JOBS_PER_KEY=1000000 MAX_QUEUE_DEPTH=1000000 \
+        uvicorn api.main:app --port 8000 --workers 4
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --api-key demo-api-key-123
+
+The test exits with status 1 if most submissions were rejected (429/503) or
+most status polls returned 404, since the numbers then describe the
+admission limits or a split job store rather than the service.
+
+Reports request latency per endpoint (p50, p95, p99, max), errors by status
+code, completed jobs/minute and end-to-end job latency.
+
+Usage:
+    python benchmarks/load_test.py --clients 16 --duration 60
+    python benchmarks/load_test.py --clients 32 --jobs 200 --delete --output load.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import API_KEY, ROOT, configure_environment, free_port, percentile, quiet, start_api
+from fake_ollama import FakeOllama, load_responses
+
+ENDPOINTS = ('generate', 'status', 'download', 'delete')
+
+
+def deep_size(value, seen=None) -> int:
+    """Approximate bytes held by a JSON-like value (dicts, lists, strings, numbers)."""
+    seen = seen if seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux only, else None)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Stats:
+    """Request latencies and status codes per endpoint, and job outcomes."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.jobs = Counter()
+        self.job_seconds = []
+        self.job_ids = []
+        self._lock = threading.Lock()
+
+    def request(self, endpoint: str, seconds: float, status: int):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if status >= 400:
+                self.errors[endpoint][status] += 1
+
+    def submitted(self, job_id: str):
+        with self._lock:
+            self.job_ids.append(job_id)
+
+    def submitted_ids(self) -> list:
+        with self._lock:
+            return list(self.job_ids)
+
+    def job(self, outcome: str, seconds: float = None):
+        with self._lock:
+            self.jobs[outcome] += 1
+            if seconds is not None:
+                self.job_seconds.append(seconds)
+
+    def summary(self) -> dict:
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            samples = self.latencies.get(endpoint)
+            if not samples:
+                continue
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'errors': {str(code): count for code, count in sorted(self.errors[endpoint].items())},
+                'p50_ms': round(percentile(samples, 50) * 1000, 1),
+                'p95_ms': round(percentile(samples, 95) * 1000, 1),
+                'p99_ms': round(percentile(samples, 99) * 1000, 1),
+                'max_ms': round(max(samples) * 1000, 1),
+            }
+        return endpoints
+
+
+class Client:
+    def __init__(self, base_url: str, api_key: str, stats: Stats):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.stats = stats
+
+    def request(self, endpoint: str, method: str, path: str, payload: dict = None):
+        """Send one request; returns (status, body), with body parsed as JSON unless raw."""
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, method=method,
+                                         headers={'X-API-Key': self.api_key, 'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except OSError:
+            status, body = 599, b''
+        self.stats.request(endpoint, time.perf_counter() - start, status)
+        if endpoint == 'download' or status >= 400:
+            return status, body
+        return status, json.loads(body or b'null')
+
+
+def run_client(client: Client, args, texts: list, next_job, stop_at: float):
+    while time.time() < stop_at:
+        n = next_job()
+        if n is None:
+            return
+        start = time.perf_counter()
+        status, job = client.request('generate', 'POST', '/api/generate', {
+            'prd_text': f"(Load test job {n + 1})\n\n{texts[n % len(texts)]}",
+            'title': f"Load Test {n + 1}", 'format': args.format, 'use_cache': False
+        })
+        if status >= 400:
+            client.stats.job('rejected')
+            time.sleep(args.poll_interval)
+            continue
+        job_id = job['job_id']
+        client.stats.submitted(job_id)
+
+        while True:
+            time.sleep(args.poll_interval)
+            status, current = client.request('status', 'GET', f"/api/status/{job_id}")
+            if status >= 400 or current['status'] in ('completed', 'failed'):
+                break
+            if time.time() > stop_at + args.drain:
+                client.stats.job('unfinished')
+                return
+        if status >= 400 or current['status'] == 'failed':
+            client.stats.job('failed')
+            continue
+
+        status, _ = client.request('download', 'GET', f"/api/download/{job_id}")
+        client.stats.job('completed' if status < 400 else 'failed', time.perf_counter() - start)
+        if args.delete:
+            client.request('delete', 'DELETE', f"/api/jobs/{job_id}")
+
+
+def sample_store(store, stats: Stats) -> dict:
+    """Jobs and approximate bytes in the jobs store for the jobs this test created."""
+    held = [store.get(job_id) for job_id in stats.submitted_ids()]
+    return {'jobs': len(store), 'bytes': sum(deep_size(job) for job in held if job is not None),
+            'rss': rss_bytes()}
+
+
+def misconfigured(endpoints: dict):
+    """Why the run measured rejections rather than jobs, or None."""
+    generate, status = endpoints.get('generate'), endpoints.get('status')
+    if generate:
+        rejected = sum(generate['errors'].get(code, 0) for code in ('429', '503'))
+        if rejected * 2 > generate['requests']:
+            return (f"{rejected}/{generate['requests']} submissions were rejected (429/503): "
+                    f"raise RATE_LIMIT_PER_HOUR, MAX_JOBS_PER_KEY and MAX_QUEUE_DEPTH on the server")
+    if status:
+        missing = status['errors'].get('404', 0)
+        if missing * 2 > status['requests']:
+            return (f"{missing}/{status['requests']} status polls returned 404: with several "
+                    f"workers use a shared job store (JOB_STORE_BACKEND=sqlite or redis)")
+    return None
+
+
+def mb(value) -> str:
+    return f"{value / 1e6:.1f}MB" if value is not None else 'n/a'
+
+
+def print_report(report: dict):
+    print("="*58)
+    print("API LOAD TEST")
+    print("="*58)
+    config = report['config']
+    print(f"Target: {report['target']}   Clients: {config['clients']}   Poll: {config['poll_interval']}s")
+    print(f"Duration: {report['wall_seconds']:.1f}s   Jobs: {report['jobs']}")
+    print(f"Throughput: {report['jobs_per_minute']:.1f} jobs/min   "
+          f"Job latency p50 {report['job_latency']['p50']:.2f}s, p95 {report['job_latency']['p95']:.2f}s")
+    print(f"{'Endpoint':<12}{'Requests':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Errors':>8}")
+    for endpoint, stats in report['endpoints'].items():
+        errors = sum(stats['errors'].values())
+        print(f"{endpoint:<12}{stats['requests']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{errors:>8}")
+    store = report.get('job_store')
+    if store:
+        first, last, peak = store['samples'][0], store['samples'][-1], store['peak']
+        print(f"Jobs store: {first['jobs']} -> {last['jobs']} jobs, {mb(first['bytes'])} -> {mb(last['bytes'])} "
+              f"(peak {peak['jobs']} jobs, {mb(peak['bytes'])}; {store['bytes_per_job']:.0f} bytes/job)")
+        print(f"Process RSS: {mb(first['rss'])} -> {mb(last['rss'])}")
+    if report.get('warning'):
+        print(f"WARNING: {report['warning']}")
+    print("="*58)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API load test')
+    parser.add_argument('--url', help='Running API to test (default: in-process server on the fakes)')
+    parser.add_argument('--api-key', default=None, help='API key for --url')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to keep submitting jobs')
+    parser.add_argument('--jobs', type=int, default=None, help='Stop after this many submitted jobs')
+    parser.add_argument('--drain', type=float, default=120, help='Seconds to wait for in-flight jobs at the end')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='Status polling interval (s)')
+    parser.add_argument('--format', default='md', choices=['md', 'html', 'pdf', 'docx'], help='Output format')
+    parser.add_argument('--delete', action='store_true', help='Delete each job after downloading it')
+    parser.add_argument('--sample-interval', type=float, default=2.0, help='Jobs store sampling interval (s)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake LLM seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Fake LLM generation speed')
+    parser.add_argument('--tokens', type=int, default=120, help='Tokens in a fake LLM filler reply')
+    parser.add_argument('--responses', help='JSON list of {"match", "response"} canned LLM replies')
+    parser.add_argument('--search-latency', type=float, default=0.2, help='Stub search seconds per query')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+    # MAX_CONCURRENT_JOBS for the in-process server
+    args.concurrency = args.clients
+
+    texts = [path.read_text(encoding='utf-8').strip() for path in sorted((ROOT / 'examples').glob('*.txt'))]
+    output = Path(args.output).resolve() if args.output else None
+    fake = server = thread = store = None
+    workdir = cwd = None
+    if args.url:
+        base_url, api_key = args.url, args.api_key or os.getenv('API_KEY', 'demo-api-key-123')
+    else:
+        fake = FakeOllama(latency=args.latency, tokens_per_second=args.tokens_per_second, tokens=args.tokens,
+                          responses=load_responses(args.responses))
+        workdir, cwd = Path(tempfile.mkdtemp(prefix='load_test_')), os.getcwd()
+        configure_environment(workdir, fake.start(), args)
+        port = free_port()
+        server, thread = start_api(port)
+        from api.job_store import get_job_store
+        store = get_job_store()
+        base_url, api_key = f"http://127.0.0.1:{port}", API_KEY
+
+    stats = Stats()
+    counter = {'next': 0}
+    counter_lock = threading.Lock()
+
+    def next_job():
+        with counter_lock:
+            if args.jobs is not None and counter['next'] >= args.jobs:
+                return None
+            counter['next'] += 1
+            return counter['next'] - 1
+
+    samples = []
+    done = threading.Event()
+
+    def sampler():
+        while True:
+            samples.append(dict(sample_store(store, stats), t=round(time.perf_counter() - start, 1)))
+            if done.wait(args.sample_interval):
+                samples.append(dict(sample_store(store, stats), t=round(time.perf_counter() - start, 1)))
+                return
+
+    start = time.perf_counter()
+    stop_at = time.time() + args.duration
+    clients = [threading.Thread(target=run_client, args=(Client(base_url, api_key, stats), args, texts,
+                                                         next_job, stop_at), daemon=True)
+               for _ in range(args.clients)]
+    sampling = threading.Thread(target=sampler, daemon=True) if store is not None else None
+    try:
+        with quiet() if server else contextlib.nullcontext():
+            if sampling:
+                sampling.start()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            wall = time.perf_counter() - start
+            done.set()
+            if sampling:
+                sampling.join()
+    finally:
+        if server:
+            server.should_exit = True
+            thread.join(timeout=10)
+            fake.stop()
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'target': args.url or 'in-process',
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'api_key')},
+        'wall_seconds': round(wall, 2),
+        'jobs': dict(stats.jobs),
+        'jobs_per_minute': round(stats.jobs['completed'] / wall * 60, 2) if wall else 0.0,
+        'job_latency': {
+            'p50': round(percentile(stats.job_seconds, 50), 3),
+            'p95': round(percentile(stats.job_seconds, 95), 3),
+            'p99': round(percentile(stats.job_seconds, 99), 3),
+        },
+        'endpoints': stats.summary(),
+    }
+    if samples:
+        peak = max(samples, key=lambda sample: sample['bytes'])
+        report['job_store'] = {
+            'samples': samples,
+            'peak': peak,
+            'bytes_per_job': peak['bytes'] / peak['jobs'] if peak['jobs'] else 0.0,
+        }
+
+    warning = misconfigured(report['endpoints'])
+    if warning:
+        report['warning'] = warning
+
+    print_report(report)
+    if output:
+        output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"Report saved to: {output}")
+    if warning:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,193 @@
 import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+from threading import Lock
 from cli import run_pipeline
+from lib.checkpoint import BatchManifest, content_hash
 import sys
 
 import os
 
-def process_batch(input_dir: str, output_dir: str):
-    """Process multiple PRD files in a directory"""
-    
+
+def load_summary(summary_file: Path) -> dict:
+    """Load an existing batch summary, keyed by PRD file name"""
+
+    if not summary_file.exists():
+        return {}
+
+    try:
+        entries = json.loads(summary_file.read_text(encoding='utf-8'))
+    except (json.JSONDecodeError, OSError):
+        print(f"Warning: could not read {summary_file}, starting a fresh summary")
+        return {}
+
+    return {entry['file']: entry for entry in entries if 'file' in entry}
+
+
+def write_summary(summary_file: Path, results: dict):
+    """Atomically rewrite the batch summary so an interrupted run leaves a valid file"""
+
+    tmp_file = summary_file.with_suffix('.json.tmp')
+    tmp_file.write_text(json.dumps(list(results.values()), indent=2), encoding='utf-8')
+    os.replace(tmp_file, summary_file)
+
+
+def failure_entry(prd_file: Path, error: BaseException, prd_hash: str = None) -> dict:
+    """Summary entry for a PRD that could not be processed"""
+
+    return {
+        'file': prd_file.name,
+        'status': 'failed',
+        'error': str(error),
+        'content_hash': prd_hash
+    }
+
+
+def process_file(prd_file: Path, output_path: Path, manifest: BatchManifest) -> dict:
+    """Run the pipeline for a single PRD file and return its summary entry"""
+
+    prd_hash = None
+
+    try:
+        prd_text = prd_file.read_text(encoding='utf-8')
+        prd_hash = content_hash(prd_text)
+        title = prd_file.stem.replace('_', ' ').replace('-', ' ').title()
+        output_file = output_path / f"{prd_file.stem}_output.md"
+
+        checkpoint = manifest.checkpoint(prd_hash, prd_file.name)
+        result = run_pipeline(prd_text, title, str(output_file), checkpoint=checkpoint)
+        manifest.update(prd_hash, status='success', output=str(output_file))
+        return {
+            'file': prd_file.name,
+            'status': 'success',
+            'output': str(output_file),
+            'run_id': result['run_id'],
+            'content_hash': prd_hash
+        }
+
+    # run_pipeline calls sys.exit on failure, so catch SystemExit too
+    # to keep one bad PRD from taking down the whole batch
+    except (Exception, SystemExit) as e:
+        print(f"Failed to process {prd_file.name}: {str(e)}")
+        if prd_hash:
+            manifest.update(prd_hash, status='failed', error=str(e))
+        return failure_entry(prd_file, e, prd_hash)
+
+
+def process_batch(input_dir: str, output_dir: str, workers: int = 1, resume: bool = True):
+    """Process multiple PRD files in a directory
+
+    Up to `workers` PRDs run concurrently on a thread pool (the pipeline
+    spends most of its time waiting on Ollama and web search). Progress is
+    tracked in `batch_manifest.json`, keyed by PRD content hash: with
+    `resume` enabled, finished PRDs are skipped and unfinished ones restart
+    from their last completed agent stage.
+    """
+
     input_path = Path(input_dir)
     output_path = Path(output_dir)
-    
+
     if not input_path.exists():
         print(f"Input directory not found: {input_dir}")
         sys.exit(1)
-    
+
+    if workers < 1:
+        print("Workers must be at least 1")
+        sys.exit(1)
+
     output_path.mkdir(parents=True, exist_ok=True)
-    
+
     # Find all PRD files
-    prd_files = list(input_path.glob('*.txt')) + list(input_path.glob('*.md'))
-    
+    prd_files = sorted(input_path.glob('*.txt')) + sorted(input_path.glob('*.md'))
+
     if not prd_files:
         print(f"No PRD files found in {input_dir}")
         sys.exit(1)
-    
-    print(f"\nFound {len(prd_files)} PRD files to process\n")
-    
-    results = []
-    
-    for i, prd_file in enumerate(prd_files, 1):
-        print(f"\n{'='*70}")
-        print(f"Processing {i}/{len(prd_files)}: {prd_file.name}")
-        print(f"{'='*70}\n")
-        
+
+    summary_file = output_path / 'batch_summary.json'
+    results = load_summary(summary_file) if resume else {}
+
+    manifest = BatchManifest(output_path / 'batch_manifest.json')
+    if not resume:
+        manifest.reset()
+
+    summary_lock = Lock()
+
+    def record(entry: dict):
+        with summary_lock:
+            results[entry['file']] = entry
+            write_summary(summary_file, results)
+
+    pending = []
+    unreadable = 0
+    for prd_file in prd_files:
+        # An unreadable or non-UTF-8 PRD fails on its own, like a failed run
         try:
-            prd_text = prd_file.read_text(encoding='utf-8')
-            title = prd_file.stem.replace('_', ' ').replace('-', ' ').title()
-            output_file = output_path / f"{prd_file.stem}_output.md"
-            
-            result = run_pipeline(prd_text, title, str(output_file))
-            results.append({
-                'file': prd_file.name,
-                'status': 'success',
-                'output': str(output_file),
-                'run_id': result['run_id']
-            })
-            
+            complete = manifest.is_complete(content_hash(prd_file.read_text(encoding='utf-8')))
         except Exception as e:
-            print(f"Failed to process {prd_file.name}: {str(e)}")
-            results.append({
-                'file': prd_file.name,
-                'status': 'failed',
-                'error': str(e)
-            })
-    
-    # Save batch summary
-    summary_file = output_path / 'batch_summary.json'
-    summary_file.write_text(json.dumps(results, indent=2))
-    summary_file.write_text(json.dumps(results, ident = 2))
-    
+            print(f"Failed to read {prd_file.name}: {str(e)}")
+            record(failure_entry(prd_file, e))
+            unreadable += 1
+            continue
+        if not complete:
+            pending.append(prd_file)
+    skipped = len(prd_files) - len(pending) - unreadable
+
+    print(f"\nFound {len(prd_files)} PRD files to process")
+    if skipped:
+        print(f"Skipping {skipped} already completed files")
+    if unreadable:
+        print(f"Could not read {unreadable} files")
+    print(f"Workers: {workers}\n")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+
+        for i, prd_file in enumerate(pending, 1):
+            # Keep at most `workers` PRDs in flight
+            if len(in_flight) >= workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+
+            print(f"\n{'='*70}")
+            print(f"Processing {i}/{len(pending)}: {prd_file.name}")
+            print(f"{'='*70}\n")
+
+            in_flight.add(executor.submit(process_file, prd_file, output_path, manifest))
+
+        for future in wait(in_flight).done:
+            record(future.result())
+
     # Print summary
     print("\n" + "="*70)
     print("BATCH PROCESSING COMPLETE")
     print("="*70)
-    
-    success_count = sum(1 for r in results if r['status'] == 'success')
+
+    success_count = sum(1 for r in results.values() if r['status'] == 'success')
     print(f"Total files: {len(results)}")
     print(f"Successful: {success_count}")
     print(f"Failed: {len(results) - success_count}")
     print(f"Summary saved to: {summary_file}")
     print("="*70 + "\n")
 
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Process a directory of PRD files through the pipeline',
+        epilog="example: python src/batch_process.py ./prds ./outputs --workers 4"
+    )
+    parser.add_argument('input_dir', help='Directory containing *.txt / *.md PRDs')
+    parser.add_argument('output_dir', help='Directory for generated posts and batch_summary.json')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of PRDs to process concurrently (default: 1)')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='Ignore batch_manifest.json and reprocess every file from scratch')
+
+    args = parser.parse_args()
+    process_batch(args.input_dir, args.output_dir, args.workers, resume=not args.no_resume)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python src/batch_process.py <input_dir> <output_dir>")
-        print("Example: python src/batch_process.py ./prds ./outputs")
-        sys.exit(1)
-    
-    process_batch(sys.argv[1], sys.argv[2])
+    main()
@@ -1,18 +1,26 @@
 import sys
 import argparse
 from pathlib import Path
-from lib.agents.researcher import run_researcher
+from lib.research_cache import run_researcher_cached
 from lib.agents.writer import run_writer
-from lib.agents.fact_checker import run_fact_checker
+from lib.retrieval import focus_research
+from lib.claims import run_fact_checker_incremental, run_writer_targeted
 from lib.agents.style_polisher import run_style_polisher
 from lib.logger import generate_run_id, print_log_summary, save_pipeline_result
+from lib.run_index import index_run
+from lib.tracing import span, start_trace
 from lib.types import PRDInput
 from lib.utils import count_words
 from lib.formatters import convert_to_format
 import time
 
-def run_pipeline(prd_text: str, title: str = None, output_file: str = None, output_format: str = 'md'):
-    """Run the complete multi-agent pipeline"""
+def run_pipeline(prd_text: str, title: str = None, output_file: str = None, output_format: str = 'md',
+                 checkpoint=None):
+    """Run the complete multi-agent pipeline
+
+    If a `PipelineCheckpoint` is given, stages that already completed in a
+    previous run are restored from it and each newly finished stage is saved.
+    """
     
     print("\n" + "="*70)
     print("MULTI-AGENT CONTENT GENERATION PIPELINE")
@@ -20,32 +28,65 @@ def run_pipeline(prd_text: str, title: str = None, output_file: str = None, outp
     
     # Create PRD input
     prd = PRDInput(text=prd_text, title=title)
-    run_id = generate_run_id()
+    run_id = (checkpoint.run_id if checkpoint else None) or generate_run_id()
+    if checkpoint:
+        checkpoint.set_run_id(run_id)
     
     print(f"Run ID: {run_id}")
     print(f"PRD Title: {title or 'Untitled'}")
     print(f"PRD Length: {len(prd_text)} characters\n")
     
     start_time = time.time()
+    stage_timings = {}
+    trace = start_trace(run_id)
+    
+    def end_stage(name: str, started: float):
+        stage_timings[name] = round(time.time() - started, 3)
     
     try:
         # Step 1: Research
         print("[1/4] Researcher Agent - Gathering sources and facts...")
-        research = run_researcher(prd, run_id)
+        stage_start = time.time()
+        research = checkpoint.load('research') if checkpoint else None
+        if research:
+            print("      Restored from checkpoint")
+        else:
+            with span('agent', 'Researcher'):
+                research = run_researcher_cached(prd, run_id)
+            if checkpoint:
+                checkpoint.save('research', research)
+        end_stage('Researcher', stage_start)
         print(f"      Found {len(research.sources)} sources, {len(research.facts)} facts\n")
         
+        # Writer and Fact-Checker prompts only get the research relevant to the PRD
+        evidence = focus_research(prd, research)
+        
         # Step 2: Write
         print("[2/4] Writer Agent - Creating draft...")
-        draft = run_writer(prd, research, run_id)
+        stage_start = time.time()
+        draft = checkpoint.load('draft') if checkpoint else None
+        if draft:
+            print("      Restored from checkpoint")
+        else:
+            with span('agent', 'Writer'):
+                draft = run_writer(prd, evidence, run_id)
+            if checkpoint:
+                checkpoint.save('draft', draft)
+        end_stage('Writer', stage_start)
         print(f"      Generated {draft.word_count} words, {len(draft.citations)} citations\n")
         
         # Step 3: Fact-check with retry
         print("[3/4] Fact-Checker Agent - Verifying claims...")
+        stage_start = time.time()
         max_retries = 3
-        fact_check = None
+        fact_check = checkpoint.load('fact_check') if checkpoint else None
+        
+        if fact_check:
+            print(f"      Restored from checkpoint - {'PASSED' if fact_check.passed else 'FAILED'}\n")
         
-        for attempt in range(max_retries):
-            fact_check = run_fact_checker(draft, research, run_id, retry_count=attempt)
+        for attempt in range(0 if fact_check else max_retries):
+            with span('agent', 'Fact-Checker', attempt=attempt):
+                fact_check = run_fact_checker_incremental(draft, evidence, run_id, retry_count=attempt)
             
             if fact_check.passed:
                 print(f"      Fact-check PASSED - {len(fact_check.issues)} issues\n")
@@ -55,15 +96,31 @@ def run_pipeline(prd_text: str, title: str = None, output_file: str = None, outp
             
             if attempt < max_retries - 1:
                 print(f"      Retrying ({attempt + 1}/{max_retries - 1})...")
-                draft = run_writer(prd, research, run_id, 
-                                 feedback=fact_check.feedback, 
-                                 retry_count=attempt + 1)
+                # Rewrite only the sections with flagged claims
+                with span('agent', 'Writer', attempt=attempt + 1):
+                    draft = run_writer_targeted(prd, evidence, draft, fact_check, run_id,
+                                                retry_count=attempt + 1)
+                if checkpoint:
+                    checkpoint.save('draft', draft)
             else:
                 print(f"      Warning: Proceeding with unresolved issues\n")
         
+        if checkpoint:
+            checkpoint.save('fact_check', fact_check)
+        end_stage('Fact-Checker', stage_start)
+        
         # Step 4: Polish
         print("[4/4] Style-Polisher Agent - Refining content...")
-        final = run_style_polisher(draft, prd, run_id)
+        stage_start = time.time()
+        final = checkpoint.load('polish') if checkpoint else None
+        if final:
+            print("      Restored from checkpoint")
+        else:
+            with span('agent', 'Style-Polisher'):
+                final = run_style_polisher(draft, prd, run_id)
+            if checkpoint:
+                checkpoint.save('polish', final)
+        end_stage('Style-Polisher', stage_start)
         final_word_count = count_words(final.polished)
         print(f"      Applied {len(final.changes)} improvements")
         print(f"      Final: {final_word_count} words\n")
@@ -75,6 +132,8 @@ def run_pipeline(prd_text: str, title: str = None, output_file: str = None, outp
             'run_id': run_id,
             'prd_title': title,
             'duration_seconds': round(duration, 2),
+            'stage_timings': stage_timings,
+            'timings': trace.breakdown(),
             'final_content': final.polished,
             'research': {'sources': len(research.sources), 'facts': len(research.facts)},
             'draft': {'word_count': draft.word_count, 'citations': len(draft.citations)},
@@ -84,6 +143,7 @@ def run_pipeline(prd_text: str, title: str = None, output_file: str = None, outp
         }
         
         save_pipeline_result(result)
+        index_run(result)
         
         # Output final content
         # Output final content
@@ -94,12 +154,13 @@ def run_pipeline(prd_text: str, title: str = None, output_file: str = None, outp
                 output_path = output_path.with_suffix(f'.{output_format}')
             
             # Convert to desired format
-            final_path = convert_to_format(
-                final.polished,
-                output_format,
-                str(output_path),
-                title or "Blog Post"
-            )
+            with span('render', output_format):
+                final_path = convert_to_format(
+                    final.polished,
+                    output_format,
+                    str(output_path),
+                    title or "Blog Post"
+                )
             
             print(f"Content saved to: {final_path} ({output_format.upper()})")
         else:
@@ -117,6 +178,10 @@ def run_pipeline(prd_text: str, title: str = None, output_file: str = None, outp
         print(f"Duration: {duration:.1f} seconds")
         print(f"Final word count: {final_word_count}")
         print(f"Fact-check: {'PASSED' if fact_check.passed else 'FAILED'}")
+        for agent, timing in trace.breakdown()['agents'].items():
+            llm = timing.get('llm') or {}
+            rate = f", {llm['tokens_per_second']} tok/s" if llm.get('tokens_per_second') else ""
+            print(f"  {agent}: {timing['seconds']:.1f}s, {llm.get('requests', 0)} LLM requests{rate}")
         print(f"Run ID: {run_id}")
         print("="*70 + "\n")
         
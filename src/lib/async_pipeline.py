@@ -0,0 +1,160 @@
+"""Async entry points for the agents and the full pipeline.
+
+The agents themselves are synchronous (they block on Ollama and web search),
+so each ``arun_*`` coroutine runs its agent on a dedicated, bounded thread
+pool instead of on the event loop. The pool caps how many agent calls are in
+flight at once (extra calls wait without holding a thread), so a single
+uvicorn process can drive many concurrent jobs without one thread per job
+sitting idle, and callers get control back between stages to report progress.
+
+Configuration (environment variables):
+    AGENT_CONCURRENCY  Maximum agent calls running at once (default: 8)
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from .agents.writer import run_writer
+from .agents.style_polisher import run_style_polisher
+from .claims import run_fact_checker_incremental, run_writer_targeted
+from . import tracing
+from .log_writer import log_agent_output
+from .logger import generate_run_id
+from .ollama_pool import token_sink
+from .prompt_session import end_prompt_session
+from .research_cache import run_researcher_cached
+from .retrieval import focus_research
+from .types import PRDInput, ResearchOutput, WriterOutput, FactCheckOutput, StylePolisherOutput
+
+MAX_FACT_CHECK_ATTEMPTS = 3
+
+ProgressCallback = Callable[..., Optional[Awaitable[None]]]
+TokenCallback = Callable[[str, str], None]
+
+_agent_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _agent_executor
+    if _agent_executor is None:
+        _agent_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('AGENT_CONCURRENCY', 8)),
+            thread_name_prefix='agent'
+        )
+    return _agent_executor
+
+
+async def _run_agent(func, *args, on_token: Optional[Callable[[str], None]] = None, **kwargs):
+    # Copy the caller's context so context variables (e.g. per-job settings)
+    # are visible inside the agent thread, as with asyncio.to_thread
+    context = contextvars.copy_context()
+    if on_token is not None:
+        context.run(token_sink.set, on_token)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+async def arun_researcher(prd: PRDInput, run_id: str) -> ResearchOutput:
+    return await _run_agent(run_researcher_cached, prd, run_id)
+
+
+async def arun_writer(prd: PRDInput, research: ResearchOutput, run_id: str,
+                      feedback: Optional[str] = None, retry_count: int = 0,
+                      on_token: Optional[Callable[[str], None]] = None) -> WriterOutput:
+    return await _run_agent(run_writer, prd, research, run_id,
+                            feedback=feedback, retry_count=retry_count, on_token=on_token)
+
+
+async def arun_revise(prd: PRDInput, research: ResearchOutput, draft: WriterOutput,
+                      fact_check: FactCheckOutput, run_id: str, retry_count: int = 0) -> WriterOutput:
+    return await _run_agent(run_writer_targeted, prd, research, draft, fact_check, run_id,
+                            retry_count=retry_count)
+
+
+async def arun_fact_checker(draft: WriterOutput, research: ResearchOutput, run_id: str,
+                            retry_count: int = 0) -> FactCheckOutput:
+    return await _run_agent(run_fact_checker_incremental, draft, research, run_id,
+                            retry_count=retry_count)
+
+
+async def arun_style_polisher(draft: WriterOutput, prd: PRDInput, run_id: str,
+                              on_token: Optional[Callable[[str], None]] = None) -> StylePolisherOutput:
+    return await _run_agent(run_style_polisher, draft, prd, run_id, on_token=on_token)
+
+
+async def _logged(run_id: str, agent: str, call: Awaitable, attempt: int = 0):
+    """Await an agent call as an ``agent`` span and hand its output to the log writer."""
+    started = time.perf_counter()
+    with tracing.span('agent', agent, attempt=attempt):
+        output = await call
+    log_agent_output(run_id, agent, output, time.perf_counter() - started, attempt)
+    return output
+
+
+async def _report(on_progress: Optional[ProgressCallback], step: str, progress: int,
+                  message: Optional[str] = None):
+    if on_progress is None:
+        return
+    result = on_progress(step, progress, message)
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def run_pipeline_async(prd: PRDInput, run_id: Optional[str] = None,
+                             on_progress: Optional[ProgressCallback] = None,
+                             on_token: Optional[TokenCallback] = None) -> dict:
+    """Run research -> write -> fact-check loop -> polish without blocking the loop.
+
+    ``on_progress(step, progress, message)`` is called (and awaited if it is
+    a coroutine function) between stages. ``on_token(step, token)`` receives
+    tokens streamed by the Writer and Style-Polisher; it is called from the
+    agent thread. Returns the stage outputs.
+    """
+    run_id = run_id or generate_run_id()
+
+    def stage_tokens(step: str) -> Optional[Callable[[str], None]]:
+        return functools.partial(on_token, step) if on_token else None
+
+    try:
+        await _report(on_progress, "Researcher", 5)
+        research = await _logged(run_id, "Researcher", arun_researcher(prd, run_id))
+        # Writer and Fact-Checker prompts only get the research relevant to the PRD
+        evidence = focus_research(prd, research)
+
+        await _report(on_progress, "Writer", 30)
+        draft = await _logged(run_id, "Writer", arun_writer(prd, evidence, run_id, on_token=stage_tokens("Writer")))
+
+        await _report(on_progress, "Fact-Checker", 55)
+        fact_check = await _logged(run_id, "Fact-Checker", arun_fact_checker(draft, evidence, run_id))
+
+        for attempt in range(1, MAX_FACT_CHECK_ATTEMPTS):
+            if fact_check.passed:
+                break
+            await _report(on_progress, "Fact-Checker", 55 + attempt * 5,
+                          f"Fact check failed, retrying ({attempt}/{MAX_FACT_CHECK_ATTEMPTS - 1})...")
+            draft = await _logged(run_id, "Writer", arun_revise(prd, evidence, draft, fact_check, run_id,
+                                                                retry_count=attempt), attempt)
+            fact_check = await _logged(run_id, "Fact-Checker",
+                                       arun_fact_checker(draft, evidence, run_id, retry_count=attempt), attempt)
+
+        await _report(on_progress, "Style-Polisher", 80, "Polishing content...")
+        final = await _logged(run_id, "Style-Polisher",
+                              arun_style_polisher(draft, prd, run_id, on_token=stage_tokens("Style-Polisher")))
+    finally:
+        # The session holds the run's PRD/research prefix; drop it even if a stage failed
+        end_prompt_session(run_id)
+
+    return {
+        'run_id': run_id,
+        'research': research,
+        'draft': draft,
+        'fact_check': fact_check,
+        'final': final,
+    }
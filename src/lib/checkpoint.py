@@ -0,0 +1,136 @@
+"""Resumable batch manifest and per-stage pipeline checkpoints.
+
+The manifest (``batch_manifest.json``) is keyed by the SHA-256 of each PRD's
+content, so renaming a file does not lose its progress and editing a PRD
+starts it from scratch. Stage outputs are stored next to the manifest in
+``.checkpoints/<hash>/<stage>.json`` to keep the manifest itself small.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from .serialization import dump_output, load_output
+
+# Pipeline stages in execution order
+STAGES = ('research', 'draft', 'fact_check', 'polish')
+
+
+def stage_types() -> dict:
+    """Output model of each stage (imported on first use, with the agents)."""
+    from .types import ResearchOutput, WriterOutput, FactCheckOutput, StylePolisherOutput
+    return {
+        'research': ResearchOutput,
+        'draft': WriterOutput,
+        'fact_check': FactCheckOutput,
+        'polish': StylePolisherOutput,
+    }
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of PRD content used as the manifest key."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _atomic_write(path: Path, text: str):
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+class BatchManifest:
+    """Thread-safe record of PRD progress across batch runs.
+
+    ``types`` maps each stage to the model its checkpoints are loaded as
+    (default: ``stage_types()``).
+    """
+
+    def __init__(self, path: Path, types: Optional[dict] = None):
+        self.path = Path(path)
+        self.types = types
+        self.checkpoint_dir = self.path.parent / '.checkpoints'
+        self._lock = threading.Lock()
+        self.entries = {}
+
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding='utf-8'))
+            except (json.JSONDecodeError, OSError):
+                print(f"Warning: could not read {self.path}, starting a fresh manifest")
+
+    def is_complete(self, prd_hash: str) -> bool:
+        """True if this PRD finished successfully in a previous run."""
+        return self.entries.get(prd_hash, {}).get('status') == 'success'
+
+    def completed_stages(self, prd_hash: str) -> list:
+        return list(self.entries.get(prd_hash, {}).get('stages', []))
+
+    def update(self, prd_hash: str, **fields):
+        """Merge fields into a PRD entry and persist the manifest."""
+        with self._lock:
+            entry = self.entries.setdefault(prd_hash, {'stages': []})
+            entry.update(fields)
+            entry['updated_at'] = datetime.utcnow().isoformat()
+            _atomic_write(self.path, json.dumps(self.entries, indent=2))
+
+    def reset(self):
+        """Forget all recorded progress."""
+        with self._lock:
+            self.entries = {}
+            _atomic_write(self.path, json.dumps(self.entries, indent=2))
+
+    def checkpoint(self, prd_hash: str, file_name: str) -> 'PipelineCheckpoint':
+        """Return the checkpoint handle for one PRD."""
+        if prd_hash not in self.entries:
+            self.update(prd_hash, file=file_name, status='pending')
+        return PipelineCheckpoint(self, prd_hash)
+
+    def _mark_stage(self, prd_hash: str, stage: str):
+        with self._lock:
+            entry = self.entries.setdefault(prd_hash, {'stages': []})
+            if stage not in entry['stages']:
+                entry['stages'].append(stage)
+            entry['updated_at'] = datetime.utcnow().isoformat()
+            _atomic_write(self.path, json.dumps(self.entries, indent=2))
+
+
+class PipelineCheckpoint:
+    """Load and save completed stage outputs for a single PRD."""
+
+    def __init__(self, manifest: BatchManifest, prd_hash: str):
+        self.manifest = manifest
+        self.prd_hash = prd_hash
+        self.stage_dir = manifest.checkpoint_dir / prd_hash
+
+    @property
+    def run_id(self) -> Optional[str]:
+        return self.manifest.entries.get(self.prd_hash, {}).get('run_id')
+
+    def set_run_id(self, run_id: str):
+        self.manifest.update(self.prd_hash, run_id=run_id, status='running')
+
+    def load(self, stage: str) -> Optional[Any]:
+        """Return the saved output for a stage, or None if it has not completed."""
+        if stage not in self.manifest.completed_stages(self.prd_hash):
+            return None
+
+        stage_file = self.stage_dir / f"{stage}.json"
+        try:
+            data = json.loads(stage_file.read_text(encoding='utf-8'))
+            return load_output((self.manifest.types or stage_types())[stage], data)
+        except Exception as e:
+            print(f"Warning: discarding unreadable {stage} checkpoint: {str(e)}")
+            return None
+
+    def save(self, stage: str, output: Any):
+        """Persist a stage output and mark the stage complete."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+
+        self.stage_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.stage_dir / f"{stage}.json", json.dumps(dump_output(output)))
+        self.manifest._mark_stage(self.prd_hash, stage)
@@ -0,0 +1,447 @@
+"""Claim-level incremental fact-checking and targeted section rewrites.
+
+A failed fact-check used to trigger a full ``run_writer`` regeneration and a
+full ``run_fact_checker`` pass over the new draft, up to three times. Here
+the draft is split into sections (at markdown headings) and each section into
+sentence-level claims. Verdicts are cached per claim, keyed on the claim text
+and the research source set, so:
+
+* ``run_fact_checker_incremental`` sends the fact-checker only the sections
+  that contain claims it has not already judged against the same research;
+* ``run_writer_targeted`` regenerates only the sections holding flagged
+  ``issues`` and leaves the rest of the draft untouched, so the following
+  check re-verifies just the rewritten claims.
+
+Long drafts are also checked in chunks: ``run_fact_checker_chunked`` groups
+whole sections into chunks of at most ``FACT_CHECK_CHUNK_WORDS`` words,
+verifies the chunks concurrently against only the research facts relevant
+to each (ranked with the BM25 index in ``retrieval``), and merges the results in chunk order (the draft passes only if
+every chunk passes). This keeps each call well inside phi3's context window.
+
+Configuration (environment variables):
+    INCREMENTAL_FACT_CHECK      "false" restores full rewrites/rechecks (default: true)
+    CLAIM_CACHE_MAX_ENTRIES     Claim verdicts kept in memory (default: 5000)
+    FACT_CHECK_CHUNK_WORDS      Chunk size in words; 0 disables chunking (default: 600)
+    FACT_CHECK_CONCURRENCY      Chunks checked at once (default: 4)
+    FACT_CHECK_FACTS_PER_CHUNK  Research facts sent with each chunk (default: 12)
+"""
+
+import difflib
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from .knowledge_base import get_knowledge_base
+from .prompt_session import PromptSession, get_prompt_session
+from .retrieval import ResearchIndex
+from .serialization import replace_fields
+
+if TYPE_CHECKING:
+    from .types import FactCheckOutput, PRDInput, ResearchOutput, WriterOutput
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_CHUNK_WORDS = 600
+DEFAULT_CHECK_CONCURRENCY = 4
+DEFAULT_FACTS_PER_CHUNK = 12
+
+# Minimum similarity for attributing a paraphrased issue claim to a sentence
+MATCH_THRESHOLD = 0.6
+
+_HEADING = re.compile(r'^#{1,6}\s', re.MULTILINE)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(\[])')
+
+REWRITE_INSTRUCTIONS = (
+    "Revise one section of the blog post. Rewrite it so every statement is supported "
+    "by the research facts above, fixing the issues listed. Keep the heading, markdown "
+    "formatting, citation markers and roughly the same length. Return only the revised section."
+)
+
+
+# The agents are imported on first use so the claim logic loads (and is
+# tested) on its own
+def run_fact_checker(*args, **kwargs) -> 'FactCheckOutput':
+    from .agents.fact_checker import run_fact_checker
+    return run_fact_checker(*args, **kwargs)
+
+
+def run_writer(*args, **kwargs) -> 'WriterOutput':
+    from .agents.writer import run_writer
+    return run_writer(*args, **kwargs)
+
+
+def incremental_enabled() -> bool:
+    return os.getenv('INCREMENTAL_FACT_CHECK', 'true').lower() != 'false'
+
+
+def count_words(text: str) -> int:
+    """Whitespace-separated words, the measure chunk budgets are given in."""
+    return len(text.split())
+
+
+def draft_text(draft: 'WriterOutput') -> str:
+    return draft.draft or draft.content or ''
+
+
+def split_sections(text: str) -> List[str]:
+    """Split markdown at heading lines; ``''.join(sections) == text``."""
+    starts = [m.start() for m in _HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+    return [text[a:b] for a, b in zip(starts, starts[1:]) if b > a]
+
+
+def split_claims(section: str) -> List[str]:
+    """Sentence-level claims in a section, skipping headings and code."""
+    claims = []
+    section = re.sub(r'```.*?```', '', section, flags=re.DOTALL)
+    for block in re.split(r'\n\s*\n', section):
+        lines = [line for line in block.splitlines() if not _HEADING.match(line)]
+        text = ' '.join(line.strip().lstrip('-*+> ').strip() for line in lines)
+        for sentence in _SENTENCE_END.split(text):
+            sentence = sentence.strip()
+            if len(sentence.split()) >= 4:
+                claims.append(sentence)
+    return claims
+
+
+def normalize_claim(claim: str) -> str:
+    claim = re.sub(r'\[\d+\]|[*_`]', '', claim.lower())
+    return re.sub(r'\s+', ' ', claim).strip(' .')
+
+
+def source_set_hash(research: 'ResearchOutput') -> str:
+    """Fingerprint of the evidence a verdict was reached against."""
+    parts = sorted(research.facts or [])
+    for source in research.sources:
+        parts.append(f"{getattr(source, 'title', '')}|{getattr(source, 'url', '')}")
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def claim_key(claim: str, sources_hash: str) -> str:
+    return hashlib.sha256(f"{normalize_claim(claim)}\0{sources_hash}".encode('utf-8')).hexdigest()
+
+
+def match_issue(issue, claims: List[str]) -> Optional[int]:
+    """Index of the claim an issue refers to, or None if it cannot be placed."""
+    target = normalize_claim(getattr(issue, 'claim', '') or '')
+    if not target:
+        return None
+
+    best, best_ratio = None, MATCH_THRESHOLD
+    for i, claim in enumerate(claims):
+        normalized = normalize_claim(claim)
+        if target in normalized or normalized in target:
+            return i
+        ratio = difflib.SequenceMatcher(None, target, normalized).ratio()
+        if ratio > best_ratio:
+            best, best_ratio = i, ratio
+    return best
+
+
+class ClaimVerdictCache:
+    """In-memory LRU of per-claim verdicts: (issues, from_failed_check)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[list, bool]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, issues: list, failed: bool):
+        with self._lock:
+            self._entries[key] = (list(issues), failed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_claim_cache() -> ClaimVerdictCache:
+    """Process-wide claim verdict cache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ClaimVerdictCache(
+                max_entries=int(os.getenv('CLAIM_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+            )
+    return _default_cache
+
+
+def format_issue(issue) -> str:
+    line = f"- [{getattr(issue, 'severity', '') or 'issue'}] {getattr(issue, 'claim', '')}"
+    reason = getattr(issue, 'reason', '')
+    return f"{line}: {reason}" if reason else line
+
+
+def chunk_sections(sections: List[str], max_words: int) -> List[str]:
+    """Group consecutive sections into chunks of at most ``max_words`` words.
+
+    Chunks break only at heading boundaries; a single section longer than
+    the limit is split between paragraphs instead.
+    """
+    pieces = []
+    for section in sections:
+        if count_words(section) <= max_words:
+            pieces.append(section)
+            continue
+        paragraphs = re.split(r'(?<=\n\n)', section)
+        current = ''
+        for paragraph in paragraphs:
+            if current and count_words(current) + count_words(paragraph) > max_words:
+                pieces.append(current)
+                current = ''
+            current += paragraph
+        if current:
+            pieces.append(current)
+
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and count_words(current) + count_words(piece) > max_words:
+            chunks.append(current)
+            current = ''
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def check_chunks(draft: 'WriterOutput', chunks: List[str], research: 'ResearchOutput',
+                 run_id: str, retry_count: int = 0) -> list:
+    """Fact-check each chunk concurrently; results are in chunk order."""
+    limit = int(os.getenv('FACT_CHECK_FACTS_PER_CHUNK', DEFAULT_FACTS_PER_CHUNK))
+    index = ResearchIndex(research) if len(chunks) > 1 else None
+
+    def check(chunk: str):
+        # A lone chunk is the whole text under review and gets all the facts
+        evidence = index.focus(chunk, max_facts=limit) if index else research
+        return run_fact_checker(
+            replace_fields(draft, draft=chunk, content=chunk, word_count=count_words(chunk)),
+            evidence, run_id, retry_count=retry_count
+        )
+
+    if len(chunks) == 1:
+        return [check(chunks[0])]
+    print(f"[FactCheck] Checking {len(chunks)} chunks in parallel")
+
+    workers = min(len(chunks), int(os.getenv('FACT_CHECK_CONCURRENCY', DEFAULT_CHECK_CONCURRENCY)))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='fact-check') as executor:
+        return list(executor.map(check, chunks))
+
+
+def merge_fact_checks(results: list) -> 'FactCheckOutput':
+    """Combine per-chunk results: passes only if every chunk passed."""
+    if len(results) == 1:
+        return results[0]
+    return replace_fields(
+        results[0],
+        passed=all(result.passed for result in results),
+        success=all(result.success for result in results),
+        issues=[issue for result in results for issue in result.issues],
+        feedback='\n\n'.join(result.feedback for result in results if result.feedback),
+        content='\n\n'.join(result.content for result in results if result.content)
+    )
+
+
+def fact_check_chunks(text: str) -> List[str]:
+    max_words = int(os.getenv('FACT_CHECK_CHUNK_WORDS', DEFAULT_CHUNK_WORDS))
+    if max_words <= 0 or count_words(text) <= max_words:
+        return [text]
+    return chunk_sections(split_sections(text), max_words)
+
+
+def run_fact_checker_chunked(draft: 'WriterOutput', research: 'ResearchOutput', run_id: str,
+                             retry_count: int = 0) -> 'FactCheckOutput':
+    """Drop-in replacement for run_fact_checker that checks long drafts in parallel chunks."""
+    chunks = fact_check_chunks(draft_text(draft))
+    if len(chunks) == 1:
+        return run_fact_checker(draft, research, run_id, retry_count=retry_count)
+    return merge_fact_checks(check_chunks(draft, chunks, research, run_id, retry_count))
+
+
+def run_fact_checker_incremental(draft: 'WriterOutput', research: 'ResearchOutput', run_id: str,
+                                 retry_count: int = 0,
+                                 cache: Optional[ClaimVerdictCache] = None,
+                                 output_type: Optional[type] = None) -> 'FactCheckOutput':
+    """Drop-in replacement for run_fact_checker that only checks unjudged claims.
+
+    Sections whose claims all have cached verdicts (or were verified in an
+    earlier run, per the knowledge base) are not sent to the fact-checker;
+    their cached issues are carried into the result. The check fails if the
+    fact-checker fails the new sections or if a carried issue came from a
+    failed check. Verdicts are cached only from chunks the fact-checker
+    completed and whose issues could all be matched to a claim;
+    ``output_type`` defaults to ``FactCheckOutput``.
+    """
+    if not incremental_enabled():
+        return run_fact_checker_chunked(draft, research, run_id, retry_count=retry_count)
+
+    cache = cache if cache is not None else get_claim_cache()
+    kb = get_knowledge_base()
+    sources_hash = source_set_hash(research)
+    sections = split_sections(draft_text(draft))
+
+    def lookup(claim: str):
+        verdict = cache.get(claim_key(claim, sources_hash))
+        if verdict is None and kb is not None and kb.claim_verdict(claim) in ('verified', 'sourced'):
+            verdict = ([], False)
+            cache.put(claim_key(claim, sources_hash), *verdict)
+        return verdict
+
+    carried = []
+    carried_failed = False
+    pending = []
+    for section in sections:
+        claims = split_claims(section)
+        verdicts = [lookup(claim) for claim in claims]
+        if any(verdict is None for verdict in verdicts):
+            pending.append((section, claims))
+            continue
+        for issues, failed in verdicts:
+            carried.extend(issues)
+            carried_failed = carried_failed or (failed and bool(issues))
+
+    checked = None
+    if pending:
+        partial = ''.join(section for section, _ in pending)
+        print(f"[FactCheck] Checking {len(pending)}/{len(sections)} sections "
+              f"({len(sections) - len(pending)} unchanged)")
+        chunks = fact_check_chunks(partial)
+        results = check_chunks(draft, chunks, research, run_id, retry_count)
+        checked = merge_fact_checks(results)
+
+        for chunk, result in zip(chunks, results):
+            if not result.success:
+                # The check itself failed: its empty issue list is not a verdict
+                continue
+            claims = split_claims(chunk)
+            per_claim = [[] for _ in claims]
+            unmatched = False
+            for issue in result.issues:
+                index = match_issue(issue, claims)
+                if index is None:
+                    unmatched = True
+                else:
+                    per_claim[index].append(issue)
+            if kb is not None:
+                flagged = [claim for claim, issues in zip(claims, per_claim) if issues]
+                kb.record_claims(flagged, 'disputed', run_id)
+            if unmatched:
+                # An issue no claim owns would be lost from every cached
+                # verdict, so the chunk is checked again next time
+                continue
+            for claim, issues in zip(claims, per_claim):
+                cache.put(claim_key(claim, sources_hash), issues, not result.passed)
+            if kb is not None:
+                if result.passed:
+                    clean = [claim for claim, issues in zip(claims, per_claim) if not issues]
+                    kb.record_claims(clean, 'verified', run_id)
+        if not checked.success:
+            # Report as the fact-checker did
+            return checked
+    else:
+        print(f"[FactCheck] All {len(sections)} sections unchanged, reusing cached verdicts")
+
+    if checked is None:
+        if output_type is None:
+            from .types import FactCheckOutput
+            output_type = FactCheckOutput
+        return output_type(
+            passed=not carried_failed,
+            issues=carried,
+            feedback='\n'.join(format_issue(issue) for issue in carried),
+            content=f"Reused cached verdicts for {len(sections)} sections",
+            success=True
+        )
+
+    if not carried:
+        return checked
+
+    feedback = '\n'.join(filter(None, [checked.feedback] + [format_issue(issue) for issue in carried]))
+    return replace_fields(
+        checked,
+        passed=checked.passed and not carried_failed,
+        issues=list(checked.issues) + carried,
+        feedback=feedback
+    )
+
+
+def rewrite_section(section: str, issues: list, session: PromptSession) -> str:
+    """Regenerate one section so it no longer makes the flagged claims."""
+    heading_match = _HEADING.match(section)
+    heading = section.splitlines()[0] if heading_match else ''
+    trailing = section[len(section.rstrip()):]
+
+    # Everything variable goes after the run's shared PRD/research prefix
+    problems = '\n'.join(format_issue(issue) for issue in issues)
+    task = (
+        f"{REWRITE_INSTRUCTIONS}\n\n"
+        f"Section to revise:\n{section.strip()}\n\n"
+        f"Factual issues found in this section:\n{problems}"
+    )
+
+    reply = session.generate(task)
+    revised = (reply.get('response') or '').strip()
+    if not revised:
+        return section
+    if heading and not revised.startswith(heading.strip()):
+        revised = f"{heading}\n\n{revised}"
+    return revised + (trailing or '\n\n')
+
+
+def run_writer_targeted(prd: 'PRDInput', research: 'ResearchOutput', draft: 'WriterOutput',
+                        fact_check: 'FactCheckOutput', run_id: str,
+                        retry_count: int = 0) -> 'WriterOutput':
+    """Revise a draft after a failed check by rewriting only flagged sections.
+
+    Falls back to a full ``run_writer`` regeneration when incremental mode is
+    off or none of the issues can be located in the draft.
+    """
+    sections = split_sections(draft_text(draft))
+    flagged = {}
+    if incremental_enabled():
+        section_claims = [split_claims(section) for section in sections]
+        flat = [(i, claim) for i, claims in enumerate(section_claims) for claim in claims]
+        for issue in fact_check.issues:
+            index = match_issue(issue, [claim for _, claim in flat])
+            if index is not None:
+                flagged.setdefault(flat[index][0], []).append(issue)
+
+    if not flagged:
+        return run_writer(prd, research, run_id, feedback=fact_check.feedback,
+                          retry_count=retry_count)
+
+    print(f"[Writer] Rewriting {len(flagged)}/{len(sections)} flagged sections")
+    revised = list(sections)
+    session = get_prompt_session(run_id, prd, research)
+    try:
+        for index in sorted(flagged):
+            revised[index] = rewrite_section(sections[index], flagged[index], session)
+    except Exception as e:
+        print(f"[Writer] Targeted rewrite failed, regenerating full draft: {str(e)}")
+        return run_writer(prd, research, run_id, feedback=fact_check.feedback,
+                          retry_count=retry_count)
+
+    text = ''.join(revised)
+    return replace_fields(draft, draft=text, content=text, word_count=count_words(text))
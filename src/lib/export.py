@@ -0,0 +1,358 @@
+"""Render-once, multi-format export of finished posts.
+
+``convert_to_format`` starts from the raw markdown for every format, so
+exporting one post as HTML, PDF and DOCX parses the markdown and builds the
+HTML page three times. ``render_document`` parses it once (markdown2) into a
+``RenderedDocument`` holding the HTML body, the styled page and an element
+tree of the body (lxml, already required by python-docx). Every format is
+produced from that shared rendering:
+
+* ``md`` is the source text and ``html`` the styled page;
+* ``pdf`` feeds the same page to xhtml2pdf;
+* ``docx`` walks the element tree into python-docx headings, paragraphs,
+  lists, code blocks and tables.
+
+``export_formats`` renders the requested formats concurrently and keeps each
+file in a content-addressed cache (hash of the markdown, title and
+``EXPORT_VERSION``), so exporting the same post again copies the cached file
+instead of rendering it. After each render the cache is trimmed the way the
+API's result cache trims ``outputs/``: files older than
+``EXPORT_CACHE_MAX_AGE`` go first, then the least recently used ones until
+the cache fits in ``EXPORT_CACHE_MAX_BYTES``.
+
+Configuration (environment variables):
+    EXPORT_CACHE_DIR        Rendered file cache; empty disables it (default: cache/exports)
+    EXPORT_CACHE_MAX_AGE    Cached files older than this many seconds are evicted (default: 604800)
+    EXPORT_CACHE_MAX_BYTES  Size cap for the cache, least recently used evicted first (default: 536870912)
+    EXPORT_CONCURRENCY      Formats rendered at once (default: 4)
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import lxml.html
+import markdown2
+from docx import Document
+from docx.shared import Pt
+from xhtml2pdf import pisa
+
+FORMATS = ('md', 'html', 'pdf', 'docx')
+
+# Part of the cache key; bump when the rendering below changes
+EXPORT_VERSION = "1"
+
+DEFAULT_CACHE_DIR = "cache/exports"
+DEFAULT_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+RENDERED_DOCUMENTS_KEPT = 32
+
+MARKDOWN_EXTRAS = ['fenced-code-blocks', 'tables', 'cuddled-lists']
+
+# HTML styling
+HTML_FONT_FAMILY = "Arial, sans-serif"
+HTML_MAX_WIDTH = "800px"
+HTML_LINE_HEIGHT = "1.6"
+
+# PDF page size
+PDF_PAGE_SIZE = "A4"
+PDF_MARGIN = "2cm"
+
+# DOCX styles
+DOCX_CODE_FONT = "Courier New"
+DOCX_CODE_SIZE = Pt(9)
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+@page {{ size: {page_size}; margin: {page_margin}; }}
+body {{ font-family: {font_family}; max-width: {max_width}; margin: 0 auto; line-height: {line_height}; color: #222; }}
+pre {{ background-color: #f5f5f5; padding: 8px; font-family: Courier, monospace; font-size: 9pt; }}
+code {{ font-family: Courier, monospace; }}
+blockquote {{ color: #555; border-left: 3px solid #ccc; padding-left: 12px; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def content_hash(markdown: str, title: Optional[str]) -> str:
+    material = json.dumps([EXPORT_VERSION, title or '', markdown])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class RenderedDocument:
+    """One post parsed once: HTML body, styled page and the body's element tree."""
+
+    def __init__(self, markdown: str, title: Optional[str] = None):
+        self.markdown = markdown
+        self.title = title or "Generated Content"
+        self.key = content_hash(markdown, title)
+        self.body = markdown2.markdown(markdown, extras=MARKDOWN_EXTRAS)
+        self.html = HTML_TEMPLATE.format(
+            title=html.escape(self.title),
+            body=self.body,
+            page_size=PDF_PAGE_SIZE,
+            page_margin=PDF_MARGIN,
+            font_family=HTML_FONT_FAMILY,
+            max_width=HTML_MAX_WIDTH,
+            line_height=HTML_LINE_HEIGHT
+        )
+        self.tree = lxml.html.fragment_fromstring(self.body or '<p></p>', create_parent='div')
+
+
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+def render_document(markdown: str, title: Optional[str] = None) -> RenderedDocument:
+    """Parsed form of a post, shared by every export of the same content."""
+    key = content_hash(markdown, title)
+    with _documents_lock:
+        doc = _documents.get(key)
+        if doc is not None:
+            _documents.move_to_end(key)
+            return doc
+
+    doc = RenderedDocument(markdown, title)
+    with _documents_lock:
+        _documents[key] = doc
+        while len(_documents) > RENDERED_DOCUMENTS_KEPT:
+            _documents.popitem(last=False)
+    return doc
+
+
+def write_markdown(doc: RenderedDocument, path: Path):
+    path.write_text(doc.markdown, encoding='utf-8')
+
+
+def write_html(doc: RenderedDocument, path: Path):
+    path.write_text(doc.html, encoding='utf-8')
+
+
+def write_pdf(doc: RenderedDocument, path: Path):
+    with open(path, 'wb') as f:
+        result = pisa.CreatePDF(doc.html, dest=f, encoding='utf-8')
+    if result.err:
+        raise RuntimeError(f"PDF rendering failed with {result.err} error(s)")
+
+
+def _add_runs(paragraph, element, bold: bool = False, italic: bool = False, code: bool = False):
+    """Inline content of ``element`` as python-docx runs (nested lists excluded)."""
+
+    def add(text: str, bold: bool, italic: bool, code: bool):
+        if not code:
+            text = re.sub(r'\s+', ' ', text)
+        if not text:
+            return
+        run = paragraph.add_run(text)
+        run.bold = bold or None
+        run.italic = italic or None
+        if code:
+            run.font.name = DOCX_CODE_FONT
+
+    if element.text:
+        add(element.text, bold, italic, code)
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in ('ul', 'ol'):
+            if child.tag == 'br':
+                paragraph.add_run().add_break()
+            else:
+                _add_runs(paragraph, child,
+                          bold or child.tag in ('strong', 'b'),
+                          italic or child.tag in ('em', 'i'),
+                          code or child.tag == 'code')
+        if child.tail:
+            add(child.tail, bold, italic, code)
+
+
+def _add_list(document, element, level: int = 1):
+    style = 'List Bullet' if element.tag == 'ul' else 'List Number'
+    if level > 1:
+        style = f"{style} {min(level, 3)}"
+    for item in element.iterchildren('li'):
+        _add_runs(document.add_paragraph(style=style), item)
+        for nested in item.iterchildren('ul', 'ol'):
+            _add_list(document, nested, level + 1)
+
+
+def _add_blocks(document, parent, style: Optional[str] = None):
+    for element in parent:
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+        if re.fullmatch(r'h[1-6]', tag):
+            document.add_heading(re.sub(r'\s+', ' ', element.text_content()).strip(), level=int(tag[1]))
+        elif tag in ('ul', 'ol'):
+            _add_list(document, element)
+        elif tag == 'pre' or 'codehilite' in element.get('class', ''):
+            run = document.add_paragraph().add_run(element.text_content().strip('\n'))
+            run.font.name = DOCX_CODE_FONT
+            run.font.size = DOCX_CODE_SIZE
+        elif tag == 'blockquote':
+            _add_blocks(document, element, style='Quote')
+        elif tag == 'table':
+            rows = element.xpath('.//tr')
+            width = max((len(row.xpath('./th|./td')) for row in rows), default=0)
+            if not width:
+                continue
+            table = document.add_table(rows=len(rows), cols=width)
+            table.style = 'Table Grid'
+            for r, row in enumerate(rows):
+                for c, cell in enumerate(row.xpath('./th|./td')):
+                    _add_runs(table.cell(r, c).paragraphs[0], cell, bold=cell.tag == 'th')
+        elif tag == 'hr':
+            continue
+        elif tag == 'div':
+            _add_blocks(document, element, style)
+        else:
+            _add_runs(document.add_paragraph(style=style), element)
+
+
+def write_docx(doc: RenderedDocument, path: Path):
+    document = Document()
+    document.core_properties.title = doc.title
+    _add_blocks(document, doc.tree)
+    document.save(str(path))
+
+
+RENDERERS: Dict[str, Callable[[RenderedDocument, Path], None]] = {
+    'md': write_markdown,
+    'html': write_html,
+    'pdf': write_pdf,
+    'docx': write_docx,
+}
+
+
+def _cache_dir() -> Optional[Path]:
+    directory = os.getenv('EXPORT_CACHE_DIR', DEFAULT_CACHE_DIR)
+    if not directory:
+        return None
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+_evict_lock = threading.Lock()
+
+
+def evict_export_cache(max_age_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                       keep: Optional[Path] = None) -> int:
+    """Remove cached files older than ``max_age_seconds``, then the least
+    recently used ones until the cache fits in ``max_bytes`` (``keep`` is
+    never removed). Returns the number of files removed."""
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return 0
+    if max_age_seconds is None:
+        max_age_seconds = float(os.getenv('EXPORT_CACHE_MAX_AGE', DEFAULT_CACHE_MAX_AGE))
+    if max_bytes is None:
+        max_bytes = int(os.getenv('EXPORT_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES))
+
+    with _evict_lock:
+        now = time.time()
+        files = []
+        for path in cache_dir.iterdir():
+            try:
+                if path.is_file() and not path.name.endswith('.tmp') and path != keep:
+                    files.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+
+        removed = 0
+        kept = []
+        for path, stat in files:
+            if now - stat.st_mtime > max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept.append((path, stat))
+
+        total = sum(stat.st_size for _, stat in kept)
+        if keep is not None and keep.exists():
+            total += keep.stat().st_size
+        for path, stat in sorted(kept, key=lambda item: max(item[1].st_atime, item[1].st_mtime)):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            removed += 1
+            total -= stat.st_size
+    return removed
+
+
+def render_to_cache(doc: RenderedDocument, fmt: str) -> Path:
+    """Rendered ``fmt`` file for ``doc`` in the export cache, rendering it on a miss."""
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        raise RuntimeError("Export cache is disabled (EXPORT_CACHE_DIR is empty)")
+    cached = cache_dir / f"{doc.key}.{fmt}"
+    if not cached.exists():
+        # Render under a private name so concurrent exports never see a partial file
+        partial = cached.with_name(f"{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            RENDERERS[fmt](doc, partial)
+            os.replace(partial, cached)
+        finally:
+            partial.unlink(missing_ok=True)
+        evict_export_cache(keep=cached)
+    return cached
+
+
+def export_to_paths(markdown: str, targets: Dict[str, str], title: Optional[str] = None) -> Dict[str, str]:
+    """Write ``markdown`` to each ``{format: path}`` in ``targets`` from one parse."""
+    unsupported = [fmt for fmt in targets if fmt not in RENDERERS]
+    if unsupported:
+        raise ValueError(f"Unsupported format(s): {', '.join(unsupported)}")
+
+    doc = render_document(markdown, title)
+    use_cache = _cache_dir() is not None
+
+    def export(fmt: str) -> str:
+        dest = Path(targets[fmt])
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if use_cache:
+            try:
+                shutil.copyfile(render_to_cache(doc, fmt), dest)
+                return str(dest)
+            except FileNotFoundError:
+                # Evicted by another export between the lookup and the copy
+                pass
+        RENDERERS[fmt](doc, dest)
+        return str(dest)
+
+    formats = list(targets)
+    workers = min(len(formats), int(os.getenv('EXPORT_CONCURRENCY', DEFAULT_CONCURRENCY)))
+    if workers <= 1:
+        return {fmt: export(fmt) for fmt in formats}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export') as executor:
+        return dict(zip(formats, executor.map(export, formats)))
+
+
+def export_formats(markdown: str, formats: Iterable[str], output_dir: str,
+                   title: Optional[str] = None, basename: str = "output") -> Dict[str, str]:
+    """Export one post in several formats as ``<output_dir>/<basename>.<format>``."""
+    formats = list(dict.fromkeys(formats))
+    return export_to_paths(markdown, {fmt: str(Path(output_dir) / f"{basename}.{fmt}") for fmt in formats},
+                           title)
+
+
+def export_format(markdown: str, fmt: str, output_path: str, title: Optional[str] = None) -> str:
+    """Single-format export with ``convert_to_format``'s signature."""
+    return export_to_paths(markdown, {fmt: output_path}, title)[fmt]
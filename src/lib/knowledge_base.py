@@ -0,0 +1,302 @@
+"""Persistent knowledge base of facts and fact-checked claims across runs.
+
+Every ``ResearchOutput`` used to be thrown away once the run was logged.
+``KnowledgeBase`` accumulates research facts (attributed to the source they
+most likely came from) and draft claims with their fact-check verdicts in a
+single SQLite file, with a compact on-disk inverted index
+(``term -> fact``) scored with BM25. That lets:
+
+* the Researcher serve a PRD from stored facts when enough of them match,
+  skipping topic extraction and web search (``research_from_knowledge``);
+* the Fact-Checker skip claims it has already verified (``claim_verdict``).
+
+Verdicts: ``sourced`` (a research fact), ``verified`` (a claim that passed a
+fact-check) and ``disputed`` (a claim flagged by one). Only ``sourced`` facts
+seen within ``KNOWLEDGE_MAX_AGE`` are served back as research: verified
+claims are the model's own prose, so they only let the Fact-Checker skip
+work and never stand in for web research.
+
+Configuration (environment variables):
+    KNOWLEDGE_BASE_ENABLED  "false" disables the knowledge base (default: true)
+    KNOWLEDGE_BASE_PATH     SQLite file (default: cache/knowledge_base.sqlite)
+    KNOWLEDGE_MIN_FACTS     Matching facts needed to skip web research (default: 8)
+    KNOWLEDGE_MAX_FACTS     Facts served per PRD (default: 20)
+    KNOWLEDGE_MAX_AGE       Seconds a research fact stays servable after it was
+                            last seen, 0 for no limit (default: 2592000, 30 days)
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
+
+from .retrieval import BM25Index, source_text, tokenize
+from .serialization import load_output
+
+if TYPE_CHECKING:
+    from .types import PRDInput, ResearchOutput
+
+DEFAULT_PATH = "cache/knowledge_base.sqlite"
+DEFAULT_MIN_FACTS = 8
+DEFAULT_MAX_FACTS = 20
+DEFAULT_MAX_AGE = 30 * 86400
+
+# A stored fact only counts towards serving a PRD if it shares this many terms with it
+MIN_TERM_MATCHES = 2
+
+K1 = 1.5
+B = 0.75
+
+
+def fact_hash(text: str) -> str:
+    normalized = re.sub(r'\s+', ' ', re.sub(r'\[\d+\]', '', text.lower())).strip(' .')
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class KnowledgeBase:
+    """SQLite store of facts and claims with a BM25-scored inverted index."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS facts (
+                    id INTEGER PRIMARY KEY,
+                    hash TEXT UNIQUE NOT NULL,
+                    text TEXT NOT NULL,
+                    verdict TEXT NOT NULL,
+                    source_title TEXT,
+                    source_url TEXT,
+                    source_snippet TEXT,
+                    length INTEGER NOT NULL,
+                    run_id TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    fact_id INTEGER NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, fact_id)
+                ) WITHOUT ROWID
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(str(self.path), timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def _upsert(self, conn: sqlite3.Connection, text: str, verdict: str, run_id: str,
+                source=None, overwrite_verdict: bool = False):
+        now = time.time()
+        key = fact_hash(text)
+        row = conn.execute("SELECT id, verdict FROM facts WHERE hash = ?", (key,)).fetchone()
+        if row is not None:
+            fact_id, current = row
+            # Research re-sighting a fact never downgrades a fact-check verdict,
+            # and a passing fact-check never turns a research fact into a mere claim
+            if overwrite_verdict:
+                new_verdict = current if verdict == 'verified' and current == 'sourced' else verdict
+            else:
+                new_verdict = verdict if current == 'sourced' else current
+            conn.execute("UPDATE facts SET verdict = ?, updated_at = ? WHERE id = ?",
+                         (new_verdict, now, fact_id))
+            return
+
+        title = getattr(source, 'title', None) if source is not None else None
+        terms = Counter(tokenize(f"{text} {title or ''}"))
+        cursor = conn.execute(
+            "INSERT INTO facts (hash, text, verdict, source_title, source_url, source_snippet, "
+            "length, run_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, text, verdict, title,
+             getattr(source, 'url', None) if source is not None else None,
+             getattr(source, 'snippet', None) if source is not None else None,
+             sum(terms.values()), run_id, now, now)
+        )
+        conn.executemany(
+            "INSERT INTO postings (term, fact_id, tf) VALUES (?, ?, ?)",
+            [(term, cursor.lastrowid, tf) for term, tf in terms.items()]
+        )
+
+    def add_research(self, research: 'ResearchOutput', run_id: str) -> int:
+        """Store a run's facts, each attributed to its best-matching source."""
+        facts = research.facts or []
+        sources = list(research.sources or [])
+        index = BM25Index([source_text(s) for s in sources])
+        with self._connect() as conn:
+            for fact in facts:
+                best = index.top_k(fact, 1)
+                self._upsert(conn, fact, 'sourced', run_id, sources[best[0]] if best else None)
+        return len(facts)
+
+    def record_claims(self, claims: List[str], verdict: str, run_id: str):
+        """Record fact-check verdicts (``verified`` or ``disputed``) for draft claims."""
+        with self._connect() as conn:
+            for claim in claims:
+                self._upsert(conn, claim, verdict, run_id, overwrite_verdict=True)
+
+    def claim_verdict(self, claim: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT verdict FROM facts WHERE hash = ?", (fact_hash(claim),)).fetchone()
+        return row[0] if row else None
+
+    def search(self, query: str, limit: int = 10, min_matches: int = 1,
+               include_disputed: bool = False, verdicts: Optional[Iterable[str]] = None,
+               max_age: Optional[float] = None) -> List[dict]:
+        """Facts ranked by BM25 against ``query`` (best first).
+
+        ``verdicts`` restricts results to those verdicts (otherwise everything
+        but ``disputed``, unless ``include_disputed``); ``max_age`` drops facts
+        not seen in that many seconds.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ','.join('?' * len(terms))
+        conditions, params = [f"p.term IN ({placeholders})"], list(terms)
+        if verdicts:
+            verdicts = list(verdicts)
+            conditions.append(f"f.verdict IN ({','.join('?' * len(verdicts))})")
+            params.extend(verdicts)
+        elif not include_disputed:
+            conditions.append("f.verdict != 'disputed'")
+        if max_age:
+            conditions.append("f.updated_at >= ?")
+            params.append(time.time() - max_age)
+
+        with self._connect() as conn:
+            total, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM facts").fetchone()
+            if not total:
+                return []
+            avg_length = total_length / total
+            doc_freq = dict(conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term", terms
+            ).fetchall())
+            postings = conn.execute(
+                "SELECT p.term, p.tf, f.id, f.length, f.text, f.verdict, f.source_title, f.source_url, "
+                "f.source_snippet, f.run_id, f.created_at FROM postings p JOIN facts f ON f.id = p.fact_id "
+                f"WHERE {' AND '.join(conditions)}", params
+            ).fetchall()
+
+        scores = {}
+        matches = Counter()
+        facts = {}
+        for term, tf, fact_id, length, *fact in postings:
+            idf = math.log(1 + (total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = 1 - B + B * length / (avg_length or 1)
+            scores[fact_id] = scores.get(fact_id, 0.0) + idf * tf * (K1 + 1) / (tf + K1 * norm)
+            matches[fact_id] += 1
+            facts[fact_id] = fact
+
+        ranked = sorted((i for i in scores if matches[i] >= min_matches), key=lambda i: (-scores[i], i))
+        results = []
+        for fact_id in ranked[:limit]:
+            text, verdict, title, url, snippet, run_id, created_at = facts[fact_id]
+            results.append({
+                'id': fact_id, 'text': text, 'verdict': verdict,
+                'source': {'title': title, 'url': url, 'snippet': snippet} if title else None,
+                'run_id': run_id, 'created_at': created_at, 'score': round(scores[fact_id], 4),
+            })
+        return results
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            verdicts = dict(conn.execute("SELECT verdict, COUNT(*) FROM facts GROUP BY verdict").fetchall())
+            terms = conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {'facts': sum(verdicts.values()), 'verdicts': verdicts, 'terms': terms,
+                'size_bytes': self.path.stat().st_size if self.path.exists() else 0}
+
+    def delete(self, fact_id: int) -> bool:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM postings WHERE fact_id = ?", (fact_id,))
+            return conn.execute("DELETE FROM facts WHERE id = ?", (fact_id,)).rowcount > 0
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+
+_default_kb = None
+_default_kb_lock = threading.Lock()
+
+
+def get_knowledge_base() -> Optional[KnowledgeBase]:
+    """Process-wide knowledge base configured from the environment (None if disabled)."""
+    global _default_kb
+
+    if os.getenv('KNOWLEDGE_BASE_ENABLED', 'true').lower() == 'false':
+        return None
+
+    with _default_kb_lock:
+        if _default_kb is None:
+            _default_kb = KnowledgeBase(path=os.getenv('KNOWLEDGE_BASE_PATH', DEFAULT_PATH))
+    return _default_kb
+
+
+def research_from_knowledge(prd: 'PRDInput', kb: KnowledgeBase,
+                            output_type: Optional[type] = None) -> Optional['ResearchOutput']:
+    """Build research for a PRD from fresh sourced facts, or None if too few match.
+
+    ``output_type`` is the research model to build (default: ``ResearchOutput``).
+    """
+    min_facts = int(os.getenv('KNOWLEDGE_MIN_FACTS', DEFAULT_MIN_FACTS))
+    max_facts = int(os.getenv('KNOWLEDGE_MAX_FACTS', DEFAULT_MAX_FACTS))
+    max_age = float(os.getenv('KNOWLEDGE_MAX_AGE', DEFAULT_MAX_AGE))
+
+    facts = kb.search(f"{prd.title or ''}\n{prd.text}", limit=max_facts, min_matches=MIN_TERM_MATCHES,
+                      verdicts=('sourced',), max_age=max_age)
+    if len(facts) < max(min_facts, 1):
+        return None
+
+    sources = []
+    seen = set()
+    for fact in facts:
+        source = fact['source']
+        if source and (source['title'], source['url']) not in seen:
+            seen.add((source['title'], source['url']))
+            sources.append({'title': source['title'], 'url': source['url'] or '',
+                            'snippet': source['snippet'] or '', 'relevance': fact['score']})
+
+    if output_type is None:
+        from .types import ResearchOutput
+        output_type = ResearchOutput
+
+    return load_output(output_type, {
+        'sources': sources,
+        'facts': [fact['text'] for fact in facts],
+        'success': True,
+    })
+
+
+def run_researcher_with_knowledge(prd: 'PRDInput', run_id: str,
+                                  kb: Optional[KnowledgeBase] = None) -> 'ResearchOutput':
+    """run_researcher that answers from the knowledge base when it can and feeds it otherwise."""
+    from .agents.researcher import run_researcher
+
+    kb = kb if kb is not None else get_knowledge_base()
+    if kb is None:
+        return run_researcher(prd, run_id)
+
+    research = research_from_knowledge(prd, kb)
+    if research is not None:
+        print(f"[KnowledgeBase] Served run {run_id} from {len(research.facts)} stored facts")
+        return research
+
+    research = run_researcher(prd, run_id)
+    if research.success:
+        kb.add_research(research, run_id)
+    return research
@@ -0,0 +1,362 @@
+"""Asynchronous, batched structured log writer with a content-addressed blob store.
+
+``logger.save_pipeline_result`` and the per-agent run logs write and flush
+files synchronously on the caller's thread, and every record carries its
+full payload (drafts, the final post), so the logs grow by the size of each
+post several times over. ``LogWriter`` moves all of that off the request
+path:
+
+* ``write`` only enqueues the record; a background thread drains the queue
+  in batches (whatever has arrived, up to ``LOG_BATCH_SIZE`` records),
+  appends them to ``<LOG_DIR>/events.<pid>.jsonl`` and fsyncs once per
+  batch. Each process (uvicorn and Celery workers share ``LOG_DIR``) writes
+  and rotates its own file, so no process keeps appending to a file another
+  one has rotated away;
+* string fields larger than ``LOG_BLOB_THRESHOLD`` bytes are moved to
+  ``BlobStore``, gzip-compressed files named by their SHA-256, and the
+  record keeps ``{"blob": "<sha256>", "bytes": n}`` instead. Identical
+  payloads (an unchanged draft across retries, a cached result) are stored
+  once;
+* the events file is rotated to ``events-<timestamp>-<pid>.jsonl`` once it
+  exceeds ``LOG_ROTATE_BYTES`` or is older than ``LOG_ROTATE_SECONDS``; the
+  files left behind by processes that have exited are rotated when the next
+  writer starts. After each rotation only the newest ``LOG_KEEP_FILES``
+  rotated files no older than ``LOG_RETENTION_SECONDS`` are kept, and blobs
+  no longer referenced by a kept or live file are removed (a blob's mtime is
+  refreshed each time a record references it);
+* ``pipeline_result`` records are added to the ``RunIndex`` in the same
+  batch, so run history is queryable without scanning the logs.
+
+``log_pipeline_result`` is the non-blocking counterpart of
+``save_pipeline_result``; ``log_agent_output`` records one agent call.
+
+Configuration (environment variables):
+    LOG_TO_FILE          "false" drops records instead of writing them (default: true)
+    LOG_DIR              Directory for events and blobs (default: logs)
+    LOG_BATCH_SIZE       Most records written per fsync (default: 256)
+    LOG_BLOB_THRESHOLD   Strings larger than this many bytes become blobs (default: 2048)
+    LOG_ROTATE_BYTES     Rotate the events file past this size (default: 67108864)
+    LOG_ROTATE_SECONDS   Rotate the events file after this long (default: 86400)
+    LOG_QUEUE_SIZE       Records buffered before ``write`` blocks (default: 10000)
+    LOG_KEEP_FILES       Rotated events files kept, 0 for no limit (default: 30)
+    LOG_RETENTION_SECONDS  Delete rotated files and blobs older than this, 0 to keep them
+                         (default: 2592000)
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from .run_index import RunIndex, get_run_index
+from .serialization import dump_output
+
+DEFAULT_LOG_DIR = "logs"
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BLOB_THRESHOLD = 2048
+DEFAULT_ROTATE_BYTES = 64 * 1024 * 1024
+DEFAULT_ROTATE_SECONDS = 24 * 60 * 60
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_KEEP_FILES = 30
+DEFAULT_RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+LIVE_EVENTS_GLOB = "events.*.jsonl"
+ROTATED_EVENTS_GLOB = "events-*.jsonl"
+
+
+class BlobStore:
+    """Gzip-compressed payloads stored once under their SHA-256."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.gz"
+
+    def put(self, data: bytes, sync: bool = True) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            # Mark the blob as referenced again so retention keeps it
+            os.utime(path)
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(partial, 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=6, mtime=0))
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(partial, path)
+        return digest
+
+    def prune(self, before: float) -> int:
+        """Delete blobs last referenced before ``before`` (a timestamp); returns how many."""
+        removed = 0
+        for path in self.directory.glob('*/*.gz'):
+            try:
+                if path.stat().st_mtime < before:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def get(self, digest: str) -> bytes:
+        return gzip.decompress(self.path(digest).read_bytes())
+
+    def get_text(self, digest: str) -> str:
+        return self.get(digest).decode('utf-8')
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, 'model_dump') or hasattr(value, '__dataclass_fields__'):
+        return dump_output(value)
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+_STOP = object()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by another user
+    return True
+
+
+class LogWriter:
+    """Background writer: queued records, one fsync per batch, rotation and blobs."""
+
+    def __init__(self, directory: Optional[str] = None, batch_size: Optional[int] = None,
+                 blob_threshold: Optional[int] = None, rotate_bytes: Optional[int] = None,
+                 rotate_seconds: Optional[float] = None, queue_size: Optional[int] = None,
+                 keep_files: Optional[int] = None, retention_seconds: Optional[float] = None,
+                 sync: bool = True, index: Optional[RunIndex] = None):
+        self.directory = Path(directory or os.getenv('LOG_DIR', DEFAULT_LOG_DIR))
+        self.batch_size = batch_size or int(os.getenv('LOG_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+        self.blob_threshold = blob_threshold or int(os.getenv('LOG_BLOB_THRESHOLD', DEFAULT_BLOB_THRESHOLD))
+        self.rotate_bytes = rotate_bytes or int(os.getenv('LOG_ROTATE_BYTES', DEFAULT_ROTATE_BYTES))
+        self.rotate_seconds = rotate_seconds or float(os.getenv('LOG_ROTATE_SECONDS', DEFAULT_ROTATE_SECONDS))
+        # 0 disables a limit, so these can't fall back with ``or``
+        self.keep_files = keep_files if keep_files is not None else \
+            int(os.getenv('LOG_KEEP_FILES', DEFAULT_KEEP_FILES))
+        self.retention_seconds = retention_seconds if retention_seconds is not None else \
+            float(os.getenv('LOG_RETENTION_SECONDS', DEFAULT_RETENTION_SECONDS))
+        self.sync = sync
+        self.index = index
+        self.blobs = BlobStore(str(self.directory / "blobs"))
+        self.pid = os.getpid()
+        self.events_path = self.directory / f"events.{self.pid}.jsonl"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._adopt_orphans()
+
+        self._queue = queue.Queue(maxsize=queue_size or int(os.getenv('LOG_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)))
+        self._file = None
+        self._opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict):
+        """Queue a record; returns immediately unless the queue is full."""
+        self._queue.put(dict(record, ts=record.get('ts') or time.time()))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record queued so far is written and synced.
+
+        Returns False if ``timeout`` passes first or the writer thread has died.
+        """
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(0.1):
+            if not self._thread.is_alive():
+                return done.is_set()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _externalize(self, value: Any) -> Any:
+        if isinstance(value, str) and len(value) > self.blob_threshold:
+            data = value.encode('utf-8')
+            if len(data) > self.blob_threshold:
+                return {'blob': self.blobs.put(data, sync=self.sync), 'bytes': len(data)}
+        if isinstance(value, dict):
+            return {key: self._externalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(item) for item in value]
+        return value
+
+    @staticmethod
+    def _started_at(path: Path) -> float:
+        """Timestamp of the first record in an events file (it may predate this process)."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                return float(json.loads(f.readline()).get('ts') or time.time())
+        except (OSError, ValueError, AttributeError):
+            return time.time()
+
+    def _open(self):
+        if self._file is None:
+            self._opened_at = self._started_at(self.events_path)
+            self._file = open(self.events_path, 'a', encoding='utf-8')
+        return self._file
+
+    @staticmethod
+    def _rotated_name(pid: int) -> str:
+        return f"events-{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}-{pid}.jsonl"
+
+    def _adopt_orphans(self):
+        """Rotate the live files of processes that exited without closing their writer."""
+        for path in self.directory.glob(LIVE_EVENTS_GLOB):
+            try:
+                pid = int(path.name.split('.')[1])
+            except ValueError:
+                continue
+            if pid == self.pid or _pid_alive(pid):
+                continue
+            try:
+                if path.stat().st_size:
+                    os.replace(path, self.directory / self._rotated_name(pid))
+                else:
+                    path.unlink()
+            except OSError:
+                pass  # another writer adopted it first
+
+    def _rotate_if_needed(self):
+        if self._file is None:
+            return
+        too_big = self._file.tell() >= self.rotate_bytes
+        too_old = time.time() - self._opened_at >= self.rotate_seconds
+        if not (too_big or too_old) or not self._file.tell():
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.events_path, self.directory / self._rotated_name(self.pid))
+        self._prune()
+
+    def _prune(self):
+        """Apply LOG_KEEP_FILES / LOG_RETENTION_SECONDS to rotated files, then drop orphaned blobs."""
+        rotated = sorted(self.directory.glob(ROTATED_EVENTS_GLOB))  # oldest first
+        expired = rotated[:-self.keep_files] if self.keep_files > 0 else []
+        if self.retention_seconds > 0:
+            cutoff = time.time() - self.retention_seconds
+            expired += [path for path in rotated[len(expired):] if path.stat().st_mtime < cutoff]
+        if not expired:
+            return
+        for path in expired:
+            path.unlink(missing_ok=True)
+
+        # Every blob a kept record references was put (or touched) after that
+        # record's timestamp, so anything older than the oldest kept or live
+        # record (other processes' files included) is orphaned
+        kept = [path for path in rotated if path not in expired]
+        live = list(self.directory.glob(LIVE_EVENTS_GLOB))
+        oldest = min([self._started_at(path) for path in kept[:1] + live], default=time.time())
+        self.blobs.prune(before=oldest)
+
+    def _write_batch(self, records: list):
+        lines = []
+        for record in records:
+            try:
+                lines.append(json.dumps(self._externalize(_jsonable(record)), default=str))
+            except Exception as e:
+                print(f"[LogWriter] Dropped unserializable record: {str(e)}")
+        if not lines:
+            return
+        f = self._open()
+        f.write('\n'.join(lines) + '\n')
+        f.flush()
+        if self.sync:
+            os.fsync(f.fileno())
+        self._rotate_if_needed()
+
+        results = [record for record in records if record.get('event') == 'pipeline_result']
+        if self.index is not None and results:
+            try:
+                self.index.record(results)
+            except Exception as e:
+                print(f"[LogWriter] Failed to index {len(results)} runs: {str(e)}")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in batch if isinstance(item, dict)]
+            try:
+                self._write_batch(records)
+            except Exception as e:
+                print(f"[LogWriter] Failed to write {len(records)} records: {str(e)}")
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in batch):
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> Optional[LogWriter]:
+    """Process-wide log writer (None when LOG_TO_FILE is false)."""
+    global _default_writer
+
+    if os.getenv('LOG_TO_FILE', 'true').lower() == 'false':
+        return None
+
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = LogWriter(index=get_run_index())
+            atexit.register(_default_writer.close)
+    return _default_writer
+
+
+def log_event(event: str, run_id: Optional[str] = None, **fields):
+    writer = get_log_writer()
+    if writer is not None:
+        writer.write({'event': event, 'run_id': run_id, **fields})
+
+
+def log_agent_output(run_id: str, agent: str, output: Any, duration: float, attempt: int = 0):
+    """Record one agent call; large text fields of ``output`` go to the blob store."""
+    log_event('agent', run_id, agent=agent, attempt=attempt,
+              duration_seconds=round(duration, 3), output=output)
+
+
+def log_pipeline_result(result: dict):
+    """Non-blocking ``save_pipeline_result``: the final content is stored as a blob."""
+    log_event('pipeline_result', result.get('run_id'), **{k: v for k, v in result.items() if k != 'run_id'})
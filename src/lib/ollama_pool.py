@@ -0,0 +1,332 @@
+"""Pooled, keep-alive HTTP client for one or more Ollama hosts.
+
+Every generation used to pay for a fresh TCP connection to ``OLLAMA_HOST``.
+``OllamaPool`` keeps idle HTTP/1.1 connections per host and reuses them,
+bounds the number of requests in flight with a semaphore, and spreads
+requests across several Ollama hosts (least busy host first) so one slow
+generation does not hold up every other job behind it.
+
+Idle connections the server has closed are dropped before reuse. If a
+reused connection still fails, the request is retried once on a new
+connection only when that cannot run it twice: ``GET``/``HEAD``, or a
+request that was never sent. A generation is not replayed once any of it
+may have reached the server.
+
+Streaming: when a token sink is installed with ``token_sink.set(callback)``
+(the API does this for the Writer and Style-Polisher stages), ``generate``
+switches to Ollama's streaming mode and passes each token to the callback
+as it arrives, while still returning the complete reply to the caller.
+
+Every ``generate`` call is an ``llm`` span (see ``tracing``) carrying its
+prompt and completion token counts, tokens/sec and time to first token.
+
+Configuration (environment variables):
+    OLLAMA_HOST             Single Ollama server (default: http://localhost:11434)
+    OLLAMA_HOSTS            Comma-separated list of servers; overrides OLLAMA_HOST
+    OLLAMA_MODEL            Model name (default: phi3)
+    OLLAMA_MAX_CONCURRENCY  Requests in flight across all hosts (default: 4)
+    OLLAMA_TIMEOUT          Per-request timeout in seconds (default: 300)
+    OLLAMA_KEEP_ALIVE       How long Ollama keeps the model loaded after a call (default: 30m)
+"""
+
+import contextvars
+import http.client
+import json
+import os
+import select
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import tracing
+
+DEFAULT_HOST = "http://localhost:11434"
+DEFAULT_MODEL = "phi3"
+DEFAULT_KEEP_ALIVE = "30m"
+
+# Errors that mean a pooled keep-alive connection went stale
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+# Safe to send again after a failure, whatever the server did with the first try
+_IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+# Receives each generated token while set; see module docstring
+token_sink: contextvars.ContextVar[Optional[Callable[[str], None]]] = \
+    contextvars.ContextVar('token_sink', default=None)
+
+
+class OllamaError(Exception):
+    """Raised when Ollama returns an error response."""
+
+
+def _is_open(conn: http.client.HTTPConnection) -> bool:
+    """False if the server closed an idle connection (its socket reads EOF)."""
+    if conn.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    # An idle HTTP/1.1 connection has nothing to read unless it was closed
+    return not readable
+
+
+def _can_retry(method: str, reused: bool, error: Exception) -> bool:
+    """Whether a request that failed with a stale-connection error may be sent again."""
+    if not reused:
+        return False
+    return method in _IDEMPOTENT_METHODS or isinstance(error, http.client.CannotSendRequest)
+
+
+class _HostPool:
+    """Idle keep-alive connections and in-flight count for one host."""
+
+    def __init__(self, url: str, timeout: float):
+        parsed = urlparse(url if '://' in url else f"http://{url}")
+        self.url = url
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        self.timeout = timeout
+        self.in_flight = 0
+        self.requests = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        conn_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return conn_class(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """A connection and whether it is a reused idle one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn = self._idle.pop()
+            if _is_open(conn):
+                return conn, True
+            conn.close()
+        return self._new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            self._idle.append(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+
+
+class OllamaPool:
+    """Thread-safe Ollama client with connection reuse and bounded concurrency."""
+
+    def __init__(self, hosts: Optional[List[str]] = None, model: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        if hosts is None:
+            hosts_env = os.getenv('OLLAMA_HOSTS')
+            hosts = hosts_env.split(',') if hosts_env else [os.getenv('OLLAMA_HOST', DEFAULT_HOST)]
+
+        timeout = timeout or float(os.getenv('OLLAMA_TIMEOUT', 300))
+        self.model = model or os.getenv('OLLAMA_MODEL', DEFAULT_MODEL)
+        self.max_concurrency = max_concurrency or int(os.getenv('OLLAMA_MAX_CONCURRENCY', 4))
+        # Keep the model (and its cached prompt prefix) loaded between calls
+        self.keep_alive = os.getenv('OLLAMA_KEEP_ALIVE', DEFAULT_KEEP_ALIVE)
+        self.hosts = [_HostPool(h.strip(), timeout) for h in hosts if h.strip()]
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        # Reentrant so _pick_host can select through least_busy_host
+        self._lock = threading.RLock()
+
+        if not self.hosts:
+            raise ValueError("OllamaPool needs at least one host")
+
+    def least_busy_host(self) -> _HostPool:
+        """Least busy host; ties go to the one that has served the fewest requests."""
+        with self._lock:
+            return min(self.hosts, key=lambda h: (h.in_flight, h.requests))
+
+    def _pick_host(self, host: Optional[_HostPool] = None) -> _HostPool:
+        with self._lock:
+            host = host or self.least_busy_host()
+            host.in_flight += 1
+            host.requests += 1
+            return host
+
+    def _release_host(self, host: _HostPool):
+        with self._lock:
+            host.in_flight -= 1
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None,
+                host: Optional[_HostPool] = None) -> dict:
+        """Send one JSON request over a pooled connection and return the JSON reply."""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+        with self._semaphore:
+            target = self._pick_host(host)
+            try:
+                # One retry covers a keep-alive connection the server already
+                # closed, when sending the request again is safe
+                for attempt in range(2):
+                    conn, reused = target.acquire()
+                    try:
+                        conn.request(method, path, body=body, headers=headers)
+                        response = conn.getresponse()
+                        data = response.read()
+                    except _STALE_CONNECTION_ERRORS as e:
+                        conn.close()
+                        if attempt == 1 or not _can_retry(method, reused, e):
+                            raise
+                        continue
+                    except Exception:
+                        conn.close()
+                        raise
+
+                    if response.will_close:
+                        conn.close()
+                    else:
+                        target.release(conn)
+
+                    if response.status >= 400:
+                        raise OllamaError(f"[Ollama] {target.url}{path} returned "
+                                          f"{response.status}: {data[:200]!r}")
+                    return json.loads(data) if data else {}
+            finally:
+                self._release_host(target)
+
+    def stream(self, method: str, path: str, payload: dict,
+               host: Optional[_HostPool] = None) -> Iterator[dict]:
+        """Send a streaming request and yield each NDJSON chunk as it arrives."""
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+        with self._semaphore:
+            target = self._pick_host(host)
+            conn, reused = target.acquire()
+            try:
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                except _STALE_CONNECTION_ERRORS as e:
+                    conn.close()
+                    if not _can_retry(method, reused, e):
+                        raise
+                    conn = target._new_connection()
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+
+                if response.status >= 400:
+                    data = response.read()
+                    raise OllamaError(f"[Ollama] {target.url}{path} returned "
+                                      f"{response.status}: {data[:200]!r}")
+
+                for line in iter(response.readline, b''):
+                    if line.strip():
+                        yield json.loads(line)
+
+                if response.will_close:
+                    conn.close()
+                else:
+                    target.release(conn)
+            except BaseException:
+                # Also covers the consumer abandoning the generator mid-stream
+                conn.close()
+                raise
+            finally:
+                self._release_host(target)
+
+    def generate(self, prompt: str, system: Optional[str] = None,
+                 options: Optional[dict] = None, on_token: Optional[Callable[[str], None]] = None,
+                 host: Optional[_HostPool] = None, **extra) -> dict:
+        """/api/generate call. Returns Ollama's full JSON reply.
+
+        If ``on_token`` is given (or a ``token_sink`` is set) the request is
+        streamed and each token is passed to the callback as it arrives; the
+        returned dict has the same shape as a non-streaming reply. ``host``
+        pins the request to one server (see ``prompt_session``).
+        """
+        on_token = on_token or token_sink.get()
+        payload = {'model': self.model, 'prompt': prompt, 'stream': on_token is not None}
+        if system:
+            payload['system'] = system
+        if options:
+            payload['options'] = options
+        if self.keep_alive:
+            payload['keep_alive'] = self.keep_alive
+        payload.update(extra)
+
+        with tracing.span('llm', self.model, streaming=on_token is not None) as span:
+            if on_token is None:
+                reply = self.request('POST', '/api/generate', payload, host=host)
+            else:
+                tokens = []
+                reply = {}
+                for chunk in self.stream('POST', '/api/generate', payload, host=host):
+                    token = chunk.get('response', '')
+                    if token:
+                        span.first_token()
+                        tokens.append(token)
+                        on_token(token)
+                    if chunk.get('done'):
+                        reply = chunk
+                reply['response'] = ''.join(tokens)
+            _annotate_generation(span, reply)
+            return reply
+
+    def generate_many(self, prompts: List[str], **kwargs) -> List[dict]:
+        """Run several generations concurrently across hosts, preserving order."""
+        if not prompts:
+            return []
+        workers = min(len(prompts), self.max_concurrency)
+        generate = tracing.bind(lambda p: self.generate(p, **kwargs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(generate, prompts))
+
+    def test_connection(self) -> bool:
+        """Check that every configured host answers /api/tags."""
+        ok = True
+        for host in self.hosts:
+            try:
+                self.request('GET', '/api/tags', host=host)
+                print(f"[Ollama] Connected to {host.url}")
+            except Exception as e:
+                print(f"[Ollama] Connection failed: {host.url}: {str(e)}")
+                ok = False
+        return ok
+
+    def close(self):
+        for host in self.hosts:
+            host.close()
+
+
+def _annotate_generation(span: tracing.Span, reply: dict):
+    """Token counts and rates from Ollama's reply (durations are in nanoseconds)."""
+    completion = reply.get('eval_count') or 0
+    generating = (reply.get('eval_duration') or 0) / 1e9 or span.elapsed()
+    span.set(prompt_tokens=reply.get('prompt_eval_count') or 0, completion_tokens=completion,
+             tokens_per_second=round(completion / generating, 2) if completion and generating else None)
+    if span.first_token_at is None and reply.get('prompt_eval_duration') is not None:
+        # Not streamed: the first token followed model load and prompt evaluation
+        span.set(time_to_first_token=round(
+            ((reply.get('load_duration') or 0) + reply['prompt_eval_duration']) / 1e9, 4))
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_ollama_pool() -> OllamaPool:
+    """Process-wide pool configured from the environment."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = OllamaPool()
+    return _default_pool
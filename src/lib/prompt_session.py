@@ -0,0 +1,122 @@
+"""Per-run prompt sessions built around a stable shared prefix.
+
+Every stage of a run sends the same large context (the PRD and the research
+block); only the task at the end differs. Ollama keeps the KV cache of the
+last prompt it evaluated and skips prefill for the longest common token
+prefix, so a run's prompts should all start with byte-identical text and
+reach the same server. ``PromptSession`` does both:
+
+* ``build_shared_prefix`` lays out the PRD, numbered sources and facts in
+  one canonical order behind a system prompt shared by all stages;
+  stage-specific instructions, drafts and feedback go after it
+  (``PromptSession.prompt``);
+* the session pins all its calls to one Ollama host, and the pool sends
+  ``keep_alive`` so the model, and its cache, stays loaded between stages.
+
+With ``OLLAMA_SESSION_CONTEXT=true`` the session instead evaluates the prefix
+once and passes Ollama's returned ``context`` tokens with each later call,
+sending only the task text.
+
+Configuration (environment variables):
+    OLLAMA_SESSION_CONTEXT  "true" reuses the primed ``context`` tokens (default: false)
+    PROMPT_SESSION_LIMIT    Sessions kept for in-progress runs (default: 64)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .ollama_pool import OllamaPool, get_ollama_pool
+
+if TYPE_CHECKING:
+    from .types import PRDInput, ResearchOutput
+
+SHARED_SYSTEM = (
+    "You are one stage of a content pipeline that writes accurate, well-cited blog posts. "
+    "Rely only on the brief and research provided, cite sources as [n], and follow the task "
+    "at the end of the prompt exactly."
+)
+
+PRIME_TASK = "Reply with OK once you have read the brief and research."
+
+DEFAULT_SESSION_LIMIT = 64
+
+
+def build_shared_prefix(prd: 'PRDInput', research: 'ResearchOutput') -> str:
+    """Canonical PRD + research block shared by every stage of a run."""
+    lines = [f"# Brief: {prd.title or 'Untitled'}", "", prd.text.strip(), "", "# Sources"]
+    for i, source in enumerate(research.sources or [], 1):
+        url = getattr(source, 'url', '') or ''
+        lines.append(f"[{i}] {getattr(source, 'title', '')}" + (f" - {url}" if url else ''))
+    lines += ["", "# Research facts"]
+    lines += [f"- {fact}" for fact in research.facts or []]
+    return '\n'.join(lines)
+
+
+class PromptSession:
+    """Prompts for one run: shared prefix, one pinned host, optional context reuse."""
+
+    def __init__(self, prefix: str, pool: Optional[OllamaPool] = None,
+                 system: str = SHARED_SYSTEM, use_context: Optional[bool] = None):
+        self.pool = pool or get_ollama_pool()
+        self.prefix = prefix
+        self.system = system
+        self.host = self.pool.least_busy_host()
+        if use_context is None:
+            use_context = os.getenv('OLLAMA_SESSION_CONTEXT', 'false').lower() == 'true'
+        self.use_context = use_context
+        self._context = None
+        self._lock = threading.Lock()
+
+    def prompt(self, task: str) -> str:
+        return f"{self.prefix}\n\n# Task\n{task}"
+
+    def prime(self) -> Optional[dict]:
+        """Evaluate the prefix once and keep its context tokens.
+
+        Returns the priming reply, or None if the session was already primed.
+        """
+        with self._lock:
+            if self._context is not None:
+                return None
+            reply = self.pool.generate(self.prompt(PRIME_TASK), system=self.system,
+                                       options={'num_predict': 4}, host=self.host)
+            self._context = reply.get('context') or []
+            return reply
+
+    def generate(self, task: str, options: Optional[dict] = None,
+                 on_token: Optional[Callable[[str], None]] = None, **extra) -> dict:
+        """Run ``task`` after the shared prefix; returns Ollama's reply."""
+        if self.use_context:
+            self.prime()
+            context = self._context
+            if context:
+                return self.pool.generate(task, system=self.system, options=options,
+                                          on_token=on_token, host=self.host,
+                                          context=context, **extra)
+        return self.pool.generate(self.prompt(task), system=self.system, options=options,
+                                  on_token=on_token, host=self.host, **extra)
+
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_prompt_session(run_id: str, prd: 'PRDInput', research: 'ResearchOutput') -> PromptSession:
+    """The run's session; a new one if the run's research (and so its prefix) changed."""
+    prefix = build_shared_prefix(prd, research)
+    with _sessions_lock:
+        session = _sessions.get(run_id)
+        if session is None or session.prefix != prefix:
+            session = PromptSession(prefix)
+            _sessions[run_id] = session
+        _sessions.move_to_end(run_id)
+        while len(_sessions) > int(os.getenv('PROMPT_SESSION_LIMIT', DEFAULT_SESSION_LIMIT)):
+            _sessions.popitem(last=False)
+    return session
+
+
+def end_prompt_session(run_id: str):
+    with _sessions_lock:
+        _sessions.pop(run_id, None)
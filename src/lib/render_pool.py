@@ -0,0 +1,170 @@
+"""Process-isolated rendering of output files.
+
+xhtml2pdf and python-docx are CPU-bound pure Python. Run on a thread of the
+API process (``asyncio.to_thread``), a large post holds the GIL for seconds
+and stalls the event loop, so status polls and SSE streams for every other
+job freeze until it finishes. ``RenderPool`` runs ``export.export_format``
+in a small pool of worker processes instead:
+
+* at most ``RENDER_POOL_SIZE`` documents render at once;
+* each worker's address space is capped at ``RENDER_MEMORY_MB`` (Linux and
+  macOS; ``resource.setrlimit``), so a pathological document fails with a
+  ``RenderError`` instead of taking the host's memory;
+* a render that exceeds ``RENDER_TIMEOUT`` seconds raises ``RenderTimeout``
+  and the pool's workers are killed and replaced (a running process cannot
+  be cancelled any other way); renders caught in that restart are retried;
+* workers are recycled after ``RENDER_TASKS_PER_CHILD`` renders to bound
+  fragmentation.
+
+Each document is a ``render`` span (see ``tracing``), timed in the caller.
+
+Configuration (environment variables):
+    RENDER_POOL_SIZE         Worker processes (default: 2)
+    RENDER_TIMEOUT           Seconds allowed per document (default: 60)
+    RENDER_MEMORY_MB         Address-space cap per worker; 0 disables (default: 2048)
+    RENDER_TASKS_PER_CHILD   Renders before a worker is replaced (default: 50)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from . import tracing
+from .export import export_format
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MEMORY_MB = 2048
+DEFAULT_TASKS_PER_CHILD = 50
+
+# Attempts per render when the pool breaks underneath it (a restart after
+# another render's timeout, or a worker killed from outside)
+MAX_ATTEMPTS = 2
+
+
+class RenderError(RuntimeError):
+    """Raised when a document cannot be rendered."""
+
+
+class RenderTimeout(RenderError):
+    """Raised when rendering exceeds the pool's timeout."""
+
+
+def _limit_memory(memory_mb: int):
+    """Worker initializer: cap the process address space."""
+    if not memory_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _render(markdown: str, fmt: str, output_path: str, title: Optional[str]) -> str:
+    try:
+        return export_format(markdown, fmt, output_path, title)
+    except (MemoryError, SystemError):
+        # Allocation failures inside C extensions can surface as SystemError
+        raise RenderError(f"Rendering {fmt} exceeded the worker memory limit") from None
+
+
+class RenderPool:
+    """Bounded pool of rendering processes with a per-document timeout."""
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None,
+                 memory_mb: Optional[int] = None, tasks_per_child: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv('RENDER_POOL_SIZE', DEFAULT_POOL_SIZE))
+        self.timeout = timeout or float(os.getenv('RENDER_TIMEOUT', DEFAULT_TIMEOUT))
+        self.memory_mb = int(os.getenv('RENDER_MEMORY_MB', DEFAULT_MEMORY_MB)) if memory_mb is None else memory_mb
+        self.tasks_per_child = tasks_per_child or int(os.getenv('RENDER_TASKS_PER_CHILD', DEFAULT_TASKS_PER_CHILD))
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: the API process is threaded, and forking it is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_limit_memory,
+                    initargs=(self.memory_mb,),
+                    max_tasks_per_child=self.tasks_per_child
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Kill the workers of ``executor`` (if still current) so a new pool starts."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, *args):
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(_render, *args)
+        except RuntimeError:
+            # Restarted (or broken) by another render between lookup and submit
+            self._restart(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(_render, *args)
+
+    def render(self, markdown: str, fmt: str, output_path: str, title: Optional[str] = None) -> str:
+        """Render in a worker process; blocks until done. Returns the output path."""
+        with tracing.span('render', fmt):
+            for attempt in range(MAX_ATTEMPTS):
+                executor, future = self._submit(markdown, fmt, output_path, title)
+                try:
+                    return future.result(timeout=self.timeout)
+                except FutureTimeout:
+                    self._restart(executor)
+                    raise RenderTimeout(f"Rendering {fmt} timed out after {self.timeout:g}s") from None
+                except BrokenProcessPool:
+                    self._restart(executor)
+            raise RenderError(f"Rendering {fmt} failed: worker process died")
+
+    async def arender(self, markdown: str, fmt: str, output_path: str, title: Optional[str] = None) -> str:
+        """``render`` for the event loop: awaits the worker without blocking the loop."""
+        with tracing.span('render', fmt):
+            for attempt in range(MAX_ATTEMPTS):
+                executor, future = self._submit(markdown, fmt, output_path, title)
+                try:
+                    return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except asyncio.TimeoutError:
+                    self._restart(executor)
+                    raise RenderTimeout(f"Rendering {fmt} timed out after {self.timeout:g}s") from None
+                except BrokenProcessPool:
+                    self._restart(executor)
+            raise RenderError(f"Rendering {fmt} failed: worker process died")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """Process-wide render pool configured from the environment."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = RenderPool()
+    return _default_pool
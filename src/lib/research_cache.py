@@ -0,0 +1,198 @@
+"""Persistent cache of Researcher Agent results shared across runs.
+
+Entries are keyed on the normalized PRD text and title, so resubmitting the
+same (or a whitespace/case-only variant of a) PRD reuses the earlier
+``ResearchOutput`` instead of repeating topic extraction and web search.
+Entries expire after a TTL and the cache is trimmed to a maximum size by
+evicting the least recently used entries.
+
+Configuration (environment variables):
+    RESEARCH_CACHE_ENABLED      "false" disables the cache (default: true)
+    RESEARCH_CACHE_PATH         SQLite file (default: cache/research_cache.sqlite)
+    RESEARCH_CACHE_TTL          Freshness in seconds (default: 900)
+    RESEARCH_CACHE_MAX_ENTRIES  LRU size limit (default: 500)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from .serialization import dump_output, load_output
+
+if TYPE_CHECKING:
+    from .types import PRDInput, ResearchOutput
+
+DEFAULT_CACHE_PATH = "cache/research_cache.sqlite"
+DEFAULT_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_ENTRIES = 500
+
+
+def normalize_prd_text(text: str) -> str:
+    """Normalize PRD text so trivially different submissions share a key."""
+    text = text.lower()
+    text = re.sub(r'[#*_>`~\-]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def research_cache_key(prd: 'PRDInput') -> str:
+    """Cache key for a PRD: hash of its normalized title and text."""
+    normalized = normalize_prd_text(prd.title or '') + '\n' + normalize_prd_text(prd.text)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def extract_topics(research: 'ResearchOutput') -> list:
+    """Topics researched, recovered from the source titles."""
+    topics = []
+    for source in research.sources:
+        title = getattr(source, 'title', None) or ''
+        topic = title.replace('Research Article: ', '').strip().lower()
+        if topic and topic not in topics:
+            topics.append(topic)
+    return topics
+
+
+class ResearchCache:
+    """SQLite-backed TTL/LRU store of serialized research results."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_cache (
+                    key TEXT PRIMARY KEY,
+                    topics TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_research_cache_lru "
+                "ON research_cache (last_accessed)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(str(self.path), timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached payload if present and fresh, else None."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM research_cache WHERE key = ?", (key,))
+                return None
+
+            conn.execute(
+                "UPDATE research_cache SET last_accessed = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(payload)
+
+    def put(self, key: str, topics: list, payload: dict):
+        """Store a payload and trim the cache to its size limit."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO research_cache "
+                "(key, topics, payload, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(topics), json.dumps(payload), now, now)
+            )
+            conn.execute(
+                "DELETE FROM research_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            conn.execute("""
+                DELETE FROM research_cache WHERE key NOT IN (
+                    SELECT key FROM research_cache ORDER BY last_accessed DESC LIMIT ?
+                )
+            """, (self.max_entries,))
+
+    def invalidate_topic(self, topic: str) -> int:
+        """Drop every entry that researched the given topic. Returns the count removed."""
+        topic = topic.strip().lower()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, topics FROM research_cache").fetchall()
+            stale = [key for key, topics in rows if topic in json.loads(topics)]
+            conn.executemany("DELETE FROM research_cache WHERE key = ?", [(k,) for k in stale])
+        return len(stale)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM research_cache")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM research_cache").fetchone()[0]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_research_cache() -> Optional[ResearchCache]:
+    """Process-wide cache configured from the environment (None if disabled)."""
+    global _default_cache
+
+    if os.getenv('RESEARCH_CACHE_ENABLED', 'true').lower() == 'false':
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResearchCache(
+                path=os.getenv('RESEARCH_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl_seconds=int(os.getenv('RESEARCH_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.getenv('RESEARCH_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+            )
+    return _default_cache
+
+
+def run_researcher_cached(prd: 'PRDInput', run_id: str,
+                          cache: Optional[ResearchCache] = None) -> 'ResearchOutput':
+    """Drop-in replacement for run_researcher that reuses fresh cached results."""
+    # Imported here so the cache itself does not depend on the agents
+    from .knowledge_base import run_researcher_with_knowledge
+    from .types import ResearchOutput
+
+    cache = cache if cache is not None else get_research_cache()
+    if cache is None:
+        return run_researcher_with_knowledge(prd, run_id)
+
+    key = research_cache_key(prd)
+    payload = cache.get(key)
+    if payload is not None:
+        try:
+            research = load_output(ResearchOutput, payload)
+            print(f"[ResearchCache] Hit for run {run_id} ({len(research.sources)} sources)")
+            return research
+        except Exception as e:
+            print(f"[ResearchCache] Ignoring unreadable entry: {str(e)}")
+
+    research = run_researcher_with_knowledge(prd, run_id)
+
+    # Only cache successful research so transient search failures are retried
+    if research.success:
+        cache.put(key, extract_topics(research), dump_output(research))
+
+    return research
@@ -0,0 +1,133 @@
+"""Local BM25 retrieval over research facts and sources.
+
+The Writer and Fact-Checker used to receive every source and fact the
+Researcher gathered, so prompt size (and prefill latency) grew with research
+breadth. ``ResearchIndex`` ranks ``research.facts`` and ``research.sources``
+against a query (the PRD, a section or a claim) with Okapi BM25 and
+``focus`` returns a copy of the research trimmed to the top-k entries, so
+prompts stay bounded however much was gathered. Pure Python, no external
+service.
+
+Selected entries keep their original relative order, so citation numbers
+stay stable for everything derived from the same focused research.
+
+Configuration (environment variables):
+    RETRIEVAL_MAX_FACTS    Facts passed to the Writer and Fact-Checker (default: 20)
+    RETRIEVAL_MAX_SOURCES  Sources passed to the Writer and Fact-Checker (default: 8)
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, List, Optional
+
+from .serialization import replace_fields
+
+if TYPE_CHECKING:
+    from .types import PRDInput, ResearchOutput
+
+DEFAULT_MAX_FACTS = 20
+DEFAULT_MAX_SOURCES = 8
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the '
+    'their this to was were will with which can about into than also'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents."""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        # Inverted index: term -> [(doc, term frequency)]
+        self.postings = {}
+        for doc, tf in enumerate(self.term_freqs):
+            for term, count in tf.items():
+                self.postings.setdefault(term, []).append((doc, count))
+
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.term_freqs)
+
+    def scores(self, query: str) -> List[float]:
+        scores = [0.0] * len(self.term_freqs)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = 1 - self.b + self.b * self.lengths[doc] / (self.avg_length or 1)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the k best-scoring documents (ties broken by position)."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+        return [i for i in ranked[:k] if scores[i] > 0]
+
+
+def source_text(source) -> str:
+    return ' '.join(filter(None, [getattr(source, 'title', ''), getattr(source, 'snippet', '')]))
+
+
+class ResearchIndex:
+    """BM25 indexes over one ResearchOutput's facts and sources."""
+
+    def __init__(self, research: 'ResearchOutput'):
+        self.research = research
+        self.facts = list(research.facts or [])
+        self.sources = list(research.sources or [])
+        self.fact_index = BM25Index(self.facts)
+        self.source_index = BM25Index([source_text(s) for s in self.sources])
+
+    def top_facts(self, query: str, k: int) -> List[str]:
+        return [self.facts[i] for i in self._select(self.fact_index, query, k)]
+
+    @staticmethod
+    def _select(index: BM25Index, query: str, k: int) -> List[int]:
+        if len(index) <= k:
+            return list(range(len(index)))
+        # Nothing matches: fall back to the first k rather than sending nothing
+        return sorted(index.top_k(query, k)) or list(range(k))
+
+    def focus(self, query: str, max_facts: int,
+              max_sources: Optional[int] = None) -> 'ResearchOutput':
+        """Copy of the research keeping only the entries most relevant to ``query``."""
+        facts = self._select(self.fact_index, query, max_facts)
+        sources = (self._select(self.source_index, query, max_sources)
+                   if max_sources is not None else range(len(self.sources)))
+        if len(facts) == len(self.facts) and len(sources) == len(self.sources):
+            return self.research
+        return replace_fields(
+            self.research,
+            facts=[self.facts[i] for i in facts],
+            sources=[self.sources[i] for i in sources]
+        )
+
+
+def focus_research(prd: 'PRDInput', research: 'ResearchOutput') -> 'ResearchOutput':
+    """Research trimmed to what is relevant to the PRD, for the Writer and Fact-Checker."""
+    query = f"{prd.title or ''}\n{prd.text}"
+    return ResearchIndex(research).focus(
+        query,
+        max_facts=int(os.getenv('RETRIEVAL_MAX_FACTS', DEFAULT_MAX_FACTS)),
+        max_sources=int(os.getenv('RETRIEVAL_MAX_SOURCES', DEFAULT_MAX_SOURCES)),
+    )
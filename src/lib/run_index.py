@@ -0,0 +1,298 @@
+"""Queryable index of pipeline runs.
+
+Finding a past run, or any statistic over run history, used to mean scanning
+``logs/master.jsonl`` and opening ``logs/run_*.json`` files one by one.
+``RunIndex`` keeps one row per run in SQLite: run_id, job_id, title, status,
+duration, fact-check outcome, research and word counts, with per-stage
+timings in a side table. Indexes on ``created_at`` and
+``(fact_check_passed, created_at)`` keep time-windowed queries such as
+"runs in the last 24h with a failed fact-check, slowest first" to a range
+scan of the window instead of the whole history.
+
+The index is fed by ``LogWriter`` (every ``pipeline_result`` record, one
+transaction per batch) and by the CLI via ``index_run``. ``rebuild``
+re-indexes existing JSONL logs.
+
+Configuration (environment variables):
+    RUN_INDEX_ENABLED   "false" disables the run index (default: true)
+    RUN_INDEX_PATH      SQLite file (default: logs/runs.sqlite)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_PATH = "logs/runs.sqlite"
+
+SORT_COLUMNS = {
+    'created_at': 'created_at',
+    'duration': 'duration',
+    'words': 'final_words',
+    'issues': 'fact_check_issues',
+}
+
+RUN_COLUMNS = ('run_id', 'job_id', 'title', 'status', 'format', 'created_at', 'duration',
+               'fact_check_passed', 'fact_check_issues', 'sources', 'facts', 'draft_words', 'final_words')
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_since(value: str) -> float:
+    """Seconds in a window such as ``90m``, ``24h`` or ``7d`` (plain numbers are seconds)."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*', value or '')
+    if not match:
+        raise ValueError(f"Invalid time window: {value!r} (expected e.g. 30m, 24h, 7d)")
+    return float(match.group(1)) * _UNITS[match.group(2) or 's']
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def _count(value) -> Optional[int]:
+    """Counts are logged either as numbers or as the lists they count."""
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return int(value) if isinstance(value, (int, float)) else None
+
+
+def run_row(result: dict) -> tuple:
+    """Index row for a pipeline result as logged by the CLI, API task or Celery chain."""
+    research = result.get('research') or {}
+    draft = result.get('draft') or {}
+    fact_check = result.get('fact_check') or {}
+    final = result.get('final') or {}
+    passed = fact_check.get('passed', result.get('fact_check_passed'))
+    return (
+        result['run_id'],
+        result.get('job_id'),
+        result.get('prd_title') or result.get('title'),
+        result.get('status'),
+        result.get('format'),
+        _timestamp(result.get('ts') or result.get('timestamp')),
+        result.get('duration_seconds'),
+        None if passed is None else int(bool(passed)),
+        _count(fact_check.get('issues')),
+        _count(research.get('sources')),
+        _count(research.get('facts')),
+        _count(draft.get('word_count')),
+        _count(final.get('word_count', result.get('word_count'))),
+    )
+
+
+class RunIndex:
+    """SQLite index of runs and their stage timings."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    job_id TEXT,
+                    title TEXT,
+                    status TEXT,
+                    format TEXT,
+                    created_at REAL NOT NULL,
+                    duration REAL,
+                    fact_check_passed INTEGER,
+                    fact_check_issues INTEGER,
+                    sources INTEGER,
+                    facts INTEGER,
+                    draft_words INTEGER,
+                    final_words INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stages (
+                    run_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    PRIMARY KEY (run_id, stage)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_fact_check ON runs (fact_check_passed, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_job ON runs (job_id)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(str(self.path), timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+
+    def record(self, results: Iterable[dict]) -> int:
+        """Index (or re-index) pipeline results in one transaction; returns how many."""
+        rows, stages = [], []
+        for result in results:
+            if not result.get('run_id'):
+                continue
+            rows.append(run_row(result))
+            stages += [(result['run_id'], stage, float(seconds))
+                       for stage, seconds in (result.get('stage_timings') or {}).items()]
+        if not rows:
+            return 0
+
+        placeholders = ','.join('?' * len(RUN_COLUMNS))
+        with self._connect() as conn:
+            conn.executemany(f"INSERT OR REPLACE INTO runs ({','.join(RUN_COLUMNS)}) VALUES ({placeholders})", rows)
+            conn.executemany("INSERT OR REPLACE INTO stages (run_id, stage, seconds) VALUES (?, ?, ?)", stages)
+        return len(rows)
+
+    def record_run(self, result: dict):
+        self.record([result])
+
+    def _attach_stages(self, conn: sqlite3.Connection, runs: List[dict]) -> List[dict]:
+        by_id = {run['run_id']: run for run in runs}
+        for run in runs:
+            run['stage_timings'] = {}
+        for start in range(0, len(runs), 500):
+            ids = list(by_id)[start:start + 500]
+            for run_id, stage, seconds in conn.execute(
+                f"SELECT run_id, stage, seconds FROM stages WHERE run_id IN ({','.join('?' * len(ids))})", ids
+            ):
+                by_id[run_id]['stage_timings'][stage] = seconds
+        return runs
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              fact_check: Optional[bool] = None, status: Optional[str] = None,
+              title: Optional[str] = None, sort: str = 'created_at', descending: bool = True,
+              limit: int = 50, offset: int = 0) -> List[dict]:
+        """
+        Runs matching every given filter. ``since``/``until`` are Unix
+        timestamps, ``fact_check`` selects passed (True) or failed (False)
+        runs, ``title`` is a case-insensitive substring.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key: {sort!r} (expected one of {', '.join(SORT_COLUMNS)})")
+
+        clauses, params = [], []
+        if fact_check is not None:
+            clauses.append("fact_check_passed = ?")
+            params.append(int(fact_check))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if title:
+            clauses.append("title LIKE ?")
+            params.append(f"%{title}%")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = f"{SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}, run_id"
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT {','.join(RUN_COLUMNS)} FROM runs {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+            return self._attach_stages(conn, [_run_dict(row) for row in rows])
+
+    def get(self, run_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(f"SELECT {','.join(RUN_COLUMNS)} FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            return self._attach_stages(conn, [_run_dict(row)])[0] if row else None
+
+    def stats(self, since: Optional[float] = None) -> dict:
+        """Run counts, fact-check failures and mean durations (overall and per stage)."""
+        where = "WHERE r.created_at >= ?" if since is not None else ""
+        params = [since] if since is not None else []
+        with self._connect() as conn:
+            runs, failed, avg_duration, max_duration = conn.execute(
+                f"SELECT COUNT(*), SUM(fact_check_passed = 0), AVG(duration), MAX(duration) FROM runs r {where}",
+                params
+            ).fetchone()
+            stages = conn.execute(
+                f"SELECT s.stage, AVG(s.seconds) FROM stages s JOIN runs r ON r.run_id = s.run_id "
+                f"{where} GROUP BY s.stage", params
+            ).fetchall()
+        return {
+            'runs': runs,
+            'fact_check_failed': failed or 0,
+            'avg_duration_seconds': round(avg_duration, 2) if avg_duration is not None else None,
+            'max_duration_seconds': max_duration,
+            'avg_stage_seconds': {stage: round(seconds, 2) for stage, seconds in stages},
+        }
+
+    def rebuild(self, paths: Iterable[str]) -> int:
+        """Index the pipeline results found in JSONL logs (events or master logs)."""
+        indexed = 0
+        for path in paths:
+            batch = []
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if not isinstance(record, dict) or not record.get('run_id'):
+                        continue
+                    if record.get('event', 'pipeline_result') == 'pipeline_result' and 'status' in record:
+                        batch.append(record)
+                    if len(batch) >= 1000:
+                        indexed += self.record(batch)
+                        batch = []
+            indexed += self.record(batch)
+        return indexed
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+def _run_dict(row: sqlite3.Row) -> dict:
+    run = dict(row)
+    if run['fact_check_passed'] is not None:
+        run['fact_check_passed'] = bool(run['fact_check_passed'])
+    return run
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_run_index() -> Optional[RunIndex]:
+    """Process-wide run index configured from the environment (None if disabled)."""
+    global _default_index
+
+    if os.getenv('RUN_INDEX_ENABLED', 'true').lower() == 'false':
+        return None
+
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = RunIndex(path=os.getenv('RUN_INDEX_PATH', DEFAULT_PATH))
+    return _default_index
+
+
+def index_run(result: dict):
+    """Add a pipeline result to the run index (no-op if it is disabled)."""
+    index = get_run_index()
+    if index is not None:
+        try:
+            index.record_run(result)
+        except sqlite3.Error as e:
+            print(f"[RunIndex] Failed to index run {result.get('run_id')}: {str(e)}")
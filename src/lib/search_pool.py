@@ -0,0 +1,162 @@
+"""Concurrent per-topic web search.
+
+The Researcher Agent extracts a handful of topics from the PRD and searches
+the web for each one. Running those searches one after another makes research
+latency the *sum* of every query; ``search_topics`` runs them on a bounded
+thread pool so latency is bounded by the slowest query (or the per-query
+timeout), and a failed or timed-out query simply contributes no results.
+Each query gets ``SEARCH_TIMEOUT`` seconds from when a worker starts it; a
+query still waiting for a worker when every query could have run its full
+budget (``SEARCH_TIMEOUT`` per wave of ``SEARCH_CONCURRENCY``) is dropped.
+
+``search_fn`` is any callable ``(query, max_results) -> list`` -- the
+DuckDuckGo search in ``web_search.py`` or ``StubSearchBackend`` for offline
+benchmarks and tests. ``SEARCH_BACKEND=stub`` swaps the stub in for every
+``search_topics`` caller in every process (API, Celery workers, CLI); it
+does not affect code that calls ``web_search`` directly. Each query is a
+``search`` span (see ``tracing``).
+
+Configuration (environment variables):
+    SEARCH_CONCURRENCY     Maximum searches in flight (default: 4)
+    SEARCH_TIMEOUT         Per-query timeout in seconds (default: 10)
+    MAX_SOURCES_PER_TOPIC  Results requested per topic (default: 2)
+    SEARCH_BACKEND         "stub" makes search_topics use StubSearchBackend (default: web)
+    SEARCH_STUB_LATENCY    Seconds per stub query (default: 0.2)
+"""
+
+import hashlib
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from . import tracing
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 10.0
+
+
+def search_topics(topics: List[str],
+                  search_fn: Callable[[str, int], list],
+                  max_results: Optional[int] = None,
+                  max_concurrency: Optional[int] = None,
+                  timeout: Optional[float] = None) -> Dict[str, list]:
+    """Search every topic concurrently and return results keyed by topic.
+
+    Topics whose search raises or does not finish in time map to an empty
+    list, so callers always get an entry per topic in the original order.
+    """
+    max_results = max_results or int(os.getenv('MAX_SOURCES_PER_TOPIC', 2))
+    max_concurrency = max_concurrency or int(os.getenv('SEARCH_CONCURRENCY', DEFAULT_CONCURRENCY))
+    timeout = timeout or float(os.getenv('SEARCH_TIMEOUT', DEFAULT_TIMEOUT))
+
+    results = {topic: [] for topic in topics}
+    if not topics:
+        return results
+
+    if os.getenv('SEARCH_BACKEND', 'web').lower() == 'stub':
+        search_fn = get_stub_backend()
+
+    # With more topics than workers the queries run in waves; queries that
+    # never get a worker give up once every wave could have used its budget
+    waves = math.ceil(len(topics) / max_concurrency)
+    batch_deadline = time.monotonic() + timeout * waves
+    started = {}
+
+    def traced_search(topic: str, count: int) -> list:
+        started[topic] = time.monotonic()
+        with tracing.span('search', 'web', query=topic) as span:
+            found = search_fn(topic, count)
+            span.set(results=len(found or []))
+            return found
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    search = tracing.bind(traced_search)
+    futures = {executor.submit(search, topic, max_results): topic for topic in topics}
+    pending = set(futures)
+    timed_out = []
+
+    try:
+        while pending:
+            now = time.monotonic()
+            # A query that has not started yet cannot expire before now + timeout
+            expiries = {f: started.get(futures[f], now) + timeout for f in pending}
+            for future, expiry in expiries.items():
+                if expiry <= now and not future.done():
+                    pending.discard(future)
+                    timed_out.append(futures[future])
+            if pending and now >= batch_deadline:
+                timed_out.extend(futures[f] for f in pending)
+                pending.clear()
+            if not pending:
+                break
+
+            wake = min([expiries[f] for f in pending] + [batch_deadline])
+            done, pending = wait(pending, timeout=wake - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                topic = futures[future]
+                try:
+                    results[topic] = list(future.result() or [])
+                except Exception as e:
+                    print(f"[WebSearcher] Search failed for '{topic}': {str(e)}")
+        if timed_out:
+            print(f"[WebSearcher] Timed out after {timeout:.1f}s per query waiting for: {', '.join(timed_out)}")
+    finally:
+        # Don't block on stragglers; their results are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
+class StubSearchBackend:
+    """Deterministic offline stand-in for the web search backend.
+
+    Each query sleeps for ``latency`` seconds (plus optional jitter) and
+    returns canned results derived from the query text, so benchmarks are
+    repeatable without network access. Jitter and failures are drawn from a
+    generator seeded per query, so they do not depend on thread scheduling.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str, max_results: int = 2) -> list:
+        with self._lock:
+            self.calls += 1
+        rng = random.Random(f"{self.seed}:{query}")
+        time.sleep(self.latency + rng.uniform(0, self.jitter))
+
+        if rng.random() < self.failure_rate:
+            raise RuntimeError(f"stub search failure for '{query}'")
+
+        digest = hashlib.sha1(query.encode('utf-8')).hexdigest()[:8]
+        return [
+            {
+                'title': f"{query.title()} - Result {i + 1}",
+                'url': f"https://example.com/{digest}/{i + 1}",
+                'snippet': f"{query} is discussed in detail in this stub result ({i + 1}).",
+            }
+            for i in range(max_results)
+        ]
+
+
+_stub_backend = None
+_stub_backend_lock = threading.Lock()
+
+
+def get_stub_backend() -> StubSearchBackend:
+    """Process-wide stub used when SEARCH_BACKEND=stub."""
+    global _stub_backend
+    with _stub_backend_lock:
+        if _stub_backend is None:
+            _stub_backend = StubSearchBackend(latency=float(os.getenv('SEARCH_STUB_LATENCY', 0.2)))
+    return _stub_backend
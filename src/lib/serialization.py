@@ -0,0 +1,32 @@
+"""Helpers for persisting agent outputs (checkpoints, caches, task payloads)."""
+
+import dataclasses
+from typing import Any, Type, TypeVar
+
+T = TypeVar('T')
+
+
+def dump_output(output: Any) -> dict:
+    """Convert an agent output model into a JSON-serializable dict."""
+    if hasattr(output, 'model_dump'):
+        return output.model_dump(mode='json')
+    if dataclasses.is_dataclass(output):
+        return dataclasses.asdict(output)
+    raise TypeError(f"Cannot serialize {type(output).__name__}")
+
+
+def load_output(output_type: Type[T], data: dict) -> T:
+    """Rebuild an agent output model from a dict produced by dump_output."""
+    if hasattr(output_type, 'model_validate'):
+        return output_type.model_validate(data)
+    return output_type(**data)
+
+
+
+def replace_fields(output: T, **fields) -> T:
+    """Return a copy of an agent output model with some fields replaced."""
+    if hasattr(output, 'model_copy'):
+        return output.model_copy(update=fields)
+    if dataclasses.is_dataclass(output):
+        return dataclasses.replace(output, **fields)
+    raise TypeError(f"Cannot copy {type(output).__name__}")
@@ -0,0 +1,334 @@
+"""Spans, per-run timing breakdowns and Prometheus metrics.
+
+A run used to record one ``duration_seconds`` at most, which does not say
+whether research, writing, fact-check retries or rendering is the slow part.
+``span(kind, name)`` times a block of work and records it twice:
+
+* in the process-wide ``metrics`` registry (duration histograms per kind and
+  name, error counts, LLM token counters, time-to-first-token and
+  tokens/sec), which the API exposes at ``/metrics`` in the Prometheus text
+  format;
+* in the current ``RunTrace``, if one is active, so ``breakdown`` can
+  summarize a single run per agent (calls, seconds, LLM requests, tokens,
+  tokens/sec, time to first token) and per search and render.
+
+Kinds used by the pipeline: ``agent`` (one agent call), ``llm`` (one
+Ollama request, see ``ollama_pool``), ``search`` (one web search, see
+``search_pool``) and ``render`` (one format render, see ``render_pool``).
+
+The active trace and agent live in context variables, so they follow
+``asyncio`` tasks and ``contextvars.copy_context`` (as in
+``async_pipeline``); plain thread pools need ``bind``. Celery workers keep
+their own metrics registry; their spans travel with the task context and
+end up in the stored breakdown like in-process runs.
+
+Configuration (environment variables):
+    TRACING_ENABLED  "false" disables spans and metrics (default: true)
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def totals(self) -> Dict[tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, key)} {value:g}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            # Per-bucket counts (made cumulative when rendered), then sum and count
+            state = self._values.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, *label_values: str) -> int:
+        state = self._values.get(label_values)
+        return state[-1] if state else 0
+
+    def totals(self) -> Dict[tuple, Tuple[int, float]]:
+        """(count, sum) per label set, e.g. to diff two snapshots."""
+        with self._lock:
+            return {key: (state[-1], state[-2]) for key, state in self._values.items()}
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, hits in zip(self.buckets, state):
+                    cumulative += hits
+                    labels = _format_labels(self.labels, key, 'le="%g"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {state[-2]:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """The pipeline's metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.span_seconds = Histogram(
+            'contentforge_span_duration_seconds', 'Duration of pipeline spans',
+            DURATION_BUCKETS, ('kind', 'name'))
+        self.span_errors = Counter(
+            'contentforge_span_errors_total', 'Spans that ended with an exception', ('kind', 'name'))
+        self.llm_tokens = Counter(
+            'contentforge_llm_tokens_total', 'LLM tokens processed', ('agent', 'type'))
+        self.llm_ttft = Histogram(
+            'contentforge_llm_time_to_first_token_seconds', 'Time from LLM request to first token',
+            TTFT_BUCKETS, ('agent',))
+        self.llm_rate = Histogram(
+            'contentforge_llm_tokens_per_second', 'LLM completion tokens per second',
+            RATE_BUCKETS, ('agent',))
+        self.metrics = [self.span_seconds, self.span_errors, self.llm_tokens, self.llm_ttft, self.llm_rate]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Registry()
+
+
+class RunTrace:
+    """Spans recorded during one run (plain dicts, so they can travel in a Celery context)."""
+
+    def __init__(self, run_id: Optional[str] = None, spans: Optional[list] = None):
+        self.run_id = run_id
+        self.spans = spans if spans is not None else []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.spans.append(record)
+
+    def breakdown(self) -> dict:
+        return breakdown(self.spans)
+
+
+_trace: contextvars.ContextVar[Optional[RunTrace]] = contextvars.ContextVar('run_trace', default=None)
+_agent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('trace_agent', default=None)
+
+
+def enabled() -> bool:
+    return os.getenv('TRACING_ENABLED', 'true').lower() != 'false'
+
+
+def current_trace() -> Optional[RunTrace]:
+    return _trace.get()
+
+
+def start_trace(run_id: Optional[str] = None, spans: Optional[list] = None) -> RunTrace:
+    """Make a new trace current for this context (and everything it copies) and return it."""
+    trace = RunTrace(run_id, spans)
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def run_trace(run_id: Optional[str] = None, spans: Optional[list] = None):
+    """Trace the enclosed block as (part of) one run; ``spans`` continues an earlier trace."""
+    trace = RunTrace(run_id, spans)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+class Span:
+    """A timed block; attributes set on it are kept in the run trace."""
+
+    def __init__(self, kind: str, name: str, attributes: dict):
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self.agent = name if kind == 'agent' else _agent.get()
+        self.started = time.perf_counter()
+        self.first_token_at = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes):
+    """Time the enclosed block as a ``kind`` span (see module docstring)."""
+    if not enabled():
+        yield Span(kind, name, attributes)
+        return
+
+    current = Span(kind, name, attributes)
+    token = _agent.set(name) if kind == 'agent' else None
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if token is not None:
+            _agent.reset(token)
+        _finish(current, current.elapsed(), error)
+
+
+def _finish(current: Span, seconds: float, error: Optional[str]):
+    metrics.span_seconds.observe(seconds, current.kind, current.name)
+    if error:
+        metrics.span_errors.inc(1, current.kind, current.name)
+
+    attributes = current.attributes
+    if current.kind == 'llm':
+        agent = current.agent or 'none'
+        if current.first_token_at is not None:
+            attributes.setdefault('time_to_first_token', round(current.first_token_at - current.started, 4))
+        for field, token_type in (('prompt_tokens', 'prompt'), ('completion_tokens', 'completion')):
+            if attributes.get(field):
+                metrics.llm_tokens.inc(attributes[field], agent, token_type)
+        if attributes.get('time_to_first_token') is not None:
+            metrics.llm_ttft.observe(attributes['time_to_first_token'], agent)
+        if attributes.get('tokens_per_second'):
+            metrics.llm_rate.observe(attributes['tokens_per_second'], agent)
+
+    trace = _trace.get()
+    if trace is not None:
+        record = {'kind': current.kind, 'name': current.name, 'agent': current.agent,
+                  'seconds': round(seconds, 4), **attributes}
+        if error:
+            record['error'] = error
+        trace.add(record)
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap ``func`` so it runs under the caller's trace and agent on another thread."""
+    trace, agent = _trace.get(), _agent.get()
+
+    def bound(*args, **kwargs):
+        trace_token, agent_token = _trace.set(trace), _agent.set(agent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _agent.reset(agent_token)
+            _trace.reset(trace_token)
+
+    return bound
+
+
+def _sum(records: List[dict], field: str) -> float:
+    return sum(record.get(field) or 0 for record in records)
+
+
+def breakdown(spans: List[dict]) -> dict:
+    """Per-run summary of spans: per agent (with its LLM requests), searches and renders."""
+    agents = {}
+    for record in spans:
+        if record['kind'] == 'agent':
+            entry = agents.setdefault(record['name'], {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += record['seconds']
+
+    llm_by_agent = {}
+    for record in spans:
+        if record['kind'] == 'llm':
+            llm_by_agent.setdefault(record.get('agent') or 'none', []).append(record)
+    for agent, requests in llm_by_agent.items():
+        entry = agents.setdefault(agent, {'calls': 0, 'seconds': 0.0})
+        completion = _sum(requests, 'completion_tokens')
+        generating = sum(r['completion_tokens'] / r['tokens_per_second'] for r in requests
+                         if r.get('completion_tokens') and r.get('tokens_per_second'))
+        ttfts = [r['time_to_first_token'] for r in requests if r.get('time_to_first_token') is not None]
+        entry['llm'] = {
+            'requests': len(requests),
+            'seconds': round(_sum(requests, 'seconds'), 3),
+            'prompt_tokens': int(_sum(requests, 'prompt_tokens')),
+            'completion_tokens': int(completion),
+            'tokens_per_second': round(completion / generating, 1) if generating else None,
+            'avg_time_to_first_token': round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+        }
+    for entry in agents.values():
+        entry['seconds'] = round(entry['seconds'], 3)
+
+    summary = {'agents': agents}
+    for kind in ('search', 'render'):
+        records = [record for record in spans if record['kind'] == kind]
+        summary[kind] = {
+            'count': len(records),
+            'seconds': round(_sum(records, 'seconds'), 3),
+            'errors': sum(1 for record in records if record.get('error')),
+        }
+    return summary
@@ -1,6 +1,8 @@
 from lib.ollama_client import test_connection
+from lib.ollama_pool import get_ollama_pool
 from cli import main as cli_main
 import sys
+import os
 
 def main():
     """Main entry point - test connection and show usage"""
@@ -14,6 +16,11 @@ def main():
         print("\nConnection failed. Make sure Ollama is running ('ollama serve')")
         sys.exit(1)
     
+    # With several Ollama hosts configured, every host in the pool must be reachable
+    if os.getenv('OLLAMA_HOSTS') and not get_ollama_pool().test_connection():
+        print("\nConnection failed for one or more hosts in OLLAMA_HOSTS")
+        sys.exit(1)
+    
     print("\nConnection successful!\n")
     print("="*70)
     print("USAGE")
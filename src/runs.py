@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import argparse
+from lib.run_index import DEFAULT_PATH, SORT_COLUMNS, RunIndex, parse_since
+
+
+def format_duration(seconds) -> str:
+    return f"{seconds:.1f}s" if seconds is not None else "-"
+
+
+def print_runs(runs: list):
+    """Print runs as a table, one line each"""
+
+    if not runs:
+        print("No matching runs")
+        return
+
+    print(f"{'Run ID':<26}{'Started':<18}{'Duration':>10}{'Fact-check':>12}{'Words':>8}  Title")
+    for run in runs:
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(run['created_at']))
+        fact_check = {True: 'passed', False: 'FAILED'}.get(run['fact_check_passed'], '-')
+        words = run['final_words'] if run['final_words'] is not None else '-'
+        print(f"{run['run_id']:<26}{started:<18}{format_duration(run['duration']):>10}"
+              f"{fact_check:>12}{words:>8}  {run['title'] or 'Untitled'}")
+    print(f"\n{len(runs)} run(s)")
+
+
+def print_run(run: dict):
+    """Print one run with its stage timings"""
+
+    for key, value in run.items():
+        if key != 'stage_timings':
+            print(f"{key:<20}{value}")
+    for stage, seconds in run['stage_timings'].items():
+        print(f"  {stage:<18}{format_duration(seconds)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Query the index of past pipeline runs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+examples:
+  # Runs in the last 24h with a failed fact-check, slowest first
+  python src/runs.py --since 24h --fact-check failed --sort duration
+
+  # One run with its stage timings
+  python src/runs.py --run run_1712345678_1234
+
+  # Totals and mean stage durations for the last week
+  python src/runs.py --stats --since 7d
+
+  # Index runs from existing logs
+  python src/runs.py --rebuild logs/master.jsonl logs/events*.jsonl
+        """
+    )
+    parser.add_argument('--since', type=str, help='Only runs in this window, e.g. 30m, 24h, 7d')
+    parser.add_argument('--fact-check', choices=['passed', 'failed'], help='Filter on the fact-check outcome')
+    parser.add_argument('--status', type=str, help='Filter on run status (e.g. success)')
+    parser.add_argument('--title', type=str, help='Title substring')
+    parser.add_argument('--sort', choices=list(SORT_COLUMNS), default='created_at',
+                       help='Sort key, largest first (default: created_at)')
+    parser.add_argument('--asc', action='store_true', help='Sort smallest first')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum runs to list (default: 20)')
+    parser.add_argument('--run', type=str, help='Show one run')
+    parser.add_argument('--stats', action='store_true', help='Show aggregate statistics')
+    parser.add_argument('--rebuild', nargs='+', metavar='LOG', help='Index pipeline results from JSONL logs')
+    parser.add_argument('--json', action='store_true', help='Print JSON instead of a table')
+    parser.add_argument('--index', type=str, default=os.getenv('RUN_INDEX_PATH', DEFAULT_PATH),
+                       help='Run index SQLite file (default: $RUN_INDEX_PATH or logs/runs.sqlite)')
+
+    args = parser.parse_args()
+
+    index = RunIndex(path=args.index)
+
+    if args.rebuild:
+        print(f"Indexed {index.rebuild(args.rebuild)} runs")
+        return
+
+    try:
+        since = time.time() - parse_since(args.since) if args.since else None
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    if args.run:
+        run = index.get(args.run)
+        if run is None:
+            print(f"Run not found: {args.run}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(run, indent=2))
+        else:
+            print_run(run)
+        return
+
+    if args.stats:
+        print(json.dumps(index.stats(since=since), indent=2))
+        return
+
+    started = time.perf_counter()
+    runs = index.query(
+        since=since,
+        fact_check={'passed': True, 'failed': False}.get(args.fact_check),
+        status=args.status,
+        title=args.title,
+        sort=args.sort,
+        descending=not args.asc,
+        limit=args.limit
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        print(json.dumps(runs, indent=2))
+    else:
+        print_runs(runs)
+        print(f"Query time: {elapsed:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Tests for the async pipeline with stub agents."""
+
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.ollama_pool import token_sink
+
+
+@dataclass
+class Research:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+@dataclass
+class Draft:
+    draft: str
+    success: bool = True
+
+
+@dataclass
+class Check:
+    passed: bool
+    issues: list = field(default_factory=list)
+    feedback: str = ''
+
+
+@dataclass
+class Final:
+    polished: str
+    success: bool = True
+
+
+class Agents:
+    """Stub agents: each call takes `delay` seconds; records calls and peak concurrency."""
+
+    def __init__(self, failed_checks: int = 0, delay: float = 0):
+        self.failed_checks = failed_checks
+        self.delay = delay
+        self.calls = []
+        self.threads = set()
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _call(self, name: str):
+        with self._lock:
+            self.calls.append(name)
+            self.threads.add(threading.current_thread().name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+
+    def researcher(self, prd, run_id):
+        self._call('research')
+        return Research(facts=["Agents plan multi-step tasks."])
+
+    def writer(self, prd, research, run_id, feedback=None, retry_count=0):
+        self._call('write')
+        sink = token_sink.get()
+        for token in ("Agents", " plan"):
+            if sink:
+                sink(token)
+        return Draft(draft="Agents plan.")
+
+    def revise(self, prd, research, draft, fact_check, run_id, retry_count=0):
+        self._call('revise')
+        return Draft(draft="Agents plan carefully.")
+
+    def fact_checker(self, draft, research, run_id, retry_count=0):
+        self._call('fact_check')
+        if self.failed_checks:
+            self.failed_checks -= 1
+            return Check(passed=False, feedback="unsupported")
+        return Check(passed=True)
+
+    def style_polisher(self, draft, prd, run_id):
+        self._call('polish')
+        sink = token_sink.get()
+        if sink:
+            sink("Polished")
+        return Final(polished=draft.draft)
+
+
+def module(name: str, **attributes) -> ModuleType:
+    stub = ModuleType(name)
+    stub.__dict__.update(attributes)
+    return stub
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """src.lib.async_pipeline with its agents, caches and logging replaced by stubs."""
+    agents = Agents()
+    # Stand-ins for the agent modules and output types the module imports
+    for name, stub in {
+        'src.lib.types': module('src.lib.types', PRDInput=SimpleNamespace, ResearchOutput=Research,
+                                WriterOutput=Draft, FactCheckOutput=Check, StylePolisherOutput=Final),
+        'src.lib.logger': module('src.lib.logger', generate_run_id=lambda: 'run-test'),
+        'src.lib.agents': module('src.lib.agents'),
+        'src.lib.agents.writer': module('src.lib.agents.writer', run_writer=agents.writer),
+        'src.lib.agents.style_polisher': module('src.lib.agents.style_polisher',
+                                                run_style_polisher=agents.style_polisher),
+    }.items():
+        monkeypatch.setitem(sys.modules, name, stub)
+
+    module_ = importlib.import_module('src.lib.async_pipeline')
+    monkeypatch.setattr(module_, 'run_researcher_cached', agents.researcher)
+    monkeypatch.setattr(module_, 'run_writer', agents.writer)
+    monkeypatch.setattr(module_, 'run_writer_targeted', agents.revise)
+    monkeypatch.setattr(module_, 'run_fact_checker_incremental', agents.fact_checker)
+    monkeypatch.setattr(module_, 'run_style_polisher', agents.style_polisher)
+    monkeypatch.setattr(module_, 'log_agent_output', lambda *args: None)
+    # A fresh executor, sized from AGENT_CONCURRENCY as set by each test
+    monkeypatch.setattr(module_, '_agent_executor', None)
+    yield SimpleNamespace(module=module_, agents=agents)
+    if module_._agent_executor is not None:
+        module_._agent_executor.shutdown()
+
+
+def prd(n: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(text=f"Write about AI agents {n}", title="AI Agents")
+
+
+def test_progress_callbacks_in_stage_order(pipeline):
+    pipeline.agents.failed_checks = 1
+    progress, tokens = [], []
+
+    async def on_progress(step, percent, message=None):
+        progress.append((step, percent, message))
+
+    result = asyncio.run(pipeline.module.run_pipeline_async(
+        prd(), "run-1", on_progress=on_progress, on_token=lambda step, token: tokens.append((step, token))))
+
+    assert progress == [
+        ("Researcher", 5, None),
+        ("Writer", 30, None),
+        ("Fact-Checker", 55, None),
+        ("Fact-Checker", 60, "Fact check failed, retrying (1/2)..."),
+        ("Style-Polisher", 80, "Polishing content..."),
+    ]
+    assert pipeline.agents.calls == ['research', 'write', 'fact_check', 'revise', 'fact_check', 'polish']
+    assert tokens == [("Writer", "Agents"), ("Writer", " plan"), ("Style-Polisher", "Polished")]
+    assert result['fact_check'].passed
+    assert result['final'].polished == "Agents plan carefully."
+
+
+def test_agent_concurrency_bounds_the_shared_executor(pipeline, monkeypatch):
+    monkeypatch.setenv('AGENT_CONCURRENCY', '2')
+    pipeline.agents.delay = 0.05
+    progress = []
+
+    async def run_all():
+        return await asyncio.gather(*[
+            pipeline.module.run_pipeline_async(prd(n), f"run-{n}",
+                                               on_progress=lambda step, percent, message=None: progress.append(step))
+            for n in range(5)
+        ])
+
+    results = asyncio.run(run_all())
+
+    assert len(results) == 5
+    assert len(pipeline.agents.calls) == 5 * 4
+    assert pipeline.agents.peak == 2
+    assert len(pipeline.agents.threads) == 2
+    assert all(name.startswith('agent') for name in pipeline.agents.threads)
+    # Sync callbacks run on the event loop between stages of every run
+    assert progress.count("Style-Polisher") == 5
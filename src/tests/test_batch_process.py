@@ -0,0 +1,107 @@
+"""Tests for concurrent, resumable batch processing with a stub pipeline."""
+
+import importlib
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class Pipeline:
+    """Stub run_pipeline: writes the post, fails PRDs containing `fail`, tracks concurrency."""
+
+    def __init__(self, delay: float = 0, fail: str = None):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prd_text, title, output_file, checkpoint=None):
+        with self._lock:
+            self.calls.append(title)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if self.fail and self.fail in prd_text:
+                # What run_pipeline does when an agent fails
+                sys.exit(1)
+            Path(output_file).write_text(f"# {title}\n", encoding='utf-8')
+            return {'run_id': f"run-{title}"}
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """src/batch_process.py with cli.run_pipeline replaced by a Pipeline stub."""
+    pipeline = Pipeline()
+    # The real cli imports every agent at module level
+    cli = ModuleType('cli')
+    cli.run_pipeline = pipeline
+    monkeypatch.setitem(sys.modules, 'cli', cli)
+    module = importlib.import_module('batch_process')
+    monkeypatch.setattr(module, 'run_pipeline', pipeline)
+    return SimpleNamespace(process_batch=module.process_batch, pipeline=pipeline)
+
+
+def write_prds(directory: Path, names) -> Path:
+    directory.mkdir()
+    for name in names:
+        (directory / f"{name}.txt").write_text(f"Write a post about {name}.", encoding='utf-8')
+    return directory
+
+
+def read_summary(output_dir: Path) -> dict:
+    entries = json.loads((output_dir / 'batch_summary.json').read_text(encoding='utf-8'))
+    return {entry['file']: entry['status'] for entry in entries}
+
+
+def test_workers_bound_concurrency(batch, tmp_path):
+    batch.pipeline.delay = 0.1
+    prds = write_prds(tmp_path / 'prds', ['a', 'b', 'c', 'd', 'e'])
+
+    batch.process_batch(str(prds), str(tmp_path / 'out'), workers=2)
+
+    assert batch.pipeline.peak == 2
+    assert read_summary(tmp_path / 'out') == {f"{name}.txt": 'success' for name in 'abcde'}
+
+
+def test_resume_reruns_only_unfinished_prds(batch, tmp_path):
+    batch.pipeline.fail = 'about b'
+    prds = write_prds(tmp_path / 'prds', ['a', 'b', 'c'])
+    out = tmp_path / 'out'
+
+    batch.process_batch(str(prds), str(out), workers=2)
+    assert read_summary(out) == {'a.txt': 'success', 'b.txt': 'failed', 'c.txt': 'success'}
+
+    batch.pipeline.fail = None
+    batch.pipeline.calls.clear()
+    batch.process_batch(str(prds), str(out))
+    assert batch.pipeline.calls == ['B']
+    assert set(read_summary(out).values()) == {'success'}
+
+    # --no-resume starts over
+    batch.pipeline.calls.clear()
+    batch.process_batch(str(prds), str(out), resume=False)
+    assert sorted(batch.pipeline.calls) == ['A', 'B', 'C']
+
+
+def test_unreadable_prd_fails_alone(batch, tmp_path):
+    prds = write_prds(tmp_path / 'prds', ['a', 'c'])
+    (prds / 'b.txt').write_bytes(b'\xff\xfe not utf-8 \x80')
+
+    batch.process_batch(str(prds), str(tmp_path / 'out'), workers=2)
+
+    assert read_summary(tmp_path / 'out') == {'a.txt': 'success', 'b.txt': 'failed', 'c.txt': 'success'}
+    assert sorted(batch.pipeline.calls) == ['A', 'C']
@@ -0,0 +1,94 @@
+"""Tests for the resumable batch manifest."""
+
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from src.lib.checkpoint import BatchManifest, content_hash
+
+
+@dataclass
+class Research:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+@dataclass
+class Draft:
+    content: str
+    draft: str
+    word_count: int
+
+
+TYPES = {'research': Research, 'draft': Draft, 'fact_check': dict, 'polish': dict}
+
+
+def test_manifest_survives_reload(tmp_path):
+    """Completed PRDs and stages are remembered across manifest instances."""
+
+    manifest_path = tmp_path / 'batch_manifest.json'
+    prd_hash = content_hash("Write a blog post about AI agents")
+
+    manifest = BatchManifest(manifest_path)
+    checkpoint = manifest.checkpoint(prd_hash, 'ai_agents.txt')
+    checkpoint.set_run_id('run_123')
+    manifest._mark_stage(prd_hash, 'research')
+
+    reloaded = BatchManifest(manifest_path)
+    assert reloaded.completed_stages(prd_hash) == ['research']
+    assert reloaded.checkpoint(prd_hash, 'ai_agents.txt').run_id == 'run_123'
+    assert not reloaded.is_complete(prd_hash)
+
+    reloaded.update(prd_hash, status='success')
+    assert BatchManifest(manifest_path).is_complete(prd_hash)
+
+
+def test_stage_outputs_round_trip(tmp_path):
+    """Saved stage outputs come back as the same models after a restart."""
+
+    manifest_path = tmp_path / 'batch_manifest.json'
+    prd_hash = content_hash("Write a blog post about AI agents")
+    research = Research(sources=[{'title': 'Agents', 'url': 'https://example.com'}], facts=["Agents plan."])
+    draft = Draft(content="# Agents", draft="# Agents", word_count=2)
+
+    checkpoint = BatchManifest(manifest_path, types=TYPES).checkpoint(prd_hash, 'ai_agents.txt')
+    assert checkpoint.load('research') is None
+    checkpoint.save('research', research)
+    checkpoint.save('draft', draft)
+    with pytest.raises(ValueError):
+        checkpoint.save('publish', draft)
+
+    resumed = BatchManifest(manifest_path, types=TYPES).checkpoint(prd_hash, 'ai_agents.txt')
+    assert resumed.load('research') == research
+    assert resumed.load('draft') == draft
+    assert resumed.load('fact_check') is None
+    assert BatchManifest(manifest_path).completed_stages(prd_hash) == ['research', 'draft']
+
+
+def test_unreadable_checkpoint_is_discarded(tmp_path):
+    manifest = BatchManifest(tmp_path / 'batch_manifest.json', types=TYPES)
+    checkpoint = manifest.checkpoint('abc', 'prd.txt')
+    checkpoint.save('draft', Draft(content="x", draft="x", word_count=1))
+    (checkpoint.stage_dir / 'draft.json').write_text('{"content": "x"}')
+
+    assert checkpoint.load('draft') is None
+
+
+def test_content_hash_tracks_content_not_name():
+    """Editing a PRD changes its key, renaming it does not."""
+
+    assert content_hash("same text") == content_hash("same text")
+    assert content_hash("same text") != content_hash("same text, edited")
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_manifest_survives_reload(Path(tmp))
+    test_content_hash_tracks_content_not_name()
+    print("Checkpoint tests passed")
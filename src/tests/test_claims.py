@@ -0,0 +1,253 @@
+"""Tests for claim-level incremental fact-checking and targeted rewrites."""
+
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib import claims
+from src.lib.claims import (ClaimVerdictCache, chunk_sections, claim_key, match_issue,
+                            run_fact_checker_chunked, run_fact_checker_incremental,
+                            run_writer_targeted, source_set_hash, split_claims, split_sections)
+
+DRAFT = """# AI Agents
+
+AI agents plan and execute multi-step tasks. They can call external tools.
+
+## History
+
+The first chatbot, ELIZA, was written in 1966. Modern agents use large language models.
+
+## Outlook
+
+Adoption is expected to grow quickly over the next decade.
+"""
+
+
+@pytest.fixture(autouse=True)
+def no_knowledge_base(monkeypatch):
+    monkeypatch.setenv('KNOWLEDGE_BASE_ENABLED', 'false')
+
+
+@dataclass
+class FakeCheck:
+    passed: bool
+    issues: list = field(default_factory=list)
+    feedback: str = ''
+    content: str = ''
+    success: bool = True
+
+
+@dataclass
+class Draft:
+    content: str
+    draft: str
+    word_count: int
+    success: bool = True
+
+
+@dataclass
+class Research:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+def make_draft(text: str) -> Draft:
+    return Draft(content=text, draft=text, word_count=len(text.split()))
+
+
+def issue(claim: str) -> SimpleNamespace:
+    return SimpleNamespace(claim=claim, severity='high', reason='Not supported by research')
+
+
+class FakeFactChecker:
+    """Flags any sentence containing one of `wrong`; records what it was sent."""
+
+    def __init__(self, wrong, broken=()):
+        self.wrong = wrong
+        self.broken = broken
+        self.calls = []
+        self.evidence = []
+
+    def __call__(self, draft, research, run_id, retry_count=0):
+        self.calls.append(draft.draft)
+        self.evidence.append(list(research.facts))
+        if any(b in draft.draft for b in self.broken):
+            # What the agent reports when its LLM call fails
+            return FakeCheck(passed=False, feedback='Fact-check failed', success=False)
+        found = [issue(claim) for claim in split_claims(draft.draft)
+                 if any(w in claim for w in self.wrong)]
+        return FakeCheck(passed=not found, issues=found, feedback='\n'.join(i.claim for i in found))
+
+
+def test_split_sections_round_trips():
+    sections = split_sections(DRAFT)
+    assert len(sections) == 3
+    assert ''.join(sections) == DRAFT
+    assert sections[1].startswith('## History')
+
+
+def test_split_claims_skips_headings_and_code():
+    section = "## Setup\n\nInstall the package first. Then run the tests.\n\n```\npip install x\n```\n"
+    assert split_claims(section) == ["Install the package first.", "Then run the tests."]
+
+
+def test_match_issue_tolerates_paraphrase():
+    sentences = split_claims(DRAFT)
+    index = match_issue(issue("The first chatbot ELIZA was written in 1966"), sentences)
+    assert sentences[index].startswith("The first chatbot")
+    assert match_issue(issue("Quantum computers broke RSA in 2001"), sentences) is None
+
+
+def test_recheck_only_changed_sections(monkeypatch):
+    research = Research(facts=["ELIZA was created in 1966"])
+    checker = FakeFactChecker(wrong=["grow quickly"])
+    monkeypatch.setattr(claims, 'run_fact_checker', checker)
+    cache = ClaimVerdictCache()
+
+    first = run_fact_checker_incremental(make_draft(DRAFT), research, "run", cache=cache)
+    assert not first.passed
+    assert len(first.issues) == 1
+    assert checker.calls[0] == DRAFT
+
+    # Only the outlook section changes; the other sections' verdicts are reused
+    revised = DRAFT.replace("grow quickly over the next decade", "continue, according to surveys")
+    second = run_fact_checker_incremental(make_draft(revised), research, "run", retry_count=1, cache=cache)
+    assert second.passed
+    assert checker.calls[1].startswith("## Outlook")
+    assert "History" not in checker.calls[1]
+
+    # Nothing changed: no fact-checker call at all
+    third = run_fact_checker_incremental(make_draft(revised), research, "run", retry_count=2, cache=cache,
+                                         output_type=FakeCheck)
+    assert third.passed
+    assert len(checker.calls) == 2
+
+
+def test_unchanged_flagged_claims_keep_failing(monkeypatch):
+    research = Research(facts=[])
+    checker = FakeFactChecker(wrong=["1966"])
+    monkeypatch.setattr(claims, 'run_fact_checker', checker)
+    cache = ClaimVerdictCache()
+
+    run_fact_checker_incremental(make_draft(DRAFT), research, "run", cache=cache)
+    revised = DRAFT.replace("grow quickly", "grow steadily")
+    result = run_fact_checker_incremental(make_draft(revised), research, "run", cache=cache)
+
+    assert not result.passed
+    assert [i.claim for i in result.issues] == ["The first chatbot, ELIZA, was written in 1966."]
+
+
+def test_unmatched_issues_keep_their_chunk_failing(monkeypatch):
+    research = Research(facts=[])
+    calls = []
+
+    def checker(draft, research, run_id, retry_count=0):
+        calls.append(draft.draft)
+        if "grow quickly" not in draft.draft:
+            return FakeCheck(passed=True)
+        # The issue paraphrases the section rather than quoting a claim
+        unsourced = issue("Adoption numbers are unsourced speculation")
+        return FakeCheck(passed=False, issues=[unsourced], feedback=unsourced.claim)
+
+    monkeypatch.setattr(claims, 'run_fact_checker', checker)
+    cache = ClaimVerdictCache()
+
+    first = run_fact_checker_incremental(make_draft(DRAFT), research, "run", cache=cache)
+    assert not first.passed
+    assert len(cache) == 0
+
+    # Nothing was fixed, so the retry checks the draft again and still fails
+    second = run_fact_checker_incremental(make_draft(DRAFT), research, "run", retry_count=1, cache=cache)
+    assert not second.passed
+    assert [i.claim for i in second.issues] == ["Adoption numbers are unsourced speculation"]
+    assert len(calls) == 2
+
+
+def test_targeted_rewrite_touches_only_flagged_sections(monkeypatch):
+    prd = SimpleNamespace(text="Write about AI agents", title="AI Agents")
+    research = Research(facts=[])
+    rewritten = []
+
+    def fake_rewrite(section, issues, session):
+        rewritten.append(section)
+        return "## History\n\nELIZA dates from the mid-1960s.\n\n"
+
+    monkeypatch.setattr(claims, 'rewrite_section', fake_rewrite)
+    monkeypatch.setattr(claims, 'get_prompt_session', lambda run_id, prd, research: None)
+    fact_check = FakeCheck(passed=False, issues=[issue("ELIZA was written in 1966")])
+
+    draft = run_writer_targeted(prd, research, make_draft(DRAFT), fact_check, "run", retry_count=1)
+
+    assert len(rewritten) == 1
+    assert "mid-1960s" in draft.draft
+    assert draft.draft.startswith("# AI Agents\n\nAI agents plan")
+    assert draft.draft.endswith(split_sections(DRAFT)[2])
+
+
+def test_chunks_respect_heading_boundaries():
+    sections = split_sections(DRAFT)
+    chunks = chunk_sections(sections, max_words=32)
+
+    assert ''.join(chunks) == DRAFT
+    assert chunks == [sections[0] + sections[1], sections[2]]
+
+
+def test_chunked_check_merges_in_chunk_order(monkeypatch):
+    research = Research(facts=[f"fact {i}" for i in range(20)])
+    checker = FakeFactChecker(wrong=["tools", "1966"])
+    monkeypatch.setattr(claims, 'run_fact_checker', checker)
+    monkeypatch.setenv('FACT_CHECK_CHUNK_WORDS', '20')
+
+    result = run_fact_checker_chunked(make_draft(DRAFT), research, "run")
+
+    assert len(checker.calls) == 3
+    assert not result.passed
+    assert [i.claim for i in result.issues] == [
+        "They can call external tools.",
+        "The first chatbot, ELIZA, was written in 1966.",
+    ]
+
+
+def test_each_chunk_gets_only_its_relevant_facts(monkeypatch):
+    facts = [f"Unrelated fact number {i} about databases." for i in range(20)]
+    facts += ["ELIZA was written in 1966 by Joseph Weizenbaum.", "Agent adoption is expected to grow."]
+    checker = FakeFactChecker(wrong=[])
+    monkeypatch.setattr(claims, 'run_fact_checker', checker)
+    monkeypatch.setenv('FACT_CHECK_CHUNK_WORDS', '20')
+    monkeypatch.setenv('FACT_CHECK_FACTS_PER_CHUNK', '3')
+
+    result = run_fact_checker_chunked(make_draft(DRAFT), Research(facts=facts), "run")
+
+    assert result.passed
+    assert all(len(evidence) <= 3 for evidence in checker.evidence)
+    history = checker.calls.index(split_sections(DRAFT)[1])
+    assert checker.evidence[history][0].startswith("ELIZA was written in 1966")
+
+
+def test_failed_chunk_verdicts_are_not_cached(monkeypatch):
+    research = Research(facts=["ELIZA was created in 1966"])
+    checker = FakeFactChecker(wrong=[], broken=["ELIZA"])
+    monkeypatch.setattr(claims, 'run_fact_checker', checker)
+    monkeypatch.setenv('FACT_CHECK_CHUNK_WORDS', '20')
+    cache = ClaimVerdictCache()
+    sources_hash = source_set_hash(research)
+
+    result = run_fact_checker_incremental(make_draft(DRAFT), research, "run", cache=cache)
+
+    assert not result.success
+    assert not result.passed
+    history, outlook = split_sections(DRAFT)[1:]
+    assert all(cache.get(claim_key(claim, sources_hash)) is None for claim in split_claims(history))
+    assert all(cache.get(claim_key(claim, sources_hash)) == ([], False) for claim in split_claims(outlook))
+
+    # The retry re-checks only the chunk that failed
+    checker.broken = ()
+    retry = run_fact_checker_incremental(make_draft(DRAFT), research, "run", retry_count=1, cache=cache)
+    assert retry.passed
+    assert checker.calls[-1] == history
@@ -0,0 +1,92 @@
+"""Tests for render-once multi-format export."""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import docx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib import export
+from src.lib.export import export_format, export_formats, render_document
+
+SAMPLE = """# Agents
+
+Agents **plan** and *act* with `tools`.
+
+- Plan
+    - Decompose
+- Act
+
+```python
+print("hi")
+```
+
+| Step | Cost |
+|------|------|
+| Plan | Low |
+"""
+
+
+def test_markdown_is_parsed_once(monkeypatch):
+    calls = []
+    parse = export.markdown2.markdown
+    monkeypatch.setattr(export.markdown2, 'markdown', lambda *a, **kw: calls.append(1) or parse(*a, **kw))
+
+    doc = render_document(SAMPLE + "\nParsed once.", "Agents")
+    assert render_document(SAMPLE + "\nParsed once.", "Agents") is doc
+    assert len(calls) == 1
+    assert '<h1>Agents</h1>' in doc.html and '<title>Agents</title>' in doc.html
+
+
+def test_export_formats_share_one_rendering_and_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('EXPORT_CACHE_DIR', str(tmp_path / 'cache'))
+    rendered = []
+    for fmt, renderer in list(export.RENDERERS.items()):
+        monkeypatch.setitem(export.RENDERERS, fmt,
+                            lambda doc, path, fmt=fmt, renderer=renderer: rendered.append(fmt) or renderer(doc, path))
+
+    paths = export_formats(SAMPLE, ['md', 'html', 'pdf', 'docx'], str(tmp_path / 'out'), "Agents")
+    assert sorted(rendered) == ['docx', 'html', 'md', 'pdf']
+    assert Path(paths['md']).read_text() == SAMPLE
+    assert Path(paths['pdf']).read_bytes().startswith(b'%PDF')
+
+    document = docx.Document(paths['docx'])
+    styles = [(p.style.name, p.text) for p in document.paragraphs]
+    assert ('Heading 1', 'Agents') in styles
+    assert ('List Bullet 2', 'Decompose') in styles
+    assert ('Normal', 'print("hi")') in styles
+    assert document.tables[0].cell(1, 1).text == 'Low'
+    bold = [r.text for p in document.paragraphs for r in p.runs if r.bold]
+    assert bold == ['plan']
+
+    # Same content again is served from the cache without rendering
+    export_format(SAMPLE, 'pdf', str(tmp_path / 'again.pdf'), "Agents")
+    assert len(rendered) == 4
+    assert (tmp_path / 'again.pdf').read_bytes() == Path(paths['pdf']).read_bytes()
+
+
+def test_export_cache_evicts_old_then_least_recently_used(tmp_path, monkeypatch):
+    cache = tmp_path / 'cache'
+    monkeypatch.setenv('EXPORT_CACHE_DIR', str(cache))
+    monkeypatch.setenv('EXPORT_CACHE_MAX_BYTES', '800')
+    now = time.time()
+    for name, age in [('stale.pdf', 30 * 86400), ('old.html', 300), ('recent.html', 60)]:
+        path = cache / name
+        cache.mkdir(exist_ok=True)
+        path.write_bytes(b'x' * 400)
+        os.utime(path, (now - age, now - age))
+
+    export_format(SAMPLE, 'md', str(tmp_path / 'out.md'), "Agents")
+
+    # The stale file is past the age limit; the older of the rest goes to fit 800 bytes
+    remaining = sorted(path.name for path in cache.iterdir())
+    assert remaining == sorted(['recent.html', f"{render_document(SAMPLE, 'Agents').key}.md"])
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError, match='rtf'):
+        export_formats(SAMPLE, ['md', 'rtf'], str(tmp_path))
@@ -4,13 +4,17 @@
 # Add src to python path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from lib.formatters import convert_to_format
+from lib.export import export_formats
 
-from lib.formatters import convert_to_format
-
-def test_all_formats():
+def test_all_formats(tmp_path, monkeypatch):
     """Test all output formats"""
     
+    # Keep rendered files and the export cache out of the working tree
+    monkeypatch.setenv('EXPORT_CACHE_DIR', str(tmp_path / 'cache'))
+    export_all_formats(tmp_path / 'test_outputs')
+
+
+def export_all_formats(output_dir: Path):
     sample_markdown = """
 # Introduction to AI Agents
 
@@ -37,39 +41,39 @@ def simple_agent():
 **Bold text** and *italic text* for emphasis.
 """
     
-    output_dir = Path('test_outputs')
     output_dir.mkdir(exist_ok=True)
     
     formats = ['md', 'html', 'pdf', 'docx']
     
     print("Testing Output Formats\n")
     
+    # All formats come from one markdown parse, rendered concurrently
+    try:
+        results = export_formats(
+            sample_markdown,
+            formats,
+            str(output_dir),
+            "AI Agents Guide",
+            basename="test_output"
+        )
+    except Exception as e:
+        print(f"  Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise
+    
     for fmt in formats:
-        print(f"Testing {fmt.upper()}...")
-        
-        output_path = output_dir / f"test_output.{fmt}"
+        result_path = results[fmt]
         
-        try:
-            result_path = convert_to_format(
-                sample_markdown,
-                fmt,
-                str(output_path),
-                "AI Agents Guide"
-            )
-            
-            # Check file was created
-            if Path(result_path).exists():
-                size = Path(result_path).stat().st_size
-                print(f"  Success: {result_path} ({size} bytes)")
-            else:
-                print(f"  Failed: File not created")
-                
-        except Exception as e:
-            print(f"  Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        # Check file was created
+        if Path(result_path).exists():
+            size = Path(result_path).stat().st_size
+            print(f"  {fmt.upper()} success: {result_path} ({size} bytes)")
+        else:
+            print(f"  {fmt.upper()} failed: File not created")
+        assert Path(result_path).exists()
     
     print(f"\nAll test files saved to: {output_dir.absolute()}")
 
 if __name__ == "__main__":
-    test_all_formats()
+    export_all_formats(Path('test_outputs'))
@@ -0,0 +1,133 @@
+"""Tests for the cross-run knowledge base."""
+
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.knowledge_base import KnowledgeBase, research_from_knowledge, run_researcher_with_knowledge
+
+
+@dataclass
+class Research:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+def make_research() -> Research:
+    return Research(
+        sources=[
+            SimpleNamespace(title='Research Article: Rust ownership', url='https://example.com/rust',
+                            snippet='Ownership and borrowing in Rust', relevance=0.9),
+            SimpleNamespace(title='Research Article: Python GIL', url='https://example.com/gil',
+                            snippet='The global interpreter lock', relevance=0.8),
+        ],
+        facts=[
+            "Rust ownership rules are checked by the borrow checker at compile time.",
+            "Rust ownership removes the need for a garbage collector.",
+            "The Python GIL allows only one thread to execute bytecode at a time.",
+        ],
+    )
+
+
+def rust_prd() -> SimpleNamespace:
+    return SimpleNamespace(text="Explain Rust ownership and the borrow checker", title="Rust ownership")
+
+
+def test_facts_are_attributed_and_searchable(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    kb.add_research(make_research(), "run-1")
+
+    results = kb.search("rust ownership borrow checker")
+    assert results[0]['text'].startswith("Rust ownership rules")
+    assert results[0]['source']['url'] == 'https://example.com/rust'
+    assert results[0]['verdict'] == 'sourced'
+
+    # Re-adding the same research does not duplicate facts
+    kb.add_research(make_research(), "run-2")
+    assert len(kb) == 3
+
+
+def test_claim_verdicts(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    kb.record_claims(["Rust was first released in 2015."], 'verified', "run-1")
+    kb.record_claims(["Python has no threads at all."], 'disputed', "run-1")
+
+    assert kb.claim_verdict("Rust was first released in 2015") == 'verified'
+    assert kb.claim_verdict("Unknown claim here.") is None
+    assert kb.search("python threads") == []
+    assert kb.search("python threads", include_disputed=True)[0]['verdict'] == 'disputed'
+
+    # A later research sighting does not downgrade a fact-check verdict
+    kb.add_research(Research(facts=["Rust was first released in 2015."]), "run-2")
+    assert kb.claim_verdict("Rust was first released in 2015.") == 'verified'
+
+    # ...and a passing fact-check does not turn a research fact into a claim
+    kb.add_research(Research(facts=["Python 3.13 can run without the GIL."]), "run-2")
+    kb.record_claims(["Python 3.13 can run without the GIL."], 'verified', "run-3")
+    assert kb.claim_verdict("Python 3.13 can run without the GIL.") == 'sourced'
+
+
+def test_research_served_only_with_enough_matches(tmp_path, monkeypatch):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    kb.add_research(make_research(), "run-1")
+
+    monkeypatch.setenv('KNOWLEDGE_MIN_FACTS', '5')
+    assert research_from_knowledge(rust_prd(), kb, output_type=Research) is None
+
+    monkeypatch.setenv('KNOWLEDGE_MIN_FACTS', '2')
+    research = research_from_knowledge(rust_prd(), kb, output_type=Research)
+    assert len(research.facts) == 2
+    assert all('Rust' in fact for fact in research.facts)
+    assert [s['url'] for s in research.sources] == ['https://example.com/rust']
+
+
+def test_verified_claims_are_never_served_as_research(tmp_path, monkeypatch):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    kb.record_claims([
+        "Rust ownership is checked by the borrow checker.",
+        "Rust ownership makes the borrow checker fast.",
+        "The Rust borrow checker explains ownership errors.",
+    ], 'verified', "run-1")
+    monkeypatch.setenv('KNOWLEDGE_MIN_FACTS', '1')
+
+    assert len(kb.search("rust ownership borrow checker")) == 3
+    assert research_from_knowledge(rust_prd(), kb, output_type=Research) is None
+
+
+def test_stale_facts_are_not_served(tmp_path, monkeypatch):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    kb.add_research(make_research(), "run-1")
+    monkeypatch.setenv('KNOWLEDGE_MIN_FACTS', '2')
+    monkeypatch.setenv('KNOWLEDGE_MAX_AGE', '3600')
+    assert research_from_knowledge(rust_prd(), kb, output_type=Research) is not None
+
+    with sqlite3.connect(str(kb.path)) as conn:
+        conn.execute("UPDATE facts SET updated_at = ?", (time.time() - 7200,))
+    conn.close()
+    assert research_from_knowledge(rust_prd(), kb, output_type=Research) is None
+    assert len(kb.search("rust ownership borrow checker", max_age=86400)) == 2
+
+    # Research seeing the facts again makes them servable again
+    kb.add_research(make_research(), "run-2")
+    assert research_from_knowledge(rust_prd(), kb, output_type=Research) is not None
+
+
+def test_research_feeds_an_explicitly_passed_empty_knowledge_base(tmp_path, monkeypatch):
+    researcher = ModuleType('src.lib.agents.researcher')
+    researcher.run_researcher = lambda prd, run_id: make_research()
+    monkeypatch.setitem(sys.modules, 'src.lib.agents', ModuleType('src.lib.agents'))
+    monkeypatch.setitem(sys.modules, 'src.lib.agents.researcher', researcher)
+    monkeypatch.setenv('KNOWLEDGE_BASE_ENABLED', 'false')
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+
+    # Empty, so falsy, but still the knowledge base to use
+    research = run_researcher_with_knowledge(rust_prd(), "run-1", kb=kb)
+
+    assert research.facts == make_research().facts
+    assert len(kb) == 3
@@ -0,0 +1,153 @@
+"""Tests for the background log writer."""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib import log_writer
+from src.lib.log_writer import LogWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = LogWriter(directory=str(tmp_path / 'logs'), blob_threshold=64, sync=False)
+    yield writer
+    writer.close()
+
+
+def read_events(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_large_payloads_become_shared_blobs(writer):
+    post = "Agents plan and act. " * 50
+    writer.write({'event': 'pipeline_result', 'run_id': 'run-1', 'final_content': post})
+    writer.write({'event': 'pipeline_result', 'run_id': 'run-2', 'final_content': post, 'status': 'ok'})
+    assert writer.flush(timeout=5)
+
+    first, second = read_events(writer.events_path)
+    assert first['final_content'] == second['final_content']
+    assert first['final_content']['bytes'] == len(post)
+    assert writer.blobs.get_text(first['final_content']['blob']) == post
+    assert second['status'] == 'ok' and second['ts'] > 0
+    assert len(list((writer.directory / 'blobs').rglob('*.gz'))) == 1
+
+
+def test_rotates_by_size(tmp_path):
+    writer = LogWriter(directory=str(tmp_path / 'logs'), rotate_bytes=200, sync=False)
+    for i in range(10):
+        writer.write({'event': 'agent', 'run_id': f'run-{i}', 'agent': 'Writer'})
+        writer.flush(timeout=5)
+    writer.close()
+
+    rotated = sorted(writer.directory.glob('events-*.jsonl'))
+    assert rotated
+    runs = [record['run_id'] for path in rotated + [writer.events_path] if path.exists()
+            for record in read_events(path)]
+    assert runs == [f'run-{i}' for i in range(10)]
+
+
+def blob_digests(path: Path) -> set:
+    return {record['final_content']['blob'] for record in read_events(path)}
+
+
+def test_retention_keeps_newest_files_and_their_blobs(tmp_path):
+    writer = LogWriter(directory=str(tmp_path / 'logs'), blob_threshold=64, rotate_bytes=1,
+                       keep_files=2, retention_seconds=0, sync=False)
+    shared = "Shared across runs. " * 20
+    for i in range(5):
+        # Each batch rotates; the first and last runs reference the same blob
+        content = shared if i in (0, 4) else f"Run {i} content. " * 20
+        writer.write({'event': 'pipeline_result', 'run_id': f'run-{i}', 'final_content': content})
+        writer.flush(timeout=5)
+    writer.close()
+
+    rotated = sorted(writer.directory.glob('events-*.jsonl'))
+    assert [read_events(path)[0]['run_id'] for path in rotated] == ['run-3', 'run-4']
+    referenced = set().union(*(blob_digests(path) for path in rotated))
+    stored = {path.name[:-len('.gz')] for path in (writer.directory / 'blobs').rglob('*.gz')}
+    assert stored == referenced
+    assert writer.blobs.get_text(read_events(rotated[-1])[0]['final_content']['blob']) == shared
+
+
+def test_retention_drops_old_files_and_blobs(tmp_path):
+    writer = LogWriter(directory=str(tmp_path / 'logs'), blob_threshold=64, rotate_bytes=1,
+                       keep_files=0, retention_seconds=3600, sync=False)
+    writer.write({'event': 'pipeline_result', 'run_id': 'old', 'final_content': "Old post. " * 20})
+    writer.flush(timeout=5)
+    old_file, = writer.directory.glob('events-*.jsonl')
+    old_blob, = (writer.directory / 'blobs').rglob('*.gz')
+    two_hours_ago = time.time() - 7200
+    for path in (old_file, old_blob):
+        os.utime(path, (two_hours_ago, two_hours_ago))
+
+    writer.write({'event': 'pipeline_result', 'run_id': 'new', 'final_content': "New post. " * 20})
+    writer.close()
+
+    rotated, = writer.directory.glob('events-*.jsonl')
+    assert read_events(rotated)[0]['run_id'] == 'new'
+    assert not old_blob.exists()
+    assert len(list((writer.directory / 'blobs').rglob('*.gz'))) == 1
+
+
+def test_close_drains_the_queue(writer):
+    for i in range(500):
+        writer.write({'event': 'agent', 'run_id': 'run-1', 'attempt': i})
+    writer.close()
+    assert [record['attempt'] for record in read_events(writer.events_path)] == list(range(500))
+
+
+def test_disabled_drops_records(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOG_TO_FILE', 'false')
+    monkeypatch.setenv('LOG_DIR', str(tmp_path / 'logs'))
+    assert log_writer.get_log_writer() is None
+    log_writer.log_agent_output('run-1', 'Writer', {'content': 'x'}, 1.0)
+    assert not (tmp_path / 'logs').exists()
+
+
+def test_processes_write_and_rotate_their_own_files(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'logs')
+    monkeypatch.setattr(log_writer.os, 'getpid', lambda: 101)
+    first = LogWriter(directory=directory, rotate_bytes=1, sync=False)
+    monkeypatch.setattr(log_writer.os, 'getpid', lambda: 102)
+    second = LogWriter(directory=directory, rotate_bytes=10 ** 6, sync=False)
+
+    second.write({'event': 'agent', 'run_id': 'second-1'})
+    assert second.flush(timeout=5)
+    first.write({'event': 'agent', 'run_id': 'first-1'})
+    assert first.flush(timeout=5)
+    second.write({'event': 'agent', 'run_id': 'second-2'})
+    first.close()
+    second.close()
+
+    # The first writer's rotation left the second one's file in place
+    rotated, = first.directory.glob('events-*.jsonl')
+    assert rotated.name.endswith('-101.jsonl')
+    assert [record['run_id'] for record in read_events(rotated)] == ['first-1']
+    assert [record['run_id'] for record in read_events(second.events_path)] == ['second-1', 'second-2']
+
+
+def test_orphaned_files_of_exited_processes_are_rotated(tmp_path):
+    directory = tmp_path / 'logs'
+    directory.mkdir()
+    # Beyond any pid_max, so never a running process
+    orphan = directory / f'events.{2 ** 31 - 1}.jsonl'
+    orphan.write_text(json.dumps({'event': 'agent', 'run_id': 'orphan', 'ts': 1.0}) + '\n')
+
+    writer = LogWriter(directory=str(directory), sync=False)
+    writer.close()
+
+    assert not orphan.exists()
+    rotated, = directory.glob('events-*.jsonl')
+    assert read_events(rotated)[0]['run_id'] == 'orphan'
+
+
+def test_flush_returns_when_the_writer_thread_is_dead(writer):
+    writer.close()
+    assert writer.flush() is False
@@ -0,0 +1,110 @@
+"""Tests for the pooled Ollama client against the benchmarks' fake server."""
+
+import http.client
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from benchmarks.fake_ollama import FakeOllama
+from src.lib.ollama_pool import OllamaPool
+
+
+@pytest.fixture
+def fake():
+    server = FakeOllama(latency=0, tokens_per_second=10000, tokens=8)
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_pool(fake: FakeOllama, **kwargs) -> OllamaPool:
+    return OllamaPool(hosts=[fake.url], model='phi3', timeout=10, **kwargs)
+
+
+def test_keep_alive_connections_are_reused(fake):
+    pool = make_pool(fake)
+    replies = [pool.generate(f"prompt {i}") for i in range(5)]
+    tokens = []
+    pool.generate("streamed", on_token=tokens.append)
+
+    assert all(reply['response'] for reply in replies)
+    assert ''.join(tokens) == fake.reply("streamed")
+    assert fake.requests == 6
+    assert fake.connections == 1
+
+
+def test_concurrency_is_bounded(fake):
+    fake.latency = 0.1
+    pool = make_pool(fake, max_concurrency=2)
+
+    threads = [threading.Thread(target=pool.generate, args=(f"prompt {i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake.requests == 6
+    assert fake.peak == 2
+    assert fake.connections == 2
+
+
+def test_idle_connection_closed_by_server_is_replaced(fake):
+    pool = make_pool(fake)
+    pool.generate("first")
+    # Simulate the server's keep-alive timeout closing the idle connection
+    idle, = pool.hosts[0]._idle
+    idle.sock.shutdown(2)
+
+    assert pool.generate("second")['response']
+    assert fake.requests == 2
+    assert fake.connections == 2
+
+
+def test_idempotent_request_is_retried_once(fake):
+    pool = make_pool(fake)
+    pool.request('GET', '/api/tags')
+
+    fake.drop_requests = 1
+    assert pool.request('GET', '/api/tags')['models']
+    assert fake.requests == 3
+
+    fake.drop_requests = 2
+    with pytest.raises(http.client.RemoteDisconnected):
+        pool.request('GET', '/api/tags')
+    assert fake.requests == 5
+
+
+def test_generation_is_not_replayed_once_sent(fake):
+    pool = make_pool(fake)
+    pool.generate("first")
+
+    # The server got the whole request on a reused connection, then dropped it
+    fake.drop_requests = 1
+    with pytest.raises(http.client.RemoteDisconnected):
+        pool.generate("second")
+    pool.generate("third")
+    fake.drop_requests = 1
+    with pytest.raises(http.client.RemoteDisconnected):
+        pool.generate("streamed", on_token=lambda token: None)
+    assert fake.requests == 4
+
+    assert pool.generate("fourth")['response']
+
+
+def test_requests_go_to_the_least_busy_host(fake):
+    pool = OllamaPool(hosts=[fake.url, fake.url], model='phi3', timeout=10)
+    first, second = pool.hosts
+
+    busy = pool._pick_host()
+    assert busy is first
+    assert pool.least_busy_host() is second
+    pool._release_host(busy)
+
+    # Both idle: ties go to the host that has served fewer requests
+    pool.request('GET', '/api/tags')
+    assert (first.requests, second.requests) == (1, 1)
+    assert pool.least_busy_host() is first
@@ -0,0 +1,45 @@
+"""Tests for process-isolated rendering."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.render_pool import RenderPool, RenderTimeout
+
+SAMPLE = "# Agents\n\nAgents **plan** and act.\n\n- Plan\n- Act\n"
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setenv('EXPORT_CACHE_DIR', str(tmp_path / 'cache'))
+    pool = RenderPool(max_workers=1, timeout=30, memory_mb=2048)
+    yield pool
+    pool.shutdown()
+
+
+def test_render_in_worker_process(pool, tmp_path):
+    path = pool.render(SAMPLE, 'docx', str(tmp_path / 'post.docx'), "Agents")
+    assert Path(path).stat().st_size > 0
+
+    path = asyncio.run(pool.arender(SAMPLE, 'pdf', str(tmp_path / 'post.pdf'), "Agents"))
+    assert Path(path).read_bytes().startswith(b'%PDF')
+
+
+def test_timeout_restarts_the_pool(pool, tmp_path):
+    # A fresh worker cannot even start within 1ms
+    pool.timeout = 0.001
+    with pytest.raises(RenderTimeout):
+        pool.render(SAMPLE, 'pdf', str(tmp_path / 'slow.pdf'), "Agents")
+
+    pool.timeout = 30
+    path = pool.render(SAMPLE, 'md', str(tmp_path / 'post.md'), "Agents")
+    assert Path(path).read_text() == SAMPLE
+
+
+def test_unsupported_format_error_reaches_caller(pool, tmp_path):
+    with pytest.raises(ValueError, match='rtf'):
+        pool.render(SAMPLE, 'rtf', str(tmp_path / 'post.rtf'))
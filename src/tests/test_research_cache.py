@@ -0,0 +1,126 @@
+"""Tests for the persistent research cache."""
+
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib import knowledge_base
+from src.lib.research_cache import ResearchCache, normalize_prd_text, run_researcher_cached
+
+
+@dataclass
+class Research:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+def test_normalization_ignores_formatting():
+    """Whitespace, case and markdown markers do not change the key text."""
+
+    a = "# Blog Post: AI Agents\n\nWrite   an 800-word post"
+    b = "blog post: ai agents write an 800 word post"
+    assert normalize_prd_text(a) == normalize_prd_text(b)
+
+
+def test_ttl_expiry(tmp_path):
+    """Entries older than the TTL are treated as misses."""
+
+    cache = ResearchCache(path=str(tmp_path / 'cache.sqlite'), ttl_seconds=1)
+    cache.put('key', ['ai agents'], {'facts': ['a fact']})
+    assert cache.get('key') == {'facts': ['a fact']}
+
+    time.sleep(1.1)
+    assert cache.get('key') is None
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entry is evicted once the size limit is hit."""
+
+    cache = ResearchCache(path=str(tmp_path / 'cache.sqlite'), max_entries=2)
+    cache.put('first', [], {'n': 1})
+    time.sleep(0.01)
+    cache.put('second', [], {'n': 2})
+    time.sleep(0.01)
+    cache.get('first')
+    time.sleep(0.01)
+    cache.put('third', [], {'n': 3})
+
+    assert len(cache) == 2
+    assert cache.get('second') is None
+    assert cache.get('first') == {'n': 1}
+
+
+def test_invalidate_topic(tmp_path):
+    cache = ResearchCache(path=str(tmp_path / 'cache.sqlite'))
+    cache.put('a', ['ai agents', 'llms'], {})
+    cache.put('b', ['python'], {})
+
+    assert cache.invalidate_topic('LLMs') == 1
+    assert cache.get('a') is None
+    assert cache.get('b') == {}
+
+
+def test_run_researcher_cached_misses_then_hits(tmp_path, monkeypatch):
+    """The first run researches and caches; a repeat of the PRD is served from the cache."""
+
+    calls = []
+
+    def researcher(prd, run_id):
+        calls.append(run_id)
+        return Research(facts=[f"Fact from {run_id}"], success=run_id != 'run-failed')
+
+    monkeypatch.setattr(knowledge_base, 'run_researcher_with_knowledge', researcher)
+    monkeypatch.setitem(sys.modules, 'src.lib.types', ModuleType('src.lib.types'))
+    sys.modules['src.lib.types'].ResearchOutput = Research
+    # Explicitly passed, and empty (so falsy) until the first put
+    cache = ResearchCache(path=str(tmp_path / 'cache.sqlite'))
+    prd = SimpleNamespace(text="Write about AI agents", title="AI Agents")
+
+    first = run_researcher_cached(prd, 'run-1', cache=cache)
+    second = run_researcher_cached(SimpleNamespace(text="write about  AI agents", title="ai agents"),
+                                   'run-2', cache=cache)
+
+    assert calls == ['run-1']
+    assert second == first == Research(facts=["Fact from run-1"])
+    assert len(cache) == 1
+
+    # Failed research is not cached, so the next run tries again
+    other = SimpleNamespace(text="Write about databases", title=None)
+    run_researcher_cached(other, 'run-failed', cache=cache)
+    assert run_researcher_cached(other, 'run-3', cache=cache).success
+    assert calls == ['run-1', 'run-failed', 'run-3']
+
+
+def test_connections_are_closed(tmp_path, monkeypatch):
+    """Every operation closes its connection, including ones that fail."""
+
+    import sqlite3
+    from src.lib import research_cache
+
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(research_cache.sqlite3, 'connect', tracking_connect)
+    cache = ResearchCache(path=str(tmp_path / 'cache.sqlite'))
+    cache.put('a', ['ai agents'], {'n': 1})
+    assert cache.get('a') == {'n': 1}
+    assert len(cache) == 1
+    with pytest.raises(TypeError):
+        cache.put('b', [], {'n': object()})
+
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
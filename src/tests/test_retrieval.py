@@ -0,0 +1,71 @@
+"""Tests for BM25 retrieval over research facts and sources."""
+
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.retrieval import BM25Index, ResearchIndex, focus_research
+
+FACTS = [
+    "Python was created by Guido van Rossum and released in 1991.",
+    "Rust guarantees memory safety without a garbage collector.",
+    "The Python Global Interpreter Lock limits CPU-bound threading.",
+    "Kubernetes schedules containers across a cluster of nodes.",
+    "Rust's borrow checker enforces ownership rules at compile time.",
+]
+
+
+@dataclass
+class Research:
+    sources: list = field(default_factory=list)
+    facts: list = field(default_factory=list)
+    success: bool = True
+
+
+def source(title: str, snippet: str = '') -> SimpleNamespace:
+    return SimpleNamespace(title=title, url="https://example.com", snippet=snippet)
+
+
+def test_bm25_ranks_matching_documents_first():
+    index = BM25Index(FACTS)
+    assert index.top_k("rust memory safety", 2) == [1, 4]
+    assert index.top_k("quantum chromodynamics", 3) == []
+
+
+def test_focus_keeps_original_order_and_bounds_size():
+    research = Research(facts=FACTS)
+    focused = ResearchIndex(research).focus("python threading", max_facts=2)
+
+    assert focused.facts == [FACTS[0], FACTS[2]]
+    assert research.facts == FACTS
+
+
+def test_focus_research_is_noop_for_small_research():
+    research = Research(facts=FACTS[:3])
+    prd = SimpleNamespace(text="Write about Rust", title="Rust")
+    assert focus_research(prd, research) is research
+
+
+def test_unmatched_query_falls_back_to_first_facts():
+    research = Research(facts=FACTS)
+    focused = ResearchIndex(research).focus("zzz", max_facts=2)
+    assert focused.facts == FACTS[:2]
+
+
+def test_focus_research_trims_facts_and_sources(monkeypatch):
+    monkeypatch.setenv('RETRIEVAL_MAX_FACTS', '2')
+    monkeypatch.setenv('RETRIEVAL_MAX_SOURCES', '1')
+    research = Research(
+        sources=[source("Python threading guide", "The GIL and threads"), source("Rust book", "Ownership")],
+        facts=FACTS,
+    )
+    prd = SimpleNamespace(text="Explain Rust ownership and the borrow checker", title="Rust ownership")
+
+    focused = focus_research(prd, research)
+
+    assert focused.facts == [FACTS[1], FACTS[4]]
+    assert [s.title for s in focused.sources] == ["Rust book"]
+    assert len(research.facts) == len(FACTS)
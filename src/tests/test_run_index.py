@@ -0,0 +1,101 @@
+"""Tests for the run index."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.log_writer import LogWriter
+from src.lib.run_index import RunIndex, parse_since
+
+
+def make_result(run_id: str, age: float, duration: float, passed: bool, **fields) -> dict:
+    return {
+        'run_id': run_id,
+        'prd_title': f"Post {run_id}",
+        'ts': time.time() - age,
+        'duration_seconds': duration,
+        'stage_timings': {'Researcher': duration / 4, 'Fact-Checker': duration / 2},
+        'fact_check': {'passed': passed, 'issues': 0 if passed else 3},
+        'final': {'word_count': 800},
+        'status': 'success',
+        **fields
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    return RunIndex(path=str(tmp_path / 'runs.sqlite'))
+
+
+def test_failed_fact_checks_in_window_by_duration(index):
+    index.record([
+        make_result('recent-slow', 3600, 90.0, False),
+        make_result('recent-fast', 600, 30.0, False),
+        make_result('recent-passed', 600, 120.0, True),
+        make_result('old-failed', 3 * 86400, 200.0, False),
+    ])
+
+    runs = index.query(since=time.time() - parse_since('24h'), fact_check=False, sort='duration')
+    assert [run['run_id'] for run in runs] == ['recent-slow', 'recent-fast']
+    assert runs[0]['fact_check_passed'] is False
+    assert runs[0]['fact_check_issues'] == 3
+    assert runs[0]['stage_timings'] == {'Researcher': 22.5, 'Fact-Checker': 45.0}
+
+    assert [run['run_id'] for run in index.query(sort='duration', descending=False, limit=2)] == \
+        ['recent-fast', 'recent-slow']
+    assert index.query(title='old-')[0]['run_id'] == 'old-failed'
+    with pytest.raises(ValueError):
+        index.query(sort='title')
+
+
+def test_get_stats_and_reindex(index):
+    index.record_run(make_result('run-1', 60, 40.0, True, job_id='job-1'))
+    index.record_run(make_result('run-2', 60, 80.0, False))
+    index.record_run(make_result('run-2', 60, 60.0, False))
+
+    run = index.get('run-1')
+    assert run['job_id'] == 'job-1' and run['final_words'] == 800
+    assert index.get('missing') is None
+    assert len(index) == 2
+
+    stats = index.stats(since=time.time() - 3600)
+    assert stats['runs'] == 2 and stats['fact_check_failed'] == 1
+    assert stats['avg_duration_seconds'] == 50.0
+    assert stats['avg_stage_seconds']['Fact-Checker'] == 25.0
+
+
+def test_rebuild_from_logs(index, tmp_path):
+    log = tmp_path / 'master.jsonl'
+    lines = [
+        json.dumps(make_result('run-1', 60, 10.0, True, timestamp='2024-01-01T12:00:00')),
+        json.dumps({'event': 'agent', 'run_id': 'run-1', 'agent': 'Writer'}),
+        json.dumps(dict(make_result('run-2', 60, 20.0, False), event='pipeline_result')),
+        'not json',
+    ]
+    log.write_text('\n'.join(lines) + '\n')
+
+    assert index.rebuild([str(log)]) == 2
+    assert {run['run_id'] for run in index.query()} == {'run-1', 'run-2'}
+
+
+def test_log_writer_maintains_the_index(index, tmp_path):
+    writer = LogWriter(directory=str(tmp_path / 'logs'), sync=False, index=index)
+    writer.write(dict(make_result('run-1', 0, 10.0, False), event='pipeline_result', final_content='x' * 5000))
+    writer.write({'event': 'agent', 'run_id': 'run-1', 'agent': 'Writer'})
+    writer.close()
+
+    assert [run['run_id'] for run in index.query(fact_check=False)] == ['run-1']
+    assert len(index) == 1
+
+
+def test_parse_since():
+    assert parse_since('24h') == 86400
+    assert parse_since('90m') == 5400
+    assert parse_since('30') == 30
+    with pytest.raises(ValueError):
+        parse_since('yesterday')
@@ -0,0 +1,87 @@
+"""Tests for concurrent per-topic web search."""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib.search_pool import StubSearchBackend, search_topics
+
+
+@pytest.fixture(autouse=True)
+def web_backend(monkeypatch):
+    monkeypatch.delenv('SEARCH_BACKEND', raising=False)
+
+
+def backend(delays: dict, fail=()):
+    release = threading.Event()
+
+    def search(query, max_results):
+        if query in fail:
+            raise RuntimeError(f"search failed for {query}")
+        release.wait(delays.get(query, 0))
+        return [{'title': query, 'url': f"https://example.com/{query}"}]
+
+    search.release = release
+    return search
+
+
+def test_failed_queries_map_to_empty_results():
+    results = search_topics(['agents', 'planning', 'tools'], backend({}, fail={'planning'}), timeout=5)
+
+    assert list(results) == ['agents', 'planning', 'tools']
+    assert results['planning'] == []
+    assert [r['title'] for r in results['agents'] + results['tools']] == ['agents', 'tools']
+
+
+def test_timeout_applies_to_each_query():
+    search = backend({'slow': 30, 'a': 0.1, 'b': 0.1, 'c': 0.1})
+    start = time.monotonic()
+    try:
+        # Two waves: a batch-wide timeout * waves deadline would wait 1.2s for 'slow'
+        results = search_topics(['slow', 'a', 'b', 'c'], search, max_concurrency=2, timeout=0.6)
+    finally:
+        search.release.set()
+    elapsed = time.monotonic() - start
+
+    assert results['slow'] == []
+    assert all(results[topic] for topic in ('a', 'b', 'c'))
+    assert 0.6 <= elapsed < 1.1
+
+
+def test_queued_queries_get_their_own_budget():
+    # Each query needs most of its budget; together they need more than one
+    search = backend({topic: 0.3 for topic in 'abcd'})
+    results = search_topics(list('abcd'), search, max_concurrency=1, timeout=0.5)
+
+    assert all(results.values())
+
+
+def test_stub_backend_is_deterministic_across_threads():
+    stub = StubSearchBackend(latency=0, jitter=0.001, failure_rate=0.5, seed=7)
+    queries = [f"topic {i}" for i in range(40)]
+
+    def outcomes(order):
+        found = {}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for query, result in zip(order, executor.map(lambda q: _try(stub, q), order)):
+                found[query] = result
+        return found
+
+    first, second = outcomes(queries), outcomes(list(reversed(queries)))
+
+    assert first == second
+    assert 0 < sum(result is None for result in first.values()) < len(queries)
+    assert stub.calls == 80
+
+
+def _try(stub, query):
+    try:
+        return stub(query, 2)
+    except RuntimeError:
+        return None
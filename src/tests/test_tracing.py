@@ -0,0 +1,143 @@
+"""Tests for spans, run breakdowns and Prometheus metrics."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.lib import tracing
+from src.lib.ollama_pool import OllamaPool
+from src.lib.search_pool import StubSearchBackend, search_topics
+from src.lib.tracing import Registry, breakdown, run_trace, span
+
+REPLY = {
+    'response': 'Agents plan and act.',
+    'prompt_eval_count': 120, 'eval_count': 40,
+    'load_duration': 50_000_000, 'prompt_eval_duration': 150_000_000, 'eval_duration': 2_000_000_000,
+}
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(tracing, 'metrics', registry)
+    return registry
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = OllamaPool(hosts=['http://localhost:1'], model='phi3')
+    monkeypatch.setattr(pool, 'request', lambda *args, **kwargs: dict(REPLY))
+    monkeypatch.setattr(pool, 'stream', lambda *args, **kwargs: iter([
+        {'response': 'Agents ', 'done': False},
+        {'response': 'act.', 'done': False},
+        {'done': True, 'prompt_eval_count': 80, 'eval_count': 2, 'eval_duration': 100_000_000},
+    ]))
+    return pool
+
+
+def test_llm_spans_nest_under_agents(pool, registry):
+    with run_trace('run-1') as trace:
+        with span('agent', 'Writer'):
+            pool.generate("Write about agents")
+            pool.generate("Write about agents", on_token=lambda token: None)
+        with span('agent', 'Fact-Checker', attempt=1):
+            pool.generate_many(["Check one", "Check two"])
+
+    llm = [record for record in trace.spans if record['kind'] == 'llm']
+    assert [record['agent'] for record in llm] == ['Writer', 'Writer', 'Fact-Checker', 'Fact-Checker']
+    assert llm[0]['time_to_first_token'] == 0.2
+    assert llm[0]['tokens_per_second'] == 20.0
+    assert llm[1]['streaming'] is True and llm[1]['time_to_first_token'] is not None
+
+    writer = trace.breakdown()['agents']['Writer']
+    assert writer['calls'] == 1
+    assert writer['llm']['requests'] == 2
+    assert writer['llm']['prompt_tokens'] == 200 and writer['llm']['completion_tokens'] == 42
+    assert trace.breakdown()['agents']['Fact-Checker']['llm']['requests'] == 2
+
+    assert registry.llm_tokens.value('Writer', 'completion') == 42
+    assert registry.llm_ttft.count('Fact-Checker') == 2
+    assert registry.span_seconds.count('llm', 'phi3') == 4
+
+
+def test_searches_and_errors(registry):
+    backend = StubSearchBackend(latency=0, failure_rate=0.5, seed=3)
+    with run_trace('run-1') as trace:
+        with span('agent', 'Researcher'):
+            search_topics(['agents', 'planning', 'tools', 'memory'], backend, max_concurrency=2, timeout=5)
+        with pytest.raises(RuntimeError):
+            with span('render', 'pdf'):
+                raise RuntimeError("boom")
+
+    summary = trace.breakdown()
+    assert summary['search']['count'] == 4
+    assert 0 < summary['search']['errors'] < 4
+    assert summary['render'] == {'count': 1, 'seconds': summary['render']['seconds'], 'errors': 1}
+    assert all(record['agent'] == 'Researcher' for record in trace.spans if record['kind'] == 'search')
+    assert registry.span_errors.value('render', 'pdf') == 1
+
+
+def test_spans_outside_a_trace_only_feed_metrics(registry):
+    with span('render', 'docx'):
+        pass
+    assert registry.span_seconds.count('render', 'docx') == 1
+
+    # bind carries the trace to plain threads
+    with run_trace('run-1') as trace:
+        def work():
+            with span('search', 'web'):
+                pass
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(work).result()
+            executor.submit(tracing.bind(work)).result()
+    assert len(trace.spans) == 1
+
+
+def test_spans_can_continue_across_processes(registry):
+    spans = []
+    with run_trace('run-1', spans):
+        with span('agent', 'Researcher'):
+            pass
+    with run_trace('run-1', spans):
+        with span('agent', 'Writer'):
+            pass
+    assert set(breakdown(spans)['agents']) == {'Researcher', 'Writer'}
+
+
+def test_prometheus_exposition(registry):
+    registry.span_seconds.observe(0.3, 'llm', 'phi3')
+    registry.span_seconds.observe(400, 'llm', 'phi3')
+    registry.llm_tokens.inc(40, 'Writer', 'completion')
+
+    text = registry.render()
+    assert '# TYPE contentforge_span_duration_seconds histogram' in text
+    assert 'contentforge_span_duration_seconds_bucket{kind="llm",name="phi3",le="0.25"} 0' in text
+    assert 'contentforge_span_duration_seconds_bucket{kind="llm",name="phi3",le="0.5"} 1' in text
+    assert 'contentforge_span_duration_seconds_bucket{kind="llm",name="phi3",le="+Inf"} 2' in text
+    assert 'contentforge_span_duration_seconds_count{kind="llm",name="phi3"} 2' in text
+    assert 'contentforge_llm_tokens_total{agent="Writer",type="completion"} 40' in text
+    assert registry.span_seconds.totals() == {('llm', 'phi3'): (2, 400.3)}
+
+
+def test_stub_search_backend_from_environment(monkeypatch, registry):
+    monkeypatch.setenv('SEARCH_BACKEND', 'stub')
+    monkeypatch.setenv('SEARCH_STUB_LATENCY', '0')
+
+    def web(query, max_results):
+        raise AssertionError("web search called")
+
+    results = search_topics(['agents', 'planning'], web, max_results=2, timeout=5)
+    assert [len(found) for found in results.values()] == [2, 2]
+    assert registry.span_seconds.count('search', 'web') == 2
+
+
+def test_disabled(monkeypatch, registry):
+    monkeypatch.setenv('TRACING_ENABLED', 'false')
+    with run_trace('run-1') as trace:
+        with span('agent', 'Writer'):
+            pass
+    assert trace.spans == [] and registry.span_seconds.count('agent', 'Writer') == 0